@@ -1,9 +1,119 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-from src.Curses.main import main
+import argparse
+import sys
+
+
+def compact_cache() -> int:
+    from src.search import compact_cache
+
+    try:
+        before, after = compact_cache()
+    except (ValueError, OSError) as e:
+        print(f'Cannot compact the cache: {e}')
+        return 1
+
+    print(f'Cache compacted: {before / 1024:.0f} KiB -> {after / 1024:.0f} KiB')
+    return 0
+
+
+def rebuild_cache() -> int:
+    from src.search import rebuild_cache
+
+    def progress(rebuilt: int, failed: int) -> None:
+        print(f'\rRebuilt {rebuilt} entries, {failed} failed', end='', flush=True)
+
+    try:
+        rebuilt, failed = rebuild_cache(progress)
+    except (ValueError, OSError) as e:
+        print(f'Cannot rebuild the cache: {e}')
+        return 1
+
+    if rebuilt or failed:
+        print()
+    print(f'Cache rebuilt: {rebuilt} entries parsed again, {failed} will be looked up again')
+    return 0
+
+
+def batch(args: argparse.Namespace) -> int:
+    from src.batch import print_report
+    from src.batch import Rule
+    from src.batch import run
+
+    rule = Rule(args.defs, args.label, args.pos)
+    if args.batch == '-':
+        report = run(sys.stdin, rule, dry_run=args.dry_run)
+    else:
+        try:
+            with open(args.batch, encoding='utf-8') as f:
+                report = run(f, rule, dry_run=args.dry_run)
+        except OSError as e:
+            print(f'Cannot read the word list: {e}', file=sys.stderr)
+            return 1
+
+    print_report(report)
+    return 1 if report.failures else 0
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--compact-cache',
+        action='store_true',
+        help='evict expired and excess entries from the dictionary cache, '
+             'rewrite it without unused space and exit'
+    )
+    parser.add_argument(
+        '--rebuild-cache',
+        action='store_true',
+        help='parse the stored pages of entries made by older versions of '
+             'the program again, instead of downloading them, and exit'
+    )
+    batch_group = parser.add_argument_group(
+        'batch mode',
+        'add a card for every word of a word list without the interactive interface'
+    )
+    batch_group.add_argument(
+        '--batch',
+        metavar='FILE',
+        help="file with a word (or a query with dictionary flags) per line, '-' for stdin"
+    )
+    batch_group.add_argument(
+        '--defs',
+        type=int,
+        default=1,
+        metavar='N',
+        help='number of definitions to put on every card (default: 1)'
+    )
+    batch_group.add_argument(
+        '--label',
+        help='select only definitions with a matching label, e.g. "informal"'
+    )
+    batch_group.add_argument(
+        '--pos',
+        help='select only definitions of a matching part of speech, e.g. "n" or "adj"'
+    )
+    batch_group.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='print the cards instead of adding them'
+    )
+    args = parser.parse_args()
+
+    if args.compact_cache:
+        raise SystemExit(compact_cache())
+    if args.rebuild_cache:
+        raise SystemExit(rebuild_cache())
+
+    if args.batch is not None:
+        try:
+            raise SystemExit(batch(args))
+        except KeyboardInterrupt:
+            print()
+            raise SystemExit(130)
+
+    from src.Curses.main import main
     try:
         main()
     except KeyboardInterrupt:
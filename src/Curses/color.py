@@ -76,9 +76,14 @@ class _Color:
     __slots__ = (
         'cursor', 'def1', 'def2', 'delimit', 'err', 'etym', 'exsen', 'heed',
         'hl', 'index', 'infl', 'label', 'phon', 'phrase', 'pos', 'selection',
-        'sign', 'success', 'syn',
+        'sign', 'success', 'syn', 'version',
     )
 
+    def __init__(self) -> None:
+        # Incremented whenever colors change, things drawn with them might
+        # need to be formatted again.
+        self.version = 0
+
     @staticmethod
     def color(c: config_t, key: colorkey_t) -> int:
         try:
@@ -115,6 +120,7 @@ class _Color:
         self.sign      = _Color.color(c, 'c.sign')
         self.success   = _Color.color(c, 'c.success')
         self.syn       = _Color.color(c, 'c.syn')
+        self.version  += 1
 
     def init(self, c: config_t, ncolors: int) -> None:
         for k, v in COLOR_NAME_TO_COLOR.items():
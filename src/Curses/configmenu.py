@@ -149,9 +149,26 @@ Column([
         ),
         Option(
             'cachefile',
-            'Cache and save dictionaries to disk (saved on program exit)',
+            'Cache dictionaries on disk (the cache is shared between instances)',
             bool
         ),
+        Option(
+            'cachelimit',
+            'Max number of entries and/or size (B, K, M, G) of the cache',
+            ['-', '50000', '256M', '1G']
+        ),
+        Option(
+            'cachepolicy',
+            'Evict least recently (lru) or least frequently (lfu) used entries',
+            _configv_annotations('cachepolicy'),
+            strict=True
+        ),
+        Option(
+            'cachettl',
+            'Days after which entries expire, e.g. "diki:90 ahd:365"',
+            ['-', 'diki:90'],
+            clear_prompt=False
+        ),
         ]
     )
 ]),
@@ -224,6 +241,11 @@ Column([
             'Hide the F-key help bar on program startup',
             bool
         ),
+        Option(
+            'procparse',
+            'Parse pages in worker processes, keeps the UI responsive during lookups',
+            bool
+        ),
         ]
     )
 ]),
@@ -13,6 +13,7 @@ except ImportError:
     raise
 
 import atexit
+import bisect
 import contextlib
 import functools
 import subprocess
@@ -36,6 +37,7 @@ from src.Curses.pager import Pager
 from src.Curses.prompt import CompletionMenu
 from src.Curses.prompt import Prompt
 from src.Curses.proto import ScreenBufferProto
+from src.Curses.proto import SearchProgressProto
 from src.Curses.proto import StatusProto
 from src.Curses.screen import Screen
 from src.Curses.util import Attr
@@ -56,7 +58,9 @@ from src.data import config
 from src.data import getconf
 from src.data import config_save
 from src.data import DATA_DIR
+from src.data import dictkey_t
 from src.data import WINDOWS
+from src.Dictionaries.base import Dictionary
 
 
 class StatusLine(NamedTuple):
@@ -71,6 +75,7 @@ class Status:
         self.persistence = persistence
         self._buf: list[StatusLine] = []
         self._ticks = 0
+        self._progress_line: StatusLine | None = None
 
     @property
     def height(self) -> int:
@@ -95,6 +100,21 @@ class Status:
     def clear(self) -> None:
         self._buf.clear()
 
+    # Shows `header` in place of the line shown by the previous call,
+    # None removes the line.
+    def progress(self, header: str | None, body: str | None = None) -> None:
+        for i, line in enumerate(self._buf):
+            if line is self._progress_line:
+                del self._buf[i]
+                break
+
+        if header is None:
+            self._progress_line = None
+        else:
+            self._progress_line = StatusLine(header, body, Color.heed)
+            self._ticks = 0
+            self._buf.append(self._progress_line)
+
     def tick(self) -> None:
         if self._ticks >= self.persistence:
             self.clear()
@@ -164,6 +184,43 @@ class StatusEcho(StatusProto):
         self._refresh()
 
 
+# Shows dictionaries as soon as they are looked up. Screens are kept in the
+# order of queries and their dictionaries, whatever the order in which the
+# lookups complete.
+class ProgressiveScreens(SearchProgressProto):
+    def __init__(self, screenbuf: ScreenBuffer) -> None:
+        self.screenbuf = screenbuf
+        self.screens: list[Screen] = []
+        self._slots: list[tuple[int, int]] = []
+
+    def _refresh(self) -> None:
+        self.screenbuf.draw()
+        self.screenbuf.win.refresh()
+
+    def result(self, slot: tuple[int, int], dictionary: Dictionary) -> None:
+        screen = Screen(self.screenbuf.win, dictionary)
+        i = bisect.bisect(self._slots, slot)
+        self._slots.insert(i, slot)
+        self.screens.insert(i, screen)
+
+        if len(self.screens) == 1:
+            self.screenbuf._insert_screens(self.screens)
+        elif self.screenbuf.screens is self.screens:
+            self.screenbuf._screen_inserted(i)
+
+        self._refresh()
+
+    def pending(self, lookups: Sequence[tuple[dictkey_t, str]]) -> None:
+        if lookups:
+            self.screenbuf.status.progress(
+                'Looking up:', ', '.join(f'{key} {query!r}' for key, query in lookups)
+            )
+        else:
+            self.screenbuf.status.progress(None)
+
+        self._refresh()
+
+
 def _make_help(lines: list[str]) -> list[tuple[str, list[Attr]]]:
     result = []
     for line in lines:
@@ -238,6 +295,8 @@ f'Ankidodawacz v{__version__} @bold',
 '                   the other, expands to "-ahd -farlex" by default',
 '  -all             query all monolingual dictionaries,',
 f'                   expands to "-{" -".join(search.MONOLINGUAL_DICTIONARIES)}"',
+'  -refresh         look up again instead of using the cache, unchanged',
+'                   pages are not downloaded again',
 '',
 f' To make multiple queries at once separate them with a "{search.QUERY_SEPARATOR}".',
 ' You can also use multiple search options at once.',
@@ -336,6 +395,9 @@ class ScreenBuffer(ScreenBufferProto):
         self.history = QueryHistory(win, os.path.join(DATA_DIR, 'history.txt'))
         self.page: Screen | Pager = self.help_pager
         self.bar_margin: int = not getconf('nohelp')
+        # What the last frame was drawn for, if only incremental frames
+        # have been drawn on the window since then.
+        self._last_frame: tuple[Screen | Pager, int, int, int] | None = None
 
     @contextlib.contextmanager
     def extra_margin(self, n: int) -> Iterator[None]:
@@ -352,6 +414,18 @@ class ScreenBuffer(ScreenBufferProto):
         self.screens = screens
         self._screen_i = 0
 
+    # Keeps the current page after a screen has been inserted into
+    # `self.screens` at index `i`.
+    def _screen_inserted(self, i: int) -> None:
+        if i <= self._screen_i:
+            self._screen_i += 1
+
+    def _show_current_screen(self) -> None:
+        screen = self.screens[self._screen_i]
+        if screen.needs_resize():
+            screen.resize()
+        self.page = screen
+
     def _search_prompt(self, pretype: str) -> None:
         with self.extra_margin(not self.bar_margin):
             typed = Prompt(
@@ -369,12 +443,16 @@ class ScreenBuffer(ScreenBufferProto):
             return
 
         self.history.add_up_arrow_entry(typed)
+        progress = ProgressiveScreens(self)
         try:
-            results = search.search(StatusEcho(self, self.status), queries)
+            results = search.search(StatusEcho(self, self.status), queries, progress)
         except KeyboardInterrupt:
             return
+        finally:
+            self.status.progress(None)
 
-        screens = []
+        if not getconf('histsave'):
+            return
 
         assert len(queries) == len(results)
         for query, dictionaries in zip(queries, results):
@@ -382,9 +460,6 @@ class ScreenBuffer(ScreenBufferProto):
                 continue
 
             for dictionary in dictionaries:
-                screens.append(Screen(self.win, dictionary))
-                if not getconf('histsave'):
-                    continue
 
                 phrases = dictionary.unique_phrases()
                 for phrase in phrases:
@@ -427,11 +502,6 @@ class ScreenBuffer(ScreenBufferProto):
                     self.history.add_cmenu_entry(phrases[0].replace(',', ' '))
                     self.history.add_cmenu_entry(query.query)
 
-        if not screens:
-            return
-
-        self._insert_screens(screens)
-
     def search_prompt(self, *, pretype: str = '') -> None:
         self.status.clear()
         self._search_prompt(' '.join(pretype.split()))
@@ -440,7 +510,7 @@ class ScreenBuffer(ScreenBufferProto):
 
     def page_back(self) -> bool:
         if self.screens and isinstance(self.page, Pager):
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
             return True
         else:
             return False
@@ -524,12 +594,20 @@ class ScreenBuffer(ScreenBufferProto):
         for index, span, attr in attrs:
             win.chgat(y, index, span, attr)
 
-    def draw(self) -> None:
+    # Makes the next frame draw everything, e.g. after something else has
+    # drawn on the window.
+    def damage_all(self) -> None:
+        self._last_frame = None
+
+    # An `incremental` frame draws again only the lines of a dictionary that
+    # have changed since the last frame, but only if the last frame was also
+    # incremental and nothing else can have drawn on the window since then.
+    # Nothing but the caller's `getch()` may follow it. Borders, status and
+    # the F-key bar are always drawn again, they take a few calls.
+    def draw(self, *, incremental: bool = False) -> None:
         if curses.COLS < CURSES_COLS_MIN_VALUE:
             return
 
-        self.win.erase()
-
         page = self.page
         if self.bar_margin > page.margin_bot:
             page.margin_bot = self.bar_margin
@@ -538,6 +616,22 @@ class ScreenBuffer(ScreenBufferProto):
         if self.status.height > initial_margin:
             page.margin_bot = self.status.height
 
+        frame = (page, page.margin_bot, curses.LINES, curses.COLS)
+        if (
+                incremental
+            and isinstance(page, Screen)
+            and frame == self._last_frame
+            and curses.LINES - 1 - page.margin_bot > 0
+        ):
+            # The bottom border and what is below it.
+            self.win.move(curses.LINES - 1 - page.margin_bot, 0)
+            self.win.clrtobot()
+        else:
+            self.win.erase()
+            if isinstance(page, Screen):
+                page.damage_all()
+        self._last_frame = frame if incremental else None
+
         page.draw()
         self._draw_border(page.margin_bot)
         if not self.status.draw_if_available() and self.bar_margin:
@@ -549,36 +643,38 @@ class ScreenBuffer(ScreenBufferProto):
         curses.update_lines_cols()
 
         self.help_pager.resize()
-        for screen in self.screens:
-            screen.resize()
+        # Other screens are laid out again when they are switched to.
+        if isinstance(self.page, Screen):
+            self.page.resize()
 
         self.win.clearok(True)
+        self.damage_all()
 
     def next_page(self) -> None:
         if self.screens and isinstance(self.page, Screen):
             if self._screen_i < len(self.screens) - 1:
                 self._screen_i += 1
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
 
     def prev_page(self) -> None:
         if self.screens and isinstance(self.page, Screen):
             if self._screen_i > 0:
                 self._screen_i -= 1
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
 
     def cycle_next_page(self) -> None:
         if self.screens and isinstance(self.page, Screen):
             self._screen_i = (self._screen_i + 1) % len(self.screens)
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
 
     def cycle_prev_page(self) -> None:
         if self.screens and isinstance(self.page, Screen):
             self._screen_i = (self._screen_i - 1) % len(self.screens)
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
 
     def toggle_help(self) -> None:
         if self.screens and isinstance(self.page, Pager):
-            self.page = self.screens[self._screen_i]
+            self._show_current_screen()
         else:
             self.page = self.help_pager
 
@@ -812,7 +908,7 @@ def curses_main(stdscr: curses._CursesWindow) -> None:
 
     while True:
         screenbuf.status.tick()
-        screenbuf.draw()
+        screenbuf.draw(incremental=True)
 
         c = curses.keyname(stdscr.getch())
         if screenbuf.dispatch(c):
@@ -905,6 +1001,7 @@ def curses_main(stdscr: curses._CursesWindow) -> None:
                 configmenu.run(config)
             except ValueError as e:
                 screenbuf.status.error('F2 Config:', str(e))
+            screenbuf.damage_all()
 
             if configmenu.apply_changes() or curses.is_term_resized(_l, _c):
                 screenbuf.resize()
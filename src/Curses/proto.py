@@ -3,11 +3,15 @@ from __future__ import annotations
 import contextlib
 from typing import Iterator
 from typing import Protocol
+from typing import Sequence
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     import curses
 
+    from src.data import dictkey_t
+    from src.Dictionaries.base import Dictionary
+
 
 class StatusProto(Protocol):
     def writeln(self, header: str, body: str | None = None) -> None: ...
@@ -23,3 +27,10 @@ class ScreenBufferProto(Protocol):
     def extra_margin(self, n: int) -> Iterator[None]: ...
     def draw(self) -> None: ...
     def resize(self) -> None: ...
+
+
+class SearchProgressProto(Protocol):
+    # `slot` is the (query index, dictionary index) of `dictionary` in the
+    # results of the search.
+    def result(self, slot: tuple[int, int], dictionary: Dictionary) -> None: ...
+    def pending(self, lookups: Sequence[tuple[dictkey_t, str]]) -> None: ...
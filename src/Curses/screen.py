@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import curses
 from typing import Callable
+from typing import Iterator
 from typing import Literal
 from typing import Mapping
 from typing import NamedTuple
+from typing import overload
 from typing import Sequence
 from typing import TYPE_CHECKING
 
+from src.card import prefetch_audio
 from src.Curses.color import Color
 from src.Curses.util import Attr
+from src.Curses.util import attr_runs
 from src.Curses.util import BORDER_PAD
 from src.Curses.util import compose_attrs
 from src.Curses.util import truncate
@@ -32,6 +36,12 @@ if TYPE_CHECKING:
 AUTO_COLUMN_WIDTH = 52
 COLUMN_MARGIN = 1
 
+# Number of column widths `ReflowCache` remembers lines for.
+REFLOW_WIDTHS = 4
+
+# Number of lines a `LazyColumn` formats past the one it is asked for.
+LAYOUT_LOOKAHEAD = 100
+
 
 class FLine(NamedTuple):
     op_i: int
@@ -171,183 +181,303 @@ def wrap(
         PUSH_LINE(cur_indent + s[-line_i:])
 
 
-def format_dictionary(dictionary: Dictionary, width: int) -> list[FLine]:
-    indent_weight = 0 if width > AUTO_COLUMN_WIDTH / 2 else -width
-
-    index = 0
-    result: list[FLine] = []
-    for i, op in enumerate(dictionary.contents):
-        if isinstance(op, DEF):
-            index += 1
-            index_len = len(str(index))
-            indent = (indent_weight + index_len + 2) * ' '
-
-            if op.subdef:
-                sign = ' '
-                hls = [
-                    (1, 0),
-                    (index_len, Color.index),
-                    (1, 0),
-                ]
-            else:
-                sign = '>'
-                hls = [
-                    (1, Color.sign),
-                    (index_len, Color.index),
-                    (1, 0),
-                ]
-
-            if op.label:
-                buf = f'{sign}{index} {{{op.label}}} {op.definition}'
-                hls.append((len(op.label) + 2, Color.label))
-                hls.append((1, 0))
-            else:
-                buf = f'{sign}{index} {op.definition}'
-
-            hls.append((len(op.definition), Color.def1 if index % 2 else Color.def2))
-
-            nexamples = len(op.examples)
-            if nexamples == 1:
-                example = op.examples[0]
-                if len(buf) + 2 + len(example) <= width or indent_weight:
-                    buf += '  ' + example
-                    hls.append((2, 0))
-                    hls.append((len(example), Color.exsen))
-                    nexamples -= 1
-
-            wrap(result, i, buf, hls, width, indent=indent)
-
-            if nexamples:
-                predent = (indent_weight + index_len + 1) * ' '
-                for example in op.examples:
-                    wrap(result, i, example,
-                        (
-                            (len(example), Color.exsen),
-                        ), width, predent=predent, indent=indent or ' ')
-
-        elif isinstance(op, LABEL):
-            result.append(FLine(i, '', []))
-            if not op.label:
-                continue
-
-            if op.extra:
-                wrap(result, i, f'{op.label}  {op.extra}',
-                    (
-                        (len(op.label), Color.label),
-                        (2, 0),
-                        (len(op.extra), Color.infl),
-                    ), width)
-            else:
-                wrap(result, i, op.label,
-                    ((len(op.label), Color.label),),
-                    width)
-
-        elif isinstance(op, PHRASE):
-            if op.extra:
-                wrap(result, i, f'{op.phrase}  {op.extra}',
-                    (
-                        (len(op.phrase), Color.phrase),
-                        (2, 0),
-                        (len(op.extra), Color.phon),
-                    ), width)
-            else:
-                wrap(result, i, op.phrase,
-                    ((len(op.phrase), Color.phrase),),
-                    width)
-
-        elif isinstance(op, HEADER):
-            if i == 0:
-                continue
-
-            if op.header:
-                header = truncate(op.header, width - 6)
-                if header is None:
-                    buf = width * '─'
-                    attrs = [Attr(0, width, Color.delimit)]
-                else:
-                    buf = f'─[ {header} ]{(width - len(header) - 6) * "─"}─'
-                    attrs = compose_attrs(
-                        (
-                            (3, Color.delimit, 0),
-                            (len(header), Color.delimit | curses.A_BOLD, 0),
-                            (width, Color.delimit, 0),
-                        ), width=width
-                    )
-            else:
-                buf = width * '─'
-                attrs = [Attr(0, width, Color.delimit)]
+# Appends lines of `op`, the `i`th op of a dictionary, to `dest`. `index` is
+# the number of DEF and SYN ops up to and including `op`.
+def _format_op(
+        dest: list[FLine],
+        i: int,
+        op: op_t,
+        index: int,
+        width: int,
+        indent_weight: int
+) -> None:
+    if isinstance(op, DEF):
+        index_len = len(str(index))
+        indent = (indent_weight + index_len + 2) * ' '
+
+        if op.subdef:
+            sign = ' '
+            hls = [
+                (1, 0),
+                (index_len, Color.index),
+                (1, 0),
+            ]
+        else:
+            sign = '>'
+            hls = [
+                (1, Color.sign),
+                (index_len, Color.index),
+                (1, 0),
+            ]
+
+        if op.label:
+            buf = f'{sign}{index} {{{op.label}}} {op.definition}'
+            hls.append((len(op.label) + 2, Color.label))
+            hls.append((1, 0))
+        else:
+            buf = f'{sign}{index} {op.definition}'
 
-            result.append(FLine(i, buf, attrs))
+        hls.append((len(op.definition), Color.def1 if index % 2 else Color.def2))
 
-        elif isinstance(op, AUDIO):
-            pass
+        nexamples = len(op.examples)
+        if nexamples == 1:
+            example = op.examples[0]
+            if len(buf) + 2 + len(example) <= width or indent_weight:
+                buf += '  ' + example
+                hls.append((2, 0))
+                hls.append((len(example), Color.exsen))
+                nexamples -= 1
 
-        elif isinstance(op, ETYM):
-            result.append(FLine(i, '', []))
-            wrap(result, i, op.etymology,
-                ((len(op.etymology), Color.etym),),
-                width)
+        wrap(dest, i, buf, hls, width, indent=indent)
 
-        elif isinstance(op, POS):
-            result.append(FLine(i, '', []))
-            for pos, phon in op.pos:
-                wrap(result, i, f'{pos}  {phon}',
+        if nexamples:
+            predent = (indent_weight + index_len + 1) * ' '
+            for example in op.examples:
+                wrap(dest, i, example,
                     (
-                        (len(pos), Color.pos),
-                        (2, 0),
-                        (len(phon), Color.phon),
-                    ), width)
+                        (len(example), Color.exsen),
+                    ), width, predent=predent, indent=indent or ' ')
 
-        elif isinstance(op, SYN):
-            index += 1
-            index_len = len(str(index))
-            indent = (indent_weight + index_len + 2) * ' '
+    elif isinstance(op, LABEL):
+        dest.append(FLine(i, '', []))
+        if not op.label:
+            return
 
-            wrap(result, i, op.synonyms,
-                ((len(op.synonyms), Color.syn),),
+        if op.extra:
+            wrap(dest, i, f'{op.label}  {op.extra}',
+                (
+                    (len(op.label), Color.label),
+                    (2, 0),
+                    (len(op.extra), Color.infl),
+                ), width)
+        else:
+            wrap(dest, i, op.label,
+                ((len(op.label), Color.label),),
                 width)
 
-            wrap(result, i, f'>{index} {op.definition}',
+    elif isinstance(op, PHRASE):
+        if op.extra:
+            wrap(dest, i, f'{op.phrase}  {op.extra}',
                 (
-                    (1, Color.sign),
-                    (index_len, Color.index),
-                    (1, 0),
-                    (len(op.definition), Color.def1 if index % 2 else Color.def2),
-                ), width, indent=indent)
+                    (len(op.phrase), Color.phrase),
+                    (2, 0),
+                    (len(op.extra), Color.phon),
+                ), width)
+        else:
+            wrap(dest, i, op.phrase,
+                ((len(op.phrase), Color.phrase),),
+                width)
 
-            predent = (indent_weight + index_len + 1) * ' '
-            for example in op.examples:
-                wrap(result, i, example,
-                    (
-                        (len(example), Color.exsen),
-                    ), width, predent=predent, indent=indent or ' ')
+    elif isinstance(op, HEADER):
+        if i == 0:
+            return
 
-        elif isinstance(op, NOTE):
-            buf = f'> {op.note}'
-            if len(buf) < AUTO_COLUMN_WIDTH:
-                buf = truncate(buf, width)  # type: ignore[assignment]
-                if buf is None:
-                    continue  # type: ignore[unreachable]
+        if op.header:
+            header = truncate(op.header, width - 6)
+            if header is None:
+                buf = width * '─'
+                attrs = [Attr(0, width, Color.delimit)]
+            else:
+                buf = f'─[ {header} ]{(width - len(header) - 6) * "─"}─'
                 attrs = compose_attrs(
                     (
-                        (2, Color.heed | curses.A_BOLD, 0),
-                        (len(op.note), curses.A_BOLD, 0),
+                        (3, Color.delimit, 0),
+                        (len(header), Color.delimit | curses.A_BOLD, 0),
+                        (width, Color.delimit, 0),
                     ), width=width
                 )
-                result.append(FLine(i, buf, attrs))
-            else:
-                wrap(result, i, buf,
-                    (
-                        (2, Color.heed | curses.A_BOLD),
-                        (len(op.note), curses.A_BOLD),
-                    ), width)
+        else:
+            buf = width * '─'
+            attrs = [Attr(0, width, Color.delimit)]
+
+        dest.append(FLine(i, buf, attrs))
+
+    elif isinstance(op, AUDIO):
+        pass
 
+    elif isinstance(op, ETYM):
+        dest.append(FLine(i, '', []))
+        wrap(dest, i, op.etymology,
+            ((len(op.etymology), Color.etym),),
+            width)
+
+    elif isinstance(op, POS):
+        dest.append(FLine(i, '', []))
+        for pos, phon in op.pos:
+            wrap(dest, i, f'{pos}  {phon}',
+                (
+                    (len(pos), Color.pos),
+                    (2, 0),
+                    (len(phon), Color.phon),
+                ), width)
+
+    elif isinstance(op, SYN):
+        index_len = len(str(index))
+        indent = (indent_weight + index_len + 2) * ' '
+
+        wrap(dest, i, op.synonyms,
+            ((len(op.synonyms), Color.syn),),
+            width)
+
+        wrap(dest, i, f'>{index} {op.definition}',
+            (
+                (1, Color.sign),
+                (index_len, Color.index),
+                (1, 0),
+                (len(op.definition), Color.def1 if index % 2 else Color.def2),
+            ), width, indent=indent)
+
+        predent = (indent_weight + index_len + 1) * ' '
+        for example in op.examples:
+            wrap(dest, i, example,
+                (
+                    (len(example), Color.exsen),
+                ), width, predent=predent, indent=indent or ' ')
+
+    elif isinstance(op, NOTE):
+        buf = f'> {op.note}'
+        if len(buf) < AUTO_COLUMN_WIDTH:
+            buf = truncate(buf, width)  # type: ignore[assignment]
+            if buf is None:
+                return  # type: ignore[unreachable]
+            attrs = compose_attrs(
+                (
+                    (2, Color.heed | curses.A_BOLD, 0),
+                    (len(op.note), curses.A_BOLD, 0),
+                ), width=width
+            )
+            dest.append(FLine(i, buf, attrs))
         else:
-            raise AssertionError(f'unreachable {op!r}')
+            wrap(dest, i, buf,
+                (
+                    (2, Color.heed | curses.A_BOLD),
+                    (len(op.note), curses.A_BOLD),
+                ), width)
+
+    else:
+        raise AssertionError(f'unreachable {op!r}')
+
+
+# If `memo` is given, lines of ops it has are reused and lines of the others
+# are added to it. It maps op indices to lines and is specific to `width`.
+# return: Lines of every op, op by op.
+def _iter_formatted(
+        dictionary: Dictionary,
+        width: int,
+        memo: dict[int, list[FLine]] | None = None
+) -> Iterator[list[FLine]]:
+    indent_weight = 0 if width > AUTO_COLUMN_WIDTH / 2 else -width
+
+    index = 0
+    for i, op in enumerate(dictionary.contents):
+        if isinstance(op, (DEF, SYN)):
+            index += 1
+
+        lines = None if memo is None else memo.get(i)
+        if lines is None:
+            lines = []
+            _format_op(lines, i, op, index, width, indent_weight)
+            if memo is not None:
+                memo[i] = lines
+
+        yield lines
+
+
+def format_dictionary(
+        dictionary: Dictionary,
+        width: int,
+        memo: dict[int, list[FLine]] | None = None
+) -> list[FLine]:
+    result: list[FLine] = []
+    for lines in _iter_formatted(dictionary, width, memo):
+        result.extend(lines)
 
     return result
 
 
+# Same lines as `format_dictionary`, but ops are formatted as their lines are
+# needed, plus LAYOUT_LOOKAHEAD lines. The first screenful of a long entry
+# does not have to wait for the rest of it, `len()` and negative indices
+# format it whole.
+class LazyColumn(Sequence[FLine]):
+    def __init__(
+            self,
+            dictionary: Dictionary,
+            width: int,
+            memo: dict[int, list[FLine]] | None = None
+    ) -> None:
+        self._ops = _iter_formatted(dictionary, width, memo)
+        self._lines: list[FLine] = []
+
+    # return: True if there is the `i`th line, False otherwise.
+    def _format_until(self, i: int) -> bool:
+        lines = self._lines
+        if i < len(lines):
+            return True
+
+        until = i + LAYOUT_LOOKAHEAD
+        for op_lines in self._ops:
+            lines.extend(op_lines)
+            if len(lines) > until:
+                break
+
+        return i < len(lines)
+
+    def _format_all(self) -> list[FLine]:
+        for op_lines in self._ops:
+            self._lines.extend(op_lines)
+        return self._lines
+
+    @overload
+    def __getitem__(self, i: int) -> FLine: ...
+    @overload
+    def __getitem__(self, i: slice) -> list[FLine]: ...
+    def __getitem__(self, i: int | slice) -> FLine | list[FLine]:
+        if isinstance(i, slice):
+            return self._format_all()[i]
+        if i < 0:
+            return self._format_all()[i]
+
+        self._format_until(i)
+        return self._lines[i]
+
+    def __iter__(self) -> Iterator[FLine]:
+        i = 0
+        while self._format_until(i):
+            yield self._lines[i]
+            i += 1
+
+    def __len__(self) -> int:
+        return len(self._format_all())
+
+
+# Lines of ops of a single dictionary, as formatted for the last few column
+# widths. Going back to a previous width, e.g. when a terminal is resized
+# back and forth, does not wrap them again.
+class ReflowCache:
+    def __init__(self) -> None:
+        self._color_version = Color.version
+        self._widths: dict[int, dict[int, list[FLine]]] = {}
+
+    # return: `memo` of `format_dictionary` for `width`.
+    def lines_for(self, width: int) -> dict[int, list[FLine]]:
+        if self._color_version != Color.version:
+            # Attributes of the lines are out of date.
+            self._widths.clear()
+            self._color_version = Color.version
+
+        try:
+            result = self._widths.pop(width)
+        except KeyError:
+            result = {}
+            if len(self._widths) >= REFLOW_WIDTHS:
+                # The least recently used width.
+                del self._widths[next(iter(self._widths))]
+
+        self._widths[width] = result
+        return result
+
+
 def currently_selected_ops() -> tuple[type[op_t], ...]:
     result: list[type[op_t]] = [PHRASE]
     if getconf('audio'):
@@ -362,8 +492,9 @@ def currently_selected_ops() -> tuple[type[op_t], ...]:
 
 def layout(
         dictionary: Dictionary,
-        height: int
-) -> tuple[list[list[FLine]], int]:
+        height: int,
+        reflow: ReflowCache | None = None
+) -> tuple[Sequence[Sequence[FLine]], int]:
     width = curses.COLS - 2*BORDER_PAD + 1
     ndefinitions = dictionary.count(lambda x: isinstance(x, DEF))
 
@@ -385,7 +516,13 @@ def layout(
     except ZeroDivisionError:
         column_width = width
 
-    lines = format_dictionary(dictionary, column_width - 2*COLUMN_MARGIN)
+    text_width = column_width - 2*COLUMN_MARGIN
+    memo = None if reflow is None else reflow.lines_for(text_width)
+    if ncolumns == 1:
+        return [LazyColumn(dictionary, text_width, memo)], column_width
+
+    # Where columns break depends on the number of all lines.
+    lines = format_dictionary(dictionary, text_width, memo)
 
     max_column_height = len(lines) // ncolumns - 1
     column_break = max_column_height
@@ -410,61 +547,94 @@ def layout(
 
 
 class Cursor:
-    def __init__(self, selector: EntrySelector, columns: list[list[FLine]]) -> None:
+    def __init__(
+            self,
+            selector: EntrySelector,
+            columns: Sequence[Sequence[FLine]]
+    ) -> None:
         self.columns = columns
+        self._contents = selector.dictionary.contents
+        self._toggleable = selector.TOGGLEABLE
 
         self._col = self._cur_indx = 0
         self._phantom_cur_indices = [-1] * len(columns)
 
-        self._col_cur_lineof = []
-        self._col_indx_to_cur = []
+        # Cursor positions of every column, found as far as they are needed,
+        # so that lazily laid out columns are not laid out whole.
+        self._col_cur_lineof: list[dict[int, int]] = [{} for _ in columns]
+        self._col_indx_to_cur: list[list[int]] = [[] for _ in columns]
+        self._col_nscanned = [0] * len(columns)
+
+    # Finds cursor positions in column `col` until there are `n` of them,
+    # all of them if `n` is None.
+    # return: True if there are at least `n` of them, False otherwise.
+    def _scan(self, col: int, n: int | None = None) -> bool:
+        indx_to_cur = self._col_indx_to_cur[col]
+        if n is not None and len(indx_to_cur) >= n:
+            return True
 
-        contents = selector.dictionary.contents
-        for col in columns:
-            _cur_lineof = {}
-            _indx_to_cur = []
-            for i, line in enumerate(col):
+        cur_lineof = self._col_cur_lineof[col]
+        column = self.columns[col]
+        contents = self._contents
+        i = self._col_nscanned[col]
+        try:
+            while n is None or len(indx_to_cur) < n:
+                line = column[i]
                 if (
-                        line.op_i not in _cur_lineof
-                    and isinstance(contents[line.op_i], selector.TOGGLEABLE)
+                        line.op_i not in cur_lineof
+                    and isinstance(contents[line.op_i], self._toggleable)
                 ):
-                    _indx_to_cur.append(line.op_i)
-                    _cur_lineof[line.op_i] = i
+                    indx_to_cur.append(line.op_i)
+                    cur_lineof[line.op_i] = i
+                i += 1
+        except IndexError:
+            pass
+
+        self._col_nscanned[col] = i
+        return n is None or len(indx_to_cur) >= n
 
-            self._col_cur_lineof.append(_cur_lineof)
-            self._col_indx_to_cur.append(_indx_to_cur)
+    # return: Cursor indices of column `col`, with the lines they are at.
+    def _iter_curs(self, col: int) -> Iterator[tuple[int, int]]:
+        i = 0
+        while self._scan(col, i + 1):
+            cur = self._col_indx_to_cur[col][i]
+            yield i, self._col_cur_lineof[col][cur]
+            i += 1
 
     def cur(self) -> int:
+        self._scan(self._col, self._cur_indx + 1)
         return self._col_indx_to_cur[self._col][self._cur_indx]
 
     def line_at_cur(self) -> int:
         return self._col_cur_lineof[self._col][self.cur()]
 
     def line_at_next_cur_down(self) -> int:
-        try:
+        if self._scan(self._col, self._cur_indx + 2):
             next_cur = self._col_indx_to_cur[self._col][self._cur_indx + 1]
+            return self._col_cur_lineof[self._col][next_cur]
+
+        # Below the last line of the last entry.
+        cur = self.cur()
+        column = self.columns[self._col]
+        i = self._col_cur_lineof[self._col][cur]
+        try:
+            while column[i].op_i == cur:
+                i += 1
         except IndexError:
-            steps = 0
-            cur = self.cur()
-            for line in self.columns[self._col]:
-                if line.op_i == cur:
-                    steps += 1
-                elif steps:
-                    break
+            pass
 
-            return self._col_cur_lineof[self._col][cur] + steps
-        else:
-            return self._col_cur_lineof[self._col][next_cur]
+        return i
 
     @property
     def _last_cur_indx(self) -> int:
+        self._scan(self._col)
         return len(self._col_indx_to_cur[self._col]) - 1
 
     def _invalidate_phantom_cur_indices(self) -> None:
         self._phantom_cur_indices = [-1] * len(self.columns)
 
     def down(self) -> bool:
-        if self._cur_indx < self._last_cur_indx:
+        if self._scan(self._col, self._cur_indx + 2):
             self._cur_indx += 1
             self._invalidate_phantom_cur_indices()
             return True
@@ -498,8 +668,7 @@ class Cursor:
         prev_line = self.line_at_cur()
 
         self._col += direction
-        lineof = self._col_cur_lineof[self._col]
-        for i, line in enumerate(lineof.values()):
+        for i, line in self._iter_curs(self._col):
             if line > prev_line:
                 self._cur_indx = i - 1 if i else 0
                 break
@@ -524,38 +693,27 @@ class Cursor:
             self._invalidate_phantom_cur_indices()
         self._cur_indx = 0
 
-    def _cur_indx_by_cur(self, cur_to_find: int) -> int:
-        for i, cur in enumerate(self._col_indx_to_cur[self._col]):
-            if cur == cur_to_find:
-                return i
-
-        raise AssertionError('unreachable')
-
     def go_to_cur_at_line_after(self, line_i: int) -> None:
         if line_i <= 0:
             self._cur_indx = 0
             return
 
-        lineof = self._col_cur_lineof[self._col]
-        for cur, line in lineof.items():
+        for i, line in self._iter_curs(self._col):
             if line >= line_i:
-                self._cur_indx = self._cur_indx_by_cur(cur)
+                self._cur_indx = i
                 return
 
         self._cur_indx = self._last_cur_indx
 
     def go_to_cur_at_line_before(self, line_i: int) -> None:
+        self._cur_indx = 0
         if line_i <= 0:
-            self._cur_indx = 0
             return
 
-        lineof = self._col_cur_lineof[self._col]
-        for cur, line in reversed(lineof.items()):
-            if line < line_i:
-                self._cur_indx = self._cur_indx_by_cur(cur)
+        for i, line in self._iter_curs(self._col):
+            if line >= line_i:
                 return
-
-        self._cur_indx = 0
+            self._cur_indx = i
 
 
 class ScreenHighlight(NamedTuple):
@@ -569,19 +727,54 @@ class ScreenHighlight(NamedTuple):
         return len(self.phrase)
 
 
+# A line as drawn by `Screen.draw()`.
+class _DrawnLine(NamedTuple):
+    line: FLine
+    at_cursor: bool
+    attr: int
+    # "Find in page" matches: (length, indices).
+    hl: tuple[int, list[int]] | None
+
+
 class Screen:
     def __init__(self, win: curses._CursesWindow, dictionary: Dictionary) -> None:
         self.win = win
-        self.selector = EntrySelector(dictionary)
+        self.selector = EntrySelector(dictionary, on_select=self._prefetch_audio)
 
         # self.margin_bot is needed for `self.page_height`
         self.margin_bot = self._scroll = 0
-        self.columns, self.column_width = layout(dictionary, self.page_height)
+        self._reflow = ReflowCache()
+        self._laid_out_for = self._layout_key()
+        self.columns, self.column_width = layout(
+            dictionary, self.page_height, self._reflow
+        )
         self.hl: ScreenHighlight | None = None
 
         self.vmode = False
         self.cursor = Cursor(self.selector, self.columns)
 
+        self._drawn: dict[tuple[int, int], _DrawnLine] | None = None
+        self._drawn_frame: tuple[int, int, int, int] | None = None
+        self.curses_calls = 0
+
+    def _prefetch_audio(self, phrase_index: int) -> None:
+        # The same audio `dump_selection` is going to choose.
+        audio = self.selector.get_audio_for_index(phrase_index)
+        if audio is None or not audio.resource:
+            audio = self.selector.get_audio_if_unique()
+        if audio is not None:
+            prefetch_audio(audio.resource)
+
+    # Things the layout depends on.
+    @staticmethod
+    def _layout_key() -> tuple[int, int, int]:
+        return curses.LINES, curses.COLS, Color.version
+
+    # return: True if the terminal has been resized or colors have changed
+    # since the screen was laid out, False otherwise.
+    def needs_resize(self) -> bool:
+        return self._laid_out_for != self._layout_key()
+
     @property
     def page_height(self) -> int:
         r = curses.LINES - 2*BORDER_PAD - self.margin_bot
@@ -591,7 +784,23 @@ class Screen:
         r = max(map(len, self.columns)) - self.page_height
         return r if r > 0 else 0
 
+    # Same as `line_i < max(map(len, self.columns))`, without laying out
+    # lazily laid out columns past `line_i`.
+    def _has_line(self, line_i: int) -> bool:
+        for column in self.columns:
+            try:
+                column[line_i]
+            except IndexError:
+                continue
+            else:
+                return True
+
+        return False
+
     def check_scroll_after_eof(self) -> None:
+        if self._has_line(self._scroll + self.page_height - 1):
+            return
+
         end = self._scroll_end()
         if self._scroll > end:
             self._scroll = end
@@ -612,48 +821,70 @@ class Screen:
         ):
             self._scroll = cur_line
 
+    # Makes the next `draw()` draw everything, e.g. after the window has been
+    # erased.
+    def damage_all(self) -> None:
+        self._drawn = None
+
+    # Draws only lines that changed since the last `draw()`. The number of
+    # curses calls it made is kept in `self.curses_calls`.
     def draw(self) -> None:
         win = self.win
         contents = self.selector.dictionary.contents
         page_height = self.page_height
         column_width = self.column_width
+        ncalls = 0
+
+        frame = (page_height, column_width, len(self.columns), Color.version)
+        if self._drawn is None or self._drawn_frame != frame:
+            if self._drawn is not None:
+                win.erase()
+                ncalls += 1
+            self._drawn = None
+            try:
+                for x in range(
+                        BORDER_PAD + column_width,
+                        len(self.columns) * (column_width + 1),
+                        column_width + 1
+                ):
+                    ncalls += 1
+                    win.vline(BORDER_PAD, x, 0, page_height)
+            except curses.error:  # window height too small
+                self.curses_calls = ncalls
+                return
+            self._drawn = {}
+            self._drawn_frame = frame
 
-        try:
-            for x in range(
-                    BORDER_PAD + column_width,
-                    len(self.columns) * (column_width + 1),
-                    column_width + 1
-            ):
-                win.vline(BORDER_PAD, x, 0, page_height)
-        except curses.error:  # window height too small
-            return
+        # What is drawn at every (y, column index), nothing if absent.
+        drawn = self._drawn
 
         cur = self.cursor.cur()
         selected_ops = currently_selected_ops()
         hl_attr = Color.hl
+        text_width = column_width - 2*COLUMN_MARGIN
 
         text_x = BORDER_PAD + COLUMN_MARGIN
         for col_i, column in enumerate(self.columns):
+            if self.hl is None:
+                hlindices, hlspan = None, 0
+            else:
+                hlindices, hlspan = self.hl.hl[col_i], self.hl.span
             for y, line_i in enumerate(
                     range(self._scroll, self._scroll + page_height), BORDER_PAD
             ):
                 try:
-                    op_i, text, attrs = column[line_i]
+                    line = column[line_i]
                 except IndexError:
-                    continue
-
-                if not text:
-                    continue
-
-                win.addstr(y, text_x, text)
+                    line = None
 
-                if self.vmode and op_i == cur:
-                    t = Color.cursor
-                    for i, span, attr in attrs:
-                        attr &= ~curses.A_INVIS  # 'show on hover' effect
-                        win.chgat(y, text_x + i, span, t | attr)
+                if line is None or not line.text:
+                    state = None
                 else:
-                    if self.selector.is_toggled(op_i):
+                    op_i = line.op_i
+                    at_cursor = self.vmode and op_i == cur
+                    if at_cursor:
+                        t = Color.cursor
+                    elif self.selector.is_toggled(op_i):
                         op = contents[op_i]
                         if isinstance(op, self.selector.TOGGLEABLE):
                             t = Color.selection
@@ -664,20 +895,61 @@ class Screen:
                     else:
                         t = 0
 
-                    for i, span, attr in attrs:
-                        win.chgat(y, text_x + i, span, t | attr)
+                    if hlindices is not None and line_i in hlindices:
+                        hl = (hlspan, hlindices[line_i])
+                    else:
+                        hl = None
+
+                    state = _DrawnLine(line, at_cursor, t, hl)
 
-                if self.hl is None:
+                prev = drawn.get((y, col_i))
+                if state == prev:
                     continue
 
-                hlindices = self.hl.hl[col_i]
-                if line_i in hlindices:
-                    span = self.hl.span
-                    for hl_i in hlindices[line_i]:
-                        win.chgat(y, text_x + hl_i, span, hl_attr)
+                if state is None:
+                    win.hline(y, text_x, ' ', text_width)
+                    ncalls += 1
+                    del drawn[y, col_i]
+                    continue
+                drawn[y, col_i] = state
+
+                _, text, attrs = state.line
+                if prev is not None:
+                    # Clears the previous line within the column, padding
+                    # the text would count characters, not terminal cells.
+                    win.hline(y, text_x, ' ', text_width)
+                    ncalls += 1
+                if at_cursor:
+                    attrs = [
+                        # 'show on hover' effect
+                        Attr(i, span, t | (attr & ~curses.A_INVIS))
+                        for i, span, attr in attrs
+                    ]
+                elif t:
+                    attrs = [Attr(i, span, t | attr) for i, span, attr in attrs]
+                if hl is not None:
+                    span, indices = hl
+                    attrs = attrs + [Attr(i, span, hl_attr) for i in indices]
+
+                # Runs are drawn where the previous one ended: offsets of
+                # `attr_runs` are characters, wide ones take two cells.
+                x = text_x
+                for _, chunk, attr in attr_runs(text, attrs):
+                    # Blank already, e.g. indents.
+                    if not attr and not chunk.strip(' '):
+                        x += len(chunk)
+                        continue
+                    win.addstr(y, x, chunk, attr)
+                    ncalls += 1
+                    cursor_y, x = win.getyx()
+                    if cursor_y != y:
+                        # Wrapped at the edge of the window.
+                        break
 
             text_x += column_width + 1
 
+        self.curses_calls = ncalls
+
     def resize(self) -> None:
         # save previous op index to avoid page scrolling off when terminal
         # window shrinks and content above wraps
@@ -692,9 +964,11 @@ class Screen:
             # Just bail out.
             prev_op_i_at_scroll = -1
 
+        self._laid_out_for = self._layout_key()
         self.columns, self.column_width = layout(
             self.selector.dictionary,
-            self.page_height
+            self.page_height,
+            self._reflow
         )
 
         if prev_op_i_at_scroll != -1:
@@ -766,7 +1040,7 @@ class Screen:
         self.selector.clear_selection()
 
     def move_down(self, n: int = 1) -> None:
-        if self._scroll < self._scroll_end():
+        if self._has_line(self._scroll + self.page_height):
             self._scroll += n
             self.check_scroll_after_eof()
 
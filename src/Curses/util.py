@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import curses
 import shutil
+from itertools import groupby
 from subprocess import DEVNULL
 from subprocess import PIPE
 from subprocess import Popen
@@ -128,6 +129,35 @@ def compose_attrs(
     return attrs
 
 
+# Splits `text` into runs of characters of the same attribute, so that
+# each can be drawn with a single `addstr()`. The result looks the same as
+# `text` drawn and then colored by `chgat()` calls of `attrs`, in order:
+# characters outside of `attrs` get no attributes and `attrs` past the end
+# of `text` color spaces.
+# return: (index, chunk, attribute) of every run.
+def attr_runs(text: str, attrs: Iterable[Attr]) -> list[tuple[int, str, int]]:
+    cells = [0] * len(text)
+    for i, span, attr in attrs:
+        if span <= 0:
+            continue
+        end = i + span
+        if end > len(cells):
+            cells.extend((end - len(cells)) * [0])
+        cells[i:end] = span * [attr]
+
+    if len(cells) > len(text):
+        text = text.ljust(len(cells))
+
+    result = []
+    i = 0
+    for attr, run in groupby(cells):
+        end = i + sum(1 for _ in run)
+        result.append((i, text[i:end], attr))
+        i = end
+
+    return result
+
+
 def mouse_left_click(bstate: int) -> bool:
     return bool(bstate & curses.BUTTON1_PRESSED)
 
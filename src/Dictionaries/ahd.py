@@ -3,10 +3,14 @@ from __future__ import annotations
 from itertools import filterfalse
 from typing import Callable
 from typing import Iterable
-from typing import TYPE_CHECKING
 from typing import TypeVar
 
+import lxml.etree as etree
+
 from src.data import getconf
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import try_request_async
 from src.Dictionaries.base import AUDIO
 from src.Dictionaries.base import DEF
 from src.Dictionaries.base import Dictionary
@@ -15,22 +19,30 @@ from src.Dictionaries.base import ETYM
 from src.Dictionaries.base import HEADER
 from src.Dictionaries.base import LABEL
 from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.base import PHRASE
 from src.Dictionaries.base import POS
 from src.Dictionaries.base import SYN
 from src.Dictionaries.util import all_text
 from src.Dictionaries.util import full_strip
+from src.Dictionaries.util import normalize_spacing
+from src.Dictionaries.util import page_t
 from src.Dictionaries.util import parse_response
 from src.Dictionaries.util import prepare_check_text
 from src.Dictionaries.util import quote_example
 from src.Dictionaries.util import try_request
-
-if TYPE_CHECKING:
-    import lxml.etree as etree
+from src.Dictionaries.util import xpath_all
+from src.Dictionaries.util import xpath_first
 
 DICTIONARY = 'AHD'
 DICTIONARY_URL = 'https://www.ahdictionary.com'
 
+_A_HREF = etree.XPath('./a[@href]')
+_BR = etree.XPath('./br')
+_I = etree.XPath('./i')
+_SDS_LIST = etree.XPath('./div[@class="sds-list"]')
+_SUP = etree.XPath('.//sup')
+
 AHD_TO_IPA_TABLE = str.maketrans({
     'ă': 'æ',   'ā': 'eɪ',  'ä': 'ɑː',
     'â': 'eə',  'ĕ': 'ɛ',   'ē': 'iː',  # There are some private symbols here
@@ -170,7 +182,7 @@ def extract_phrase_and_label_from_pvseg(
         ''
     ))
 
-    i_tag = tag.find('./i')
+    i_tag = xpath_first(_I, tag)
     if i_tag is not None:
         ahd.add(LABEL(all_text(i_tag), ''))
 
@@ -181,9 +193,9 @@ def extract_definitions_from_pseg(
 ) -> None:
     is_subdef = False
     for ds in tag.iterchildren('div'):
-        sd_tags = ds.findall('./div[@class="sds-list"]')
+        sd_tags = xpath_all(_SDS_LIST, ds)
         if sd_tags:
-            i_tag = ds.find('./i')
+            i_tag = xpath_first(_I, ds)
             label = '' if i_tag is None else (i_tag.text or '')
         else:
             # make ds the only sd_tag
@@ -253,7 +265,7 @@ def extract_synonyms_from_syntx(ahd: Dictionary, syntx: etree._Element) -> None:
     else:
         del all_synonyms[0]  # the 'Synonyms:' title
 
-    first_br = syntx.find('./br')
+    first_br = xpath_first(_BR, syntx)
     if first_br is None:
         raise DictionaryError(f'ERROR: {DICTIONARY}: no br tag in syntx')
 
@@ -339,7 +351,21 @@ def extract_synonyms_from_syntx(ahd: Dictionary, syntx: etree._Element) -> None:
         _add_syn(ahd, all_synonyms, gloss, examples)
 
 
-def create_dictionary(html: bytes, query: str) -> Dictionary:
+# Divs next to `rtseg`, i.e. the rest of its entry, by their class.
+# A single pass over them instead of a search for every kind of segment.
+def _sibling_segments(rtseg: etree._Element) -> dict[str, list[etree._Element]]:
+    result: dict[str, list[etree._Element]] = {}
+    parent = rtseg.getparent()
+    if parent is not None:
+        for tag in parent.iterchildren('div'):
+            clas = tag.get('class')
+            if clas is not None:
+                result.setdefault(clas, []).append(tag)
+
+    return result
+
+
+def create_dictionary(html: page_t, query: str) -> Dictionary:
     soup = parse_response(html)
 
     results = soup.find('.//div[@id="results"]')
@@ -347,7 +373,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
         raise DictionaryError(f'ERROR: {DICTIONARY}: no <div id="results">')
     if results.text is not None:
         if results.text == 'No word definition found':
-            raise DictionaryError(f'{DICTIONARY}: {query!r} not found')
+            raise NotFoundError(f'{DICTIONARY}: {query!r} not found')
         else:
             raise DictionaryError(f'ERROR: {DICTIONARY}: text in results div')
 
@@ -356,8 +382,10 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
 
     title_header_added = False
     for rtseg in results.findall('.//div[@class="rtseg"]'):
+        segments = _sibling_segments(rtseg)
+
         # -- Phrases --
-        a_tag = rtseg.find('./a[@href]')
+        a_tag = xpath_first(_A_HREF, rtseg)
 
         # AHD uses standalone 'th' to denote 'θ' and '<i>th</i>' to denote 'ð'
         th_substitute = 'θ'
@@ -365,7 +393,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
         phrase = phon = ''
         for chld in rtseg:
             if chld.tag == 'b':
-                sup = chld.find('.//sup')
+                sup = xpath_first(_SUP, chld)
                 if sup is not None:
                     sup.clear()
                 phrase += all_text(chld)
@@ -443,13 +471,13 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
             audio_url = ''
 
         # -- Main definitions --
-        for pseg in rtseg.findall('../div[@class="pseg"]'):
+        for pseg in segments.get('pseg', ()):
             extract_label_from_pseg(ahd, pseg)
             extract_definitions_from_pseg(ahd, pseg)
 
         # -- Parts of speech --
         pos_pairs: list[tuple[str, str]] = []
-        for runseg in rtseg.findall('../div[@class="runseg"]'):
+        for runseg in segments.get('runseg', ()):
             pos = _phon = ''
             for chld in runseg:
                 if chld.tag == 'b':
@@ -483,16 +511,15 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
             ahd.add(POS(pos_pairs))
 
         # -- Etymologies --
-        etyseg = rtseg.find('../div[@class="etyseg"]')
-        if etyseg is not None:
-            etym = all_text(etyseg).strip()
+        if 'etyseg' in segments:
+            etym = all_text(segments['etyseg'][0]).strip()
             if getconf('shortetyms'):
                 ahd.add(ETYM(shorten_ahd_etymology(etym.strip('[ ]'))))
             else:
                 ahd.add(ETYM(etym))
 
         # -- Phrasal verbs --
-        pvsegs = rtseg.findall('../div[@class="pvseg"]')
+        pvsegs = segments.get('pvseg')
         if pvsegs:
             ahd.add(HEADER('Phrasal Verbs'))
             for i, pvseg in enumerate(pvsegs):
@@ -500,7 +527,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                 extract_definitions_from_pseg(ahd, pvseg)
 
         # -- Idioms --
-        idmsegs = rtseg.findall('../div[@class="idmseg"]')
+        idmsegs = segments.get('idmseg')
         if idmsegs:
             ahd.add(HEADER('Idioms'))
             for i, idmseg in enumerate(idmsegs):
@@ -508,24 +535,41 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                 extract_definitions_from_pseg(ahd, idmseg)
 
         # -- Synonyms --
-        syntx = rtseg.find('../div[@class="syntx"]')
-        if syntx is not None:
+        if 'syntx' in segments:
             ahd.add(HEADER('Synonyms'))
             ahd.add(PHRASE(phrase, phon))
             if audio_url:
                 ahd.add(AUDIO(audio_url))
             ahd.add(LABEL('', ''))
-            extract_synonyms_from_syntx(ahd, syntx)
+            extract_synonyms_from_syntx(ahd, segments['syntx'][0])
 
     return ahd
 
 
-def ask_ahd(query: str) -> Dictionary:
+# AHD search is case-insensitive.
+def normalize_query(query: str) -> str:
+    return normalize_spacing(query.strip(' \'";')).lower()
+
+
+def _strip_query(query: str) -> str:
     query = query.strip(' \'";')
     if not query:
         raise DictionaryError(f'{DICTIONARY}: invalid query {query!r}')
+    return query
+
+
+# raises: DictionaryError
+def ahd_page(query: str) -> page_request_t:
+    return f'{DICTIONARY_URL}/word/search.html', {'q': _strip_query(query)}
 
+
+def ask_ahd(query: str) -> Dictionary:
     # x: 0-85, y: 0-39
-    html = try_request(f'{DICTIONARY_URL}/word/search.html', {'q': query})
+    html = try_request(*ahd_page(query))
+
+    return create_dictionary(html, _strip_query(query))
+
 
-    return create_dictionary(html, query)
+async def ask_ahd_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    html = await fetch(*ahd_page(query))
+    return create_dictionary(html, _strip_query(query))
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlencode
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+from urllib3.exceptions import HTTPError
+
+import src.Dictionaries.util as util
+from src.Dictionaries.util import HEADERS
+from src.Dictionaries.util import iter_decoded
+from src.Dictionaries.util import page_t
+from src.Dictionaries.util import urlopen
+
+# Requests of the asyncio lookup engine. They are made by the urllib3 pool of
+# `util.http`, so they reuse its connections and follow its timeouts,
+# redirect and retry policy. urllib3 blocks, requests are made on threads
+# while the event loop waits for them. Cancelled requests finish on their
+# threads, with their results dropped.
+
+# Signature of `try_request_async`. Dictionaries take a function like it,
+# so that callers can cache responses. It may leave pages compressed, see
+# `util.EncodedPage`.
+fetch_t = Callable[[str, Optional[Mapping[str, str]]], Awaitable[page_t]]
+
+# Arguments of `fetch_t`: URL and query fields of the page a query is looked
+# up on.
+page_request_t = Tuple[str, Optional[Mapping[str, str]]]
+
+
+class Response(NamedTuple):
+    status: int
+    # Lowercase names.
+    headers: dict[str, str]
+    # Body as received, see `decode_body`.
+    body: bytes
+
+# Semaphores are bound to the event loop they were first used in, every
+# `asyncio.run()` gets its own set.
+_semaphores: WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, asyncio.Semaphore]
+] = WeakKeyDictionary()
+
+
+
+# Requests to a single host are limited to the number of connections its
+# pool keeps, `util.POOL_MAXSIZE` or the one in `util.HOST_POOL_MAXSIZE`.
+# Lookups of many queries at once should not look like an attack on the
+# dictionary, and the others would only block threads waiting for
+# a connection.
+def _host_semaphore(host: str) -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaphores = _semaphores.setdefault(loop, {})
+    if host not in semaphores:
+        semaphores[host] = asyncio.Semaphore(
+            util.HOST_POOL_MAXSIZE.get(host, util.POOL_MAXSIZE)
+        )
+    return semaphores[host]
+
+
+# raises: ValueError
+def decode_body(body: bytes, encoding: str) -> bytes:
+    return b''.join(iter_decoded(body, encoding))
+
+
+def _set_result(future: asyncio.Future[Response], result: Response) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _set_exception(future: asyncio.Future[Response], e: BaseException) -> None:
+    if not future.done():
+        future.set_exception(e)
+
+
+# Runs `_urlopen` on a daemon thread. Neither `asyncio.run()` nor the exit of
+# the interpreter wait for requests of cancelled lookups, which can take
+# a while with timeouts and retries. Threads of an executor would be joined
+# at exit. The number of threads is limited by `_host_semaphore`.
+def _urlopen_in_thread(*args: Any) -> asyncio.Future[Response]:
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[Response] = loop.create_future()
+
+    def run() -> None:
+        try:
+            try:
+                result = _urlopen(*args)
+            except BaseException as e:
+                loop.call_soon_threadsafe(_set_exception, future, e)
+            else:
+                loop.call_soon_threadsafe(_set_result, future, result)
+        except RuntimeError:
+            # The loop is closed, nobody waits for the result.
+            pass
+
+    threading.Thread(target=run, name='request', daemon=True).start()
+    return future
+
+
+# raises: ConnectionError
+def _urlopen(method: str, url: str, headers: Mapping[str, str] | None) -> Response:
+    try:
+        r = urlopen(method, url, headers={**HEADERS, **(headers or {})}, decode_content=False)
+    except HTTPError:
+        raise ConnectionError('connection error: invalid response')
+
+    return Response(r.status, {k.lower(): v for k, v in r.headers.items()}, r.data)
+
+
+async def _request(
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None = None
+) -> Response:
+    async with _host_semaphore(urlsplit(url).hostname or ''):
+        return await _urlopen_in_thread(method, url, headers)
+
+
+# Makes a GET request, follows redirects, but leaves the body as received.
+# `headers` are sent in addition to the default ones, e.g. `If-None-Match`.
+async def request_async(
+        url: str,
+        fields: Mapping[str, str] | None = None,
+        headers: Mapping[str, str] | None = None
+) -> Response:
+    if fields:
+        url += '?' + urlencode(fields)
+
+    return await _request('GET', url, headers)
+
+
+async def try_request_async(
+        url: str,
+        fields: Mapping[str, str] | None = None
+) -> bytes:
+    response = await request_async(url, fields)
+    try:
+        return decode_body(response.body, response.headers.get('content-encoding', ''))
+    except ValueError:
+        raise ConnectionError('connection error: invalid response')
+
+
+# return: Status code of a HEAD request to `url`, after redirects.
+async def head_async(url: str) -> int:
+    response = await _request('HEAD', url)
+    return response.status
@@ -73,6 +73,13 @@ class DictionaryError(Exception):
     pass
 
 
+# Raised when a dictionary has no entry for the query. Unlike other errors,
+# it says something about the query and not about the state of the network
+# or of the parser, which makes it safe to cache.
+class NotFoundError(DictionaryError):
+    pass
+
+
 class Dictionary:
     __slots__ = ('contents',)
 
@@ -122,8 +129,14 @@ class DictionarySelection(NamedTuple):
 
 
 class EntrySelector:
-    def __init__(self, dictionary: Dictionary) -> None:
+    # on_select: called with the index of a PHRASE when its entry
+    #   gets selected, e.g. to start downloading its audio.
+    def __init__(self,
+            dictionary: Dictionary,
+            on_select: Callable[[int], None] | None = None
+    ) -> None:
         self.dictionary = dictionary
+        self.on_select = on_select
 
         self._ptoggled: dict[int, int] = {}
         self._pgrouped: dict[int, list[int]] = {}
@@ -153,6 +166,9 @@ class EntrySelector:
             if isinstance(contents[i], self.SELECTABLE):
                 self._toggles[i] = bool(self._ptoggled[pi])
 
+        if self.on_select is not None and self._ptoggled[pi] == 1 and self._toggles[index]:
+            self.on_select(pi)
+
     def toggle_index(self, index: int) -> None:
         if not isinstance(self.dictionary.contents[index], self.TOGGLEABLE):
             raise ValueError(f'{index=} does not point to a toggleable entry')
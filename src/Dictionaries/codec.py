@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import struct
+import sys
+from array import array
+from itertools import accumulate
+
+from src.Dictionaries.base import AUDIO
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import ETYM
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import MAGIC
+from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import op_t
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.base import POS
+from src.Dictionaries.base import SYN
+
+# Compact binary encoding of Dictionaries.
+#
+# Layout (little-endian):
+#   header:   b'ADC', version: u8, typecode: u8, MAGIC: u32,
+#             nstrings: u32, ncodes: u32
+#   lengths:  nstrings * typecode   lengths of the interned strings
+#   codes:    ncodes * typecode     the op stream
+#   strings:  UTF-8 encoded, concatenated interned strings
+#
+# The op stream is a sequence of op tags followed by their fields. Strings
+# are stored as indices into the table of interned strings, lists as their
+# length followed by their items and booleans as 0 or 1. `typecode` is the
+# smallest array typecode able to hold every number in `lengths` and `codes`.
+
+# Version shall be incremented on any changes made to the layout.
+VERSION = 1
+
+_SIGNATURE = b'ADC'
+_HEADER_STRUCT = struct.Struct('<3sBBIII')
+
+# Op tags.
+_DEF, _LABEL, _PHRASE, _HEADER_OP, _ETYM, _POS, _AUDIO, _SYN, _NOTE = range(9)
+
+
+class CodecError(ValueError):
+    pass
+
+
+def dumps(dictionary: Dictionary) -> bytes:
+    table: dict[str, int] = {}
+    codes: list[int] = []
+
+    def intern(s: str) -> int:
+        return table.setdefault(s, len(table))
+
+    for op in dictionary.contents:
+        if isinstance(op, DEF):
+            codes.extend((
+                _DEF, intern(op.definition), intern(op.label), op.subdef,
+                len(op.examples)
+            ))
+            codes.extend(map(intern, op.examples))
+        elif isinstance(op, LABEL):
+            codes.extend((_LABEL, intern(op.label), intern(op.extra)))
+        elif isinstance(op, PHRASE):
+            codes.extend((_PHRASE, intern(op.phrase), intern(op.extra)))
+        elif isinstance(op, HEADER):
+            codes.extend((_HEADER_OP, intern(op.header)))
+        elif isinstance(op, ETYM):
+            codes.extend((_ETYM, intern(op.etymology)))
+        elif isinstance(op, POS):
+            codes.extend((_POS, len(op.pos)))
+            for pos, phon in op.pos:
+                codes.extend((intern(pos), intern(phon)))
+        elif isinstance(op, AUDIO):
+            codes.extend((_AUDIO, intern(op.resource)))
+        elif isinstance(op, SYN):
+            codes.extend((
+                _SYN, intern(op.synonyms), intern(op.definition),
+                len(op.examples)
+            ))
+            codes.extend(map(intern, op.examples))
+        elif isinstance(op, NOTE):
+            codes.extend((_NOTE, intern(op.note)))
+        else:
+            raise AssertionError(f'unreachable {op!r}')
+
+    lengths = [len(s) for s in table]
+    largest = max(max(codes, default=0), max(lengths, default=0))
+    for typecode in 'BHI':
+        if largest < 1 << (8 * array(typecode).itemsize):
+            break
+    else:
+        raise CodecError(f'number too large to encode: {largest}')
+
+    lengths_a = array(typecode, lengths)
+    codes_a = array(typecode, codes)
+    if sys.byteorder == 'big':
+        lengths_a.byteswap()
+        codes_a.byteswap()
+
+    return b''.join((
+        _HEADER_STRUCT.pack(
+            _SIGNATURE, VERSION, ord(typecode), MAGIC, len(lengths), len(codes)
+        ),
+        lengths_a.tobytes(),
+        codes_a.tobytes(),
+        ''.join(table).encode(),
+    ))
+
+
+def _decode_ops(codes: array[int], strings: list[str]) -> list[op_t]:
+    result: list[op_t] = []
+    add = result.append
+    n = iter(codes).__next__
+    ncodes = len(codes)
+    consumed = 0
+
+    # `n()` raises StopIteration if the op stream is truncated.
+    while consumed < ncodes:
+        tag = n()
+        if tag == _DEF:
+            definition = strings[n()]
+            label = strings[n()]
+            subdef = bool(n())
+            examples = [strings[n()] for _ in range(n())]
+            add(DEF(definition, examples, label, subdef))
+            consumed += 5 + len(examples)
+        elif tag == _LABEL:
+            add(LABEL(strings[n()], strings[n()]))
+            consumed += 3
+        elif tag == _PHRASE:
+            add(PHRASE(strings[n()], strings[n()]))
+            consumed += 3
+        elif tag == _HEADER_OP:
+            add(HEADER(strings[n()]))
+            consumed += 2
+        elif tag == _ETYM:
+            add(ETYM(strings[n()]))
+            consumed += 2
+        elif tag == _POS:
+            pos = [(strings[n()], strings[n()]) for _ in range(n())]
+            add(POS(pos))
+            consumed += 2 + 2*len(pos)
+        elif tag == _AUDIO:
+            add(AUDIO(strings[n()]))
+            consumed += 2
+        elif tag == _SYN:
+            synonyms = strings[n()]
+            definition = strings[n()]
+            examples = [strings[n()] for _ in range(n())]
+            add(SYN(synonyms, definition, examples))
+            consumed += 4 + len(examples)
+        elif tag == _NOTE:
+            add(NOTE(strings[n()]))
+            consumed += 2
+        else:
+            raise CodecError(f'invalid op tag: {tag}')
+
+    return result
+
+
+def loads(data: bytes) -> Dictionary:
+    try:
+        signature, version, typecode_i, magic, nstrings, ncodes = \
+            _HEADER_STRUCT.unpack_from(data)
+    except struct.error:
+        raise CodecError('truncated header')
+
+    if signature != _SIGNATURE:
+        raise CodecError('not an encoded Dictionary')
+    if version != VERSION:
+        raise CodecError(f'unsupported version: {version}')
+    if magic != MAGIC:
+        raise CodecError(f'incompatible MAGIC: {magic}')
+
+    typecode = chr(typecode_i)
+    if typecode not in 'BHI':
+        raise CodecError(f'invalid typecode: {typecode!r}')
+
+    lengths = array(typecode)
+    codes = array(typecode)
+    offset = _HEADER_STRUCT.size
+    lengths.frombytes(data[offset:offset + nstrings * lengths.itemsize])
+    offset += nstrings * lengths.itemsize
+    codes.frombytes(data[offset:offset + ncodes * codes.itemsize])
+    offset += ncodes * codes.itemsize
+    if len(lengths) != nstrings or len(codes) != ncodes:
+        raise CodecError('truncated data')
+
+    if sys.byteorder == 'big':
+        lengths.byteswap()
+        codes.byteswap()
+
+    try:
+        blob = data[offset:].decode()
+    except UnicodeDecodeError:
+        raise CodecError('truncated data')
+
+    strings = []
+    start = 0
+    for end in accumulate(lengths):
+        strings.append(blob[start:end])
+        start = end
+    if start != len(blob):
+        raise CodecError('truncated data')
+
+    try:
+        return Dictionary(_decode_ops(codes, strings))
+    except (IndexError, StopIteration):
+        raise CodecError('malformed op stream')
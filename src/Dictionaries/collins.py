@@ -1,7 +1,10 @@
 from __future__ import annotations
 
-import sys
+import lxml.etree as etree
 
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import try_request_async
 from src.Dictionaries.base import AUDIO
 from src.Dictionaries.base import DEF
 from src.Dictionaries.base import Dictionary
@@ -10,39 +13,115 @@ from src.Dictionaries.base import ETYM
 from src.Dictionaries.base import HEADER
 from src.Dictionaries.base import LABEL
 from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.base import PHRASE
 from src.Dictionaries.base import POS
+from src.Dictionaries.util import normalize_spacing
+from src.Dictionaries.util import page_t
+from src.Dictionaries.util import parse_response
 from src.Dictionaries.util import try_request
+from src.Dictionaries.util import xpath_all
+from src.Dictionaries.util import xpath_first
 
+DICTIONARY_URL = 'https://www.collinsdictionary.com/search'
 
-def _extract_phon_and_audio(tag) -> tuple[str, str]:  # type: ignore[no-untyped-def]
-    pron_tag = tag.find('span', {'class': 'pron'})
+
+# Collins' tags have many classes, a tag matches if it has any of `names`.
+def _xpath(path: str, tag: str, *names: str) -> etree.XPath:
+    cls = ' or '.join(
+        f'contains(concat(" ", normalize-space(@class), " "), " {x} ")'
+        for x in names
+    )
+    return etree.XPath(f'{path}{tag}[{cls}]')
+
+
+_COBUILD = etree.XPath('.//div[@data-type-block="definition.title.type.cobuild"]')
+_CED = etree.XPath('.//div[@data-type-block="definition.title.type.ced"]')
+
+_PRON = _xpath('.//', 'span', 'pron')
+_SOUND = _xpath('.//', 'a', 'hwd_sound')
+_ORTH = _xpath('.//', 'span', 'orth')
+_CHILD_ORTH = _xpath('./', 'span', 'orth')
+_TITLE_CONTAINER = _xpath('.//', 'div', 'title_container')
+_CB_H = _xpath('.//', 'div', 'cB-h')
+_XR = _xpath('.//', 'a', 'xr')
+
+_CED_CONTENT = _xpath('./', 'div', 'content', 'definitions', 'ced')
+_HOM = _xpath('.//', 'div', 'hom')
+_CHILD_HOM = _xpath('./', 'div', 'hom')
+_GRAM_POS = _xpath('./', 'span', 'gramGrp', 'pos')
+_GRAM_SUBC = _xpath('./', 'span', 'gramGrp', 'subc')
+_SENSE = _xpath('./', 'div', 'sense')
+_IDM = _xpath('./', 'div', 'type-idm')
+_DEF_OR_XR = _xpath('.//', '*[self::div or self::span]', 'def', 'xr')
+_SENSENUM = _xpath('./', 'span', 'sensenum')
+_LBL = _xpath('./', 'span', 'lbl')
+_DEF = _xpath('./', 'div', 'def')
+_SPAN_XR = _xpath('./', 'span', 'xr')
+_A_XR = _xpath('./', 'a', 'xr', 'ref')
+_CED_EXAMPLE = _xpath('./', 'div', 'cit', 'type-example', 'quote')
+_EXAMPLE = _xpath('./', 'div', 'cit', 'type-example')
+_THES = _xpath('./', 'div', 'thes')
+_FORM = _xpath('./', '*', 'form')
+_DERIVS = _xpath('.//', 'div', 'derivs')
+_DRV = _xpath('.//', 'span', 'form', 'type-drv')
+_ETYM = _xpath('./', 'div', 'etyms', 'etym')
+_ENTRY_TITLE = _xpath('./', 'div', 'entry_title')
+
+
+# Whitespace between tags is collapsed to a newline or a space, like
+# BeautifulSoup did, which the parser was written for.
+def _collapse(s: str | None) -> str:
+    if not s or s.strip(' \n\t\f\r'):
+        return s or ''
+    return '\n' if '\n' in s else ' '
+
+
+def _all_text(el: etree._Element) -> str:
+    return ''.join(map(_collapse, el.itertext()))  # type: ignore[arg-type]
+
+
+def _text(el: etree._Element) -> str:
+    return _all_text(el).strip()
+
+
+# Text of `el` as if its child `child` was removed.
+def _text_without(el: etree._Element, child: etree._Element) -> str:
+    result = [_collapse(el.text)]
+    for x in el:
+        if x is not child and isinstance(x.tag, str):
+            result.append(_all_text(x))
+        result.append(_collapse(x.tail))
+    return ''.join(result).strip()
+
+
+def _extract_phon_and_audio(tag: etree._Element) -> tuple[str, str]:
+    pron_tag = xpath_first(_PRON, tag)
     if pron_tag is None:
         phon = ''
-        audio_tag = tag.find('a', {'class': 'hwd_sound'})
+        audio_tag = xpath_first(_SOUND, tag)
     else:
-        phon = f'/{pron_tag.text.strip()}/'
-        audio_tag = pron_tag.find('a', {'class': 'hwd_sound'})
+        phon = f'/{_text(pron_tag)}/'
+        audio_tag = xpath_first(_SOUND, pron_tag)
 
     if audio_tag is None:
-        audio = ''
-    else:
-        audio = audio_tag.get('data-src-mp3')
-        if audio is None:
-            raise DictionaryError('Collins: unexpected error: no data-src-mp3 attribute')
+        return phon, ''
+
+    audio = audio_tag.get('data-src-mp3')
+    if audio is None:
+        raise DictionaryError('Collins: unexpected error: no data-src-mp3 attribute')
 
     return phon, audio
 
 
-# This seems to be impossible to type check...
-def _extract_ced(collins: Dictionary, query: str, ced) -> None:  # type: ignore[no-untyped-def]
+def _extract_ced(collins: Dictionary, query: str, ced: list[etree._Element]) -> None:
     header = 'Collins BrE Dictionary'
     for header_block in ced:
-        orth_tag = header_block.find('span', {'class': 'orth'})
+        orth_tag = xpath_first(_ORTH, header_block)
         if orth_tag is None:
             raise DictionaryError('Collins: unexpected error, no orth_tag')
 
-        phrase = orth_tag.text.strip()
+        phrase = _text(orth_tag)
 
         collins.add(HEADER(header))
         if header:
@@ -55,79 +134,77 @@ def _extract_ced(collins: Dictionary, query: str, ced) -> None:  # type: ignore[
         collins.add(PHRASE(phrase, phon))
         collins.add(AUDIO(audio))
 
-        phrase_tag = header_block.find(
-            'div', {'class': ('content', 'definitions', 'ced')}, recursive=False
-        )
+        phrase_tag = xpath_first(_CED_CONTENT, header_block)
         if phrase_tag is None:
             raise DictionaryError('Collins: unexpected error: no phrase_tag')
 
-        for hom_tag in phrase_tag.find_all('div', {'class': 'hom'}, recursive=False):
-            label_tag = hom_tag.find('span', {'class': ('gramGrp', 'pos')}, recursive=False)
+        for hom_tag in xpath_all(_CHILD_HOM, phrase_tag):
+            label_tag = xpath_first(_GRAM_POS, hom_tag)
 
             collins.add(
-                LABEL('' if label_tag is None else label_tag.text.strip(), '')
+                LABEL('' if label_tag is None else _text(label_tag), '')
             )
 
-            sense_tags = hom_tag.find_all('div', {'class': 'sense'}, recursive=False)
+            sense_tags = xpath_all(_SENSE, hom_tag)
             if not sense_tags:
-                idm_tag = hom_tag.find('div', {'class': 'type-idm'}, recursive=False)
+                idm_tag = xpath_first(_IDM, hom_tag)
                 if idm_tag is None:
-                    tags = hom_tag.find_all(('div', 'span'), {'class': ('def', 'xr')})
+                    tags = xpath_all(_DEF_OR_XR, hom_tag)
                     if not tags:
                         raise DictionaryError('Collins: unexpected error: no sense, def or xr tags')
                     for tag in tags:
-                        collins.add(DEF(tag.text.strip(), [], '', subdef=False))
+                        collins.add(DEF(_text(tag), [], '', subdef=False))
                     continue
                 else:
-                    sense_tags = idm_tag.find_all('div', {'class': 'sense'}, recursive=False)
+                    sense_tags = xpath_all(_SENSE, idm_tag)
 
             for sense_tag in sense_tags:
-                label_tag = sense_tag.find('span', {'class': ('gramGrp', 'subc')}, recursive=False)
-                label = '' if label_tag is None else label_tag.text.strip('( )')
+                label_tag = xpath_first(_GRAM_SUBC, sense_tag)
+                label = '' if label_tag is None else _all_text(label_tag).strip('( )')
 
-                subsense_tags = sense_tag.find_all('div', {'class': 'sense'}, recursive=False)
+                subsense_tags = xpath_all(_SENSE, sense_tag)
                 if subsense_tags:
-                    sense_lbl_tags = sense_tag.find_all('span', {'class': 'lbl'}, recursive=False)
+                    sense_lbl_tags = xpath_all(_LBL, sense_tag)
                     if sense_lbl_tags:
-                        sense_lbl = ''.join(x.text.strip() for x in sense_lbl_tags).strip('()')
+                        sense_lbl = ''.join(map(_text, sense_lbl_tags)).strip('()')
                     else:
                         sense_lbl = ''
 
                     is_subdef = False
                     for subsense_tag in subsense_tags:
-                        sensenum_tag = subsense_tag.find('span', {'class': 'sensenum'}, recursive=False)
-                        if sensenum_tag is not None:
-                            sensenum_tag.decompose()
-                        collins.add(DEF(subsense_tag.text.strip(), [], sense_lbl, is_subdef))
+                        sensenum_tag = xpath_first(_SENSENUM, subsense_tag)
+                        if sensenum_tag is None:
+                            definition = _text(subsense_tag)
+                        else:
+                            definition = _text_without(subsense_tag, sensenum_tag)
+                        collins.add(DEF(definition, [], sense_lbl, is_subdef))
                         is_subdef = True
                     continue
 
-                def_lbl_tag = sense_tag.find('span', {'class': 'lbl'}, recursive=False)
+                def_lbl_tag = xpath_first(_LBL, sense_tag)
                 if def_lbl_tag is None:
                     def_lbl = ''
                 else:
-                    def_lbl = def_lbl_tag.text.strip()
+                    def_lbl = _text(def_lbl_tag)
 
-                def_tag = sense_tag.find('div', {'class': 'def'}, recursive=False)
+                def_tag = xpath_first(_DEF, sense_tag)
                 # TODO: attach cross-references to definitions.
                 if def_tag is None:
-                    ref_tag = sense_tag.find('span', {'class': 'xr'}, recursive=False)
+                    ref_tag = xpath_first(_SPAN_XR, sense_tag)
                     if ref_tag is None:
                         # here be dragons.
                         ref_tag = sense_tag
 
                     if label:
-                        collins.add(DEF(f'{def_lbl} {ref_tag.text.strip()}', [], label, subdef=True))
+                        collins.add(DEF(f'{def_lbl} {_text(ref_tag)}', [], label, subdef=True))
                     else:
-                        collins.add(DEF(ref_tag.text.strip(), [], def_lbl, subdef=True))
+                        collins.add(DEF(_text(ref_tag), [], def_lbl, subdef=True))
                 else:
-                    definition = def_tag.text.strip()
+                    definition = _text(def_tag)
 
-                    example_tags = sense_tag.find_all(
-                        'div', {'class': ('cit', 'type-example', 'quote')}, recursive=False
-                    )
+                    example_tags = xpath_all(_CED_EXAMPLE, sense_tag)
                     if example_tags:
-                        examples = [f'‘{x.text.strip()}’' for x in example_tags]
+                        examples = [f'‘{_text(x)}’' for x in example_tags]
                     else:
                         examples = []
 
@@ -136,47 +213,46 @@ def _extract_ced(collins: Dictionary, query: str, ced) -> None:  # type: ignore[
                     else:
                         collins.add(DEF(definition, examples, def_lbl, subdef=False))
 
-        derivs_tag = header_block.find('div', {'class': 'derivs'})
+        derivs_tag = xpath_first(_DERIVS, header_block)
         if derivs_tag is not None:
             result = []
-            for drv_tag in derivs_tag.find_all('span', {'class': ('form', 'type-drv')}):
-                orth_tag = drv_tag.find('span', {'class': 'orth'}, recursive=False)
+            for drv_tag in xpath_all(_DRV, derivs_tag):
+                orth_tag = xpath_first(_CHILD_ORTH, drv_tag)
                 if orth_tag is None:
                     # 'jowl'
-                    pos = drv_tag.text.strip()
+                    pos = _text(drv_tag)
                     phon = ''
                 else:
-                    pos = orth_tag.extract().text.strip()
+                    pos = _text(orth_tag)
                     # what's left is considered 'phon'.
-                    phon = drv_tag.text.strip()
+                    phon = _text_without(drv_tag, orth_tag)
 
                 result.append((pos, phon))
 
             collins.add(POS(result))
 
-        etym_tag = header_block.find('div', {'class': ('etyms', 'etym')}, recursive=False)
+        etym_tag = xpath_first(_ETYM, header_block)
         if etym_tag is not None:
-            etym_title_tag = etym_tag.find('div', {'class': 'entry_title'}, recursive=False)
+            etym_title_tag = xpath_first(_ENTRY_TITLE, etym_tag)
             if etym_title_tag is None:
                 raise DictionaryError('Collins: unexpected error: no etym_title_tag')
 
-            etym_title_tag.decompose()
-            collins.add(ETYM(f'[{etym_tag.text.strip()}]'))
+            collins.add(ETYM(f'[{_text_without(etym_tag, etym_title_tag)}]'))
 
 
-def _extract_cobuild(collins: Dictionary, query: str, cobuild) -> None:  # type: ignore[no-untyped-def]
-    title_tag = cobuild.find('div', {'class': 'title_container'})
+def _extract_cobuild(collins: Dictionary, query: str, cobuild: etree._Element) -> None:
+    title_tag = xpath_first(_TITLE_CONTAINER, cobuild)
     if title_tag is None:
-        if cobuild.find('div', {'class': 'cB-h'}) is None:
+        if xpath_first(_CB_H, cobuild) is None:
             raise DictionaryError('Collins: unexpected error: no cB-h tag')
         else:
             return
 
-    phrase_content_tag = title_tag.find('span', {'class': 'orth'})
+    phrase_content_tag = xpath_first(_ORTH, title_tag)
     if phrase_content_tag is None:
         raise DictionaryError('Collins: unexpected error: no phrase_content_tag')
 
-    phrase = phrase_content_tag.text.strip()
+    phrase = _text(phrase_content_tag)
 
     collins.add(HEADER('Collins'))
     if query != phrase:
@@ -187,111 +263,100 @@ def _extract_cobuild(collins: Dictionary, query: str, cobuild) -> None:  # type:
     collins.add(PHRASE(phrase, phon))
     collins.add(AUDIO(audio))
 
-    hom_tags = cobuild.find_all('div', {'class': 'hom'})
+    hom_tags = xpath_all(_HOM, cobuild)
     if not hom_tags:
-        tag = cobuild.find('a', {'class': 'xr'})
+        tag = xpath_first(_XR, cobuild)
         if tag is None:
             raise DictionaryError('Collins: unexpected error: no hom nor xr tags')
-        collins.add(DEF(tag.text.strip(), [], '', subdef=False))
+        collins.add(DEF(_text(tag), [], '', subdef=False))
         return
 
     for hom_tag in hom_tags:
-        label_tag = hom_tag.find('span', {'class': ('gramGrp', 'pos')}, recursive=False)
-        label = '' if label_tag is None else label_tag.text.strip()
+        label_tag = xpath_first(_GRAM_POS, hom_tag)
+        label = '' if label_tag is None else _text(label_tag)
 
-        sense_tag = hom_tag.find('div', {'class': 'sense'}, recursive=False)
+        sense_tag = xpath_first(_SENSE, hom_tag)
         if sense_tag is None:
-            def_tag = hom_tag.find('div', {'class': 'def'}, recursive=False)
+            def_tag = xpath_first(_DEF, hom_tag)
             if def_tag is not None:
                 collins.add(LABEL(label, ''))
 
-                example_tag = hom_tag.find('div', {'class': ('cit', 'type-example')}, recursive=False)
+                example_tag = xpath_first(_EXAMPLE, hom_tag)
                 if example_tag is None:
                     examples = []
                 else:
-                    examples = [f'‘{example_tag.text.strip()}’']
+                    examples = [f'‘{_text(example_tag)}’']
 
-                collins.add(DEF(def_tag.text.strip(), examples, '', subdef=False))
+                collins.add(DEF(_text(def_tag), examples, '', subdef=False))
                 continue
 
-            ref_tag = hom_tag.find('span', {'class': 'xr'}, recursive=False)
+            ref_tag = xpath_first(_SPAN_XR, hom_tag)
             if ref_tag is None:
-                ref_tag = hom_tag.find('a', {'class': ('xr', 'ref')}, recursive=False)
+                ref_tag = xpath_first(_A_XR, hom_tag)
                 if ref_tag is None:
                     raise DictionaryError('Collins: unexpected error: no ref_tag')
 
-            collins.add(DEF(ref_tag.text.strip(), [], '', subdef=True))
+            collins.add(DEF(_text(ref_tag), [], '', subdef=True))
             continue
 
-        def_tag = sense_tag.find('div', {'class': 'def'}, recursive=False)
+        def_tag = xpath_first(_DEF, sense_tag)
         if def_tag is None:
-            definition = sense_tag.text.strip()
+            definition = _text(sense_tag)
         else:
-            definition = def_tag.text.strip()
+            definition = _text(def_tag)
 
-        example_tags = sense_tag.find_all('div', {'class': ('cit', 'type-example')}, recursive=False)
+        example_tags = xpath_all(_EXAMPLE, sense_tag)
         if example_tags:
-            examples = [f'‘{x.text.strip()}’' for x in example_tags]
+            examples = [f'‘{_text(x)}’' for x in example_tags]
         else:
             examples = []
 
-        thes_tag = sense_tag.find('div', {'class': 'thes'}, recursive=False)
+        thes_tag = xpath_first(_THES, sense_tag)
         if thes_tag is None:
             synonyms = ''
         else:
-            syn_tags = thes_tag.find_all(True, {'class': 'form'}, recursive=False)
+            syn_tags = xpath_all(_FORM, thes_tag)
             if not syn_tags:
                 raise DictionaryError('Collins: unexpected error, no syn_tags')
 
-            synonyms = f' ~ {", ".join(x.text.strip() for x in syn_tags)}.'
+            synonyms = f' ~ {", ".join(map(_text, syn_tags))}.'
 
         collins.add(LABEL(label, ''))
         collins.add(DEF(definition + synonyms, examples, '', subdef=False))
 
 
-def ask_collins(query: str) -> Dictionary:
-    # beautifulsoup4 is bloated and slow, lxml.etree is far superior.
-    # Only Collins uses bs4 currently. To avoid paying the import time
-    # penalty on startup, import it here inline.
-
-    # Silence warnings if soupsieve is not installed, which is good
-    # because its bloated "css parse" slows down import time even more.
-    try:
-        sys.stderr = None  # type: ignore[assignment]
-        from bs4 import BeautifulSoup, __version__  # type: ignore[attr-defined]
-    finally:
-        sys.stderr = sys.__stderr__
-
-    if (*map(int, __version__.split('.')),) < (4, 10, 0):
-        sys.stderr.write(
-             '----------------------------------------------------------------\n'
-             'Your version of beautifulsoup is out of date, please update:\n'
-             'pip install -U beautifulsoup4\n'
-             'If you are using a virtual environment, you can safely uninstall\n'
-             'the soupsieve package to slightly speed up program startup:\n'
-             'pip uninstall soupsieve\n'
-        )
-        raise SystemExit
+# Collins distinguishes between e.g. "US" and "us", case is preserved.
+def normalize_query(query: str) -> str:
+    return normalize_spacing(query)
+
 
+def create_dictionary(html: page_t, query: str) -> Dictionary:
     collins = Dictionary()
 
-    soup = BeautifulSoup(
-        try_request(
-            'https://www.collinsdictionary.com/search',
-            {'dictCode': 'english', 'q': query.replace(' ', '-')}
-        ).decode(),
-        'lxml'
-    )
+    # Pages are decoded as UTF-8 whatever they declare.
+    soup = parse_response(html, 'utf-8')
 
-    cobuild = soup.find('div', {'data-type-block': 'definition.title.type.cobuild'})
+    cobuild = xpath_first(_COBUILD, soup)
     if cobuild is not None:
         _extract_cobuild(collins, query, cobuild)
 
-    ced = soup.find_all('div', {'data-type-block': 'definition.title.type.ced'})
+    ced = xpath_all(_CED, soup)
     if ced:
         _extract_ced(collins, query, ced)
 
     if not collins.contents:
-        raise DictionaryError(f'Collins: {query!r} not found')
+        raise NotFoundError(f'Collins: {query!r} not found')
 
     return collins
+
+
+def collins_page(query: str) -> page_request_t:
+    return DICTIONARY_URL, {'dictCode': 'english', 'q': query.replace(' ', '-')}
+
+
+def ask_collins(query: str) -> Dictionary:
+    return create_dictionary(try_request(*collins_page(query)), query)
+
+
+async def ask_collins_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return create_dictionary(await fetch(*collins_page(query)), query)
@@ -1,9 +1,15 @@
 from __future__ import annotations
 
+import asyncio
 from typing import Callable
 from typing import Iterable
-from typing import TYPE_CHECKING
 
+import lxml.etree as etree
+
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import head_async
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import try_request_async
 from src.Dictionaries.base import AUDIO
 from src.Dictionaries.base import DEF
 from src.Dictionaries.base import Dictionary
@@ -11,22 +17,37 @@ from src.Dictionaries.base import DictionaryError
 from src.Dictionaries.base import HEADER
 from src.Dictionaries.base import LABEL
 from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.base import PHRASE
 from src.Dictionaries.util import all_text
 from src.Dictionaries.util import full_strip
-from src.Dictionaries.util import http
+from src.Dictionaries.util import normalize_spacing
+from src.Dictionaries.util import page_t
 from src.Dictionaries.util import parse_response
 from src.Dictionaries.util import quote_example
 from src.Dictionaries.util import try_request
-
-if TYPE_CHECKING:
-    import lxml.etree as etree
+from src.Dictionaries.util import xpath_all
+from src.Dictionaries.util import xpath_first
 
 DICTIONARY = 'Diki'
 DICTIONARY_URL = 'https://www.diki.pl'
 
-
-def diki_audio(query: str, flag: str = '') -> str:
+_AUDIO_URL = etree.XPath('.//span[@data-audio-url]')
+_DESCENDANT_ENTITY = etree.XPath('.//div[@class="dictionaryEntity"]')
+_ENTITY = etree.XPath('./div[@class="dictionaryEntity"]')
+_FENTRY = etree.XPath('./div[@class="fentry"]')
+_H1 = etree.XPath('./h1')
+_HIDDEN_MEANING = etree.XPath('./span[@class="hiddenNotForChildrenMeaning"]')
+_LEFT_COLUMN = etree.XPath('./div[@class="diki-results-left-column"]')
+_NATIVE_TO_FOREIGN_MEANINGS = etree.XPath('./ul[@class="nativeToForeignMeanings"]')
+_RIGHT_COLUMN = etree.XPath('./div[@class="diki-results-right-column"]')
+_SECTIONS = etree.XPath('./div/div[@class]')
+_SIBLING_NOTE = etree.XPath('../div[@class="nt"]')
+
+
+# return: URLs where diki might keep the audio of `query`, most likely
+#   first.
+def _audio_candidates(query: str, flag: str = '') -> list[str]:
     diki_phrase = query.lower()\
         .replace('(', '').replace(')', '').replace("'", "") \
         .replace(' or something', '')\
@@ -34,23 +55,15 @@ def diki_audio(query: str, flag: str = '') -> str:
         .strip(' !?.')\
         .replace(' ', '_')
 
-    url = f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}{flag}.mp3'
-    url_ame = f'{DICTIONARY_URL}/images-common/en-ame/mp3/{diki_phrase}{flag}.mp3'
-
     # First try British pronunciation, then American.
-    if http.urlopen('HEAD', url).status == 200:
-        return url
-    if http.urlopen('HEAD', url_ame).status == 200:
-        return url_ame
-
+    result = [
+        f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}{flag}.mp3',
+        f'{DICTIONARY_URL}/images-common/en-ame/mp3/{diki_phrase}{flag}.mp3',
+    ]
     if flag:
         # Try the same but without the flag
-        url = f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}.mp3'
-        url_ame = f'{DICTIONARY_URL}/images-common/en-ame/mp3/{diki_phrase}.mp3'
-        if http.urlopen('HEAD', url).status == 200:
-            return url
-        if http.urlopen('HEAD', url_ame).status == 200:
-            return url_ame
+        result.append(f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}.mp3')
+        result.append(f'{DICTIONARY_URL}/images-common/en-ame/mp3/{diki_phrase}.mp3')
 
     def shorten_to_possessive(*ignore: str) -> str:
         verb, _, rest = diki_phrase.partition('_the_')
@@ -78,23 +91,50 @@ def diki_audio(query: str, flag: str = '') -> str:
         get_longest_word,
     )
 
-    last_phrase = ''
     for method in salvage_methods:
         diki_phrase = method(diki_phrase)
-        if last_phrase != diki_phrase:
-            last_phrase = diki_phrase
-            url = f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}.mp3'
-            if http.urlopen('HEAD', url).status == 200:
+        result.append(f'{DICTIONARY_URL}/images-common/en/mp3/{diki_phrase}.mp3')
+
+    return list(dict.fromkeys(result))
+
+
+async def _first_available(urls: list[str]) -> str | None:
+    # All candidates are probed at once, but a URL wins only if none of
+    # the more likely ones exists.
+    tasks = [asyncio.ensure_future(head_async(url)) for url in urls]
+    try:
+        for url, task in zip(urls, tasks):
+            if await task == 200:
                 return url
+        return None
+    finally:
+        for task in tasks:
+            task.cancel()
+        # Retrieves errors of the failed ones, asyncio would report them.
+        await asyncio.gather(*tasks, return_exceptions=True)
 
-    raise DictionaryError(f'{DICTIONARY}: no audio for {query!r}')
+
+# raises:
+#   NotFoundError: diki has no audio for `query`
+#   ConnectionError
+def diki_audio(query: str, flag: str = '') -> str:
+    url = asyncio.run(_first_available(_audio_candidates(query, flag)))
+    if url is None:
+        raise NotFoundError(f'{DICTIONARY}: no audio for {query!r}')
+    return url
 
 
 def create_phrase_and_audio_from(tag: etree._Element) -> tuple[PHRASE, AUDIO]:
     phrases = []
     extras = []
+    gram_tags = []
     ph = ex = audio = ''
-    for el in tag.iterchildren('span'):
+    for el in tag.iterchildren('span', 'a'):
+        if el.tag == 'a':
+            if el.get('class') == 'grammarTag':
+                gram_tags.append(el)
+            continue
+
         el_clas = el.attrib['class']
         if el_clas in {
             'hw',
@@ -113,7 +153,7 @@ def create_phrase_and_audio_from(tag: etree._Element) -> tuple[PHRASE, AUDIO]:
             ph = ex = ''
         elif el_clas == 'recordingsAndTranscriptions':
             if not audio:
-                audio_tag = el.find('.//span[@data-audio-url]')
+                audio_tag = xpath_first(_AUDIO_URL, el)
                 if audio_tag is not None:
                     audio = DICTIONARY_URL + audio_tag.attrib['data-audio-url']  # type: ignore[operator]
         elif el_clas in {
@@ -128,7 +168,6 @@ def create_phrase_and_audio_from(tag: etree._Element) -> tuple[PHRASE, AUDIO]:
 
     phrase = ', '.join(full_strip(x).strip(', ') for x in phrases)
 
-    gram_tags = tag.findall('./a[@class="grammarTag"]')
     if len(gram_tags) > 1:
         raise DictionaryError(f'ERROR: {DICTIONARY}: more than one gram tag')
 
@@ -179,7 +218,7 @@ def extract_foreign_to_native_meanings(
     for tag in tags:
         # NOTE: Some hidden meanings have examples, but they
         #       do not provide much value so let's skip them.
-        hidden_tag = tag.find('./span[@class="hiddenNotForChildrenMeaning"]')
+        hidden_tag = xpath_first(_HIDDEN_MEANING, tag)
         if hidden_tag is None:
             extract_definitions(diki, tag)
         else:
@@ -197,7 +236,7 @@ def extract_native_to_foreign_entry_slices(
         diki.add(phrase_op)
         diki.add(audio_op)
 
-        ul = chld.find('./ul[@class="nativeToForeignMeanings"]')
+        ul = xpath_first(_NATIVE_TO_FOREIGN_MEANINGS, chld)
         if ul is None:
             extract_foreign_to_native_meanings(diki, chld.iterchildren('div'))
         else:
@@ -209,28 +248,33 @@ def extract_dictionary_collapsed_section(
         diki: Dictionary,
         tag: etree._Element
 ) -> None:
-    r_entities = tag.findall('./div[@class="dictionaryEntity"]')
+    r_entities = xpath_all(_ENTITY, tag)
     if not r_entities:
         raise DictionaryError(f'ERROR: {DICTIONARY}: no r_entities')
 
     for entity in r_entities:
-        fentries = entity.findall('./div[@class="fentry"]')
+        fentries = xpath_all(_FENTRY, entity)
         if len(fentries) != 1:
             raise DictionaryError(f'ERROR: {DICTIONARY}: len(fentries) != 1')
 
         fentry = fentries.pop()
 
-        fm = fentry.find('./span[@class="fentrymain"]')
+        fm = None
+        phrase_in_fentrymain = True
+        for el in fentry.iterchildren('span'):
+            el_clas = el.get('class')
+            if el_clas == 'fentrymain':
+                if fm is None:
+                    fm = el
+            elif el_clas == 'dictionaryEntryHeaderAdditionalInformation':
+                phrase_in_fentrymain = False
+
         if fm is None:
             raise DictionaryError(f'ERROR: {DICTIONARY}: no fentrymain')
 
         fm_phrase_op, fm_audio_op = create_phrase_and_audio_from(fm)
         f_phrase_op, f_audio_op = create_phrase_and_audio_from(fentry)
 
-        phrase_in_fentrymain = fentry.find(
-            './span[@class="dictionaryEntryHeaderAdditionalInformation"]'
-        ) is None
-
         if phrase_in_fentrymain:
             diki.add(fm_phrase_op)
             diki.add(fm_audio_op)
@@ -245,7 +289,7 @@ def extract_dictionary_collapsed_section(
             ))
 
 
-def create_dictionary(html: bytes, query: str) -> Dictionary:
+def create_dictionary(html: page_t, query: str) -> Dictionary:
     soup = parse_response(html)
 
     containers = soup.findall('.//div[@class="diki-results-container"]')
@@ -259,7 +303,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
 
             msg += f', did you mean: {", ".join(all_text(x).strip() for x in a_tags)}?'
 
-        raise DictionaryError(msg)
+        raise NotFoundError(msg)
 
     diki = Dictionary()
 
@@ -286,11 +330,11 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                 diki.add(NOTE(f'?? ({query}) -> ??'))
             break
 
-        left_column_tag = container.find('./div[@class="diki-results-left-column"]')
+        left_column_tag = xpath_first(_LEFT_COLUMN, container)
         if left_column_tag is None:
             raise DictionaryError(f'ERROR: {DICTIONARY}: no left column tag')
 
-        l_entities = left_column_tag.findall('.//div[@class="dictionaryEntity"]')
+        l_entities = xpath_all(_DESCENDANT_ENTITY, left_column_tag)
         if not l_entities:
             raise DictionaryError(f'ERROR: {DICTIONARY}: no l_entities')
 
@@ -300,7 +344,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                 # Some interactive elements are not marked with "class", e.g. "be".
                 chld_clas = chld.get('class')
                 if chld_clas == 'hws':
-                    h1 = chld.find('./h1')
+                    h1 = xpath_first(_H1, chld)
                     if h1 is None:
                         raise DictionaryError(f'ERROR: {DICTIONARY}: no h1 tag')
 
@@ -316,7 +360,7 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                     diki.add(phrase_op)
                     diki.add(audio_op)
 
-                    phrase_note_tag = h1.find('../div[@class="nt"]')
+                    phrase_note_tag = xpath_first(_SIBLING_NOTE, h1)
                     if phrase_note_tag is not None:
                         diki.add(LABEL(all_text(phrase_note_tag).strip(), ''))
 
@@ -337,9 +381,9 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
                 elif chld_clas == 'nativeToForeignEntrySlices':
                     extract_native_to_foreign_entry_slices(diki, chld)
 
-        right_column_tag = container.find('./div[@class="diki-results-right-column"]')
+        right_column_tag = xpath_first(_RIGHT_COLUMN, container)
         if right_column_tag is not None:
-            sections = right_column_tag.findall('./div/div[@class]')
+            sections = xpath_all(_SECTIONS, right_column_tag)
             if not sections:
                 raise DictionaryError(f'ERROR: {DICTIONARY}: no sections')
 
@@ -359,14 +403,37 @@ def create_dictionary(html: bytes, query: str) -> Dictionary:
     return diki
 
 
+# Diki is case-insensitive and encodes spaces as '+'.
+def normalize_query(query: str) -> str:
+    return normalize_spacing(query.replace('+', ' ')).lower()
+
+
+def _diki_page(query: str, dictpart: str) -> page_request_t:
+    return f'{DICTIONARY_URL}/slownik-{dictpart}kiego', {'q': query.replace(' ', '+')}
+
+
+def diki_english_page(query: str) -> page_request_t:
+    return _diki_page(query, 'angiels')
+
+
+def diki_french_page(query: str) -> page_request_t:
+    return _diki_page(query, 'francus')
+
+
+def diki_german_page(query: str) -> page_request_t:
+    return _diki_page(query, 'niemiec')
+
+
+def diki_italian_page(query: str) -> page_request_t:
+    return _diki_page(query, 'wlos')
+
+
+def diki_spanish_page(query: str) -> page_request_t:
+    return _diki_page(query, 'hiszpans')
+
+
 def _ask_diki(query: str, dictpart: str) -> Dictionary:
-    return create_dictionary(
-        try_request(
-            f'{DICTIONARY_URL}/slownik-{dictpart}kiego',
-            {'q': query.replace(' ', '+')}
-        ),
-        query
-    )
+    return create_dictionary(try_request(*_diki_page(query, dictpart)), query)
 
 
 def ask_diki_english(query: str) -> Dictionary:
@@ -387,3 +454,27 @@ def ask_diki_italian(query: str) -> Dictionary:
 
 def ask_diki_spanish(query: str) -> Dictionary:
     return _ask_diki(query, 'hiszpans')
+
+
+async def _ask_diki_async(query: str, dictpart: str, fetch: fetch_t) -> Dictionary:
+    return create_dictionary(await fetch(*_diki_page(query, dictpart)), query)
+
+
+async def ask_diki_english_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return await _ask_diki_async(query, 'angiels', fetch)
+
+
+async def ask_diki_french_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return await _ask_diki_async(query, 'francus', fetch)
+
+
+async def ask_diki_german_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return await _ask_diki_async(query, 'niemiec', fetch)
+
+
+async def ask_diki_italian_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return await _ask_diki_async(query, 'wlos', fetch)
+
+
+async def ask_diki_spanish_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return await _ask_diki_async(query, 'hiszpans', fetch)
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import try_request_async
 from src.Dictionaries.base import DEF
 from src.Dictionaries.base import Dictionary
 from src.Dictionaries.base import DictionaryError
 from src.Dictionaries.base import HEADER
 from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.base import PHRASE
+from src.Dictionaries.util import normalize_spacing
+from src.Dictionaries.util import page_t
 from src.Dictionaries.util import parse_response
 from src.Dictionaries.util import prepare_check_tail
 from src.Dictionaries.util import prepare_check_text
@@ -17,12 +23,16 @@ DICTIONARY_URL = 'https://idioms.thefreedictionary.com'
 LSTRIP_CHARS = '1234567890. '
 
 
-def ask_farlex(query: str) -> Dictionary:
-    soup = parse_response(try_request(f'{DICTIONARY_URL}/{query}'))
+def normalize_query(query: str) -> str:
+    return normalize_spacing(query).lower()
+
+
+def create_dictionary(html: page_t, query: str) -> Dictionary:
+    soup = parse_response(html)
 
     section_farlex_idi = soup.find('.//section[@data-src="FarlexIdi"]')
     if section_farlex_idi is None:
-        raise DictionaryError(f'{DICTIONARY}: {query!r} not found')
+        raise NotFoundError(f'{DICTIONARY}: {query!r} not found')
 
     farlex = Dictionary()
     check_text = prepare_check_text(DICTIONARY)
@@ -58,3 +68,15 @@ def ask_farlex(query: str) -> Dictionary:
                 farlex.add(LABEL(check_text(i_tag), ''))
 
     return farlex
+
+
+def farlex_page(query: str) -> page_request_t:
+    return f'{DICTIONARY_URL}/{query}', None
+
+
+def ask_farlex(query: str) -> Dictionary:
+    return create_dictionary(try_request(*farlex_page(query)), query)
+
+
+async def ask_farlex_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return create_dictionary(await fetch(*farlex_page(query)), query)
@@ -1,34 +1,190 @@
 from __future__ import annotations
 
 import atexit
+import zlib
+from typing import Any
 from typing import Callable
+from typing import Iterator
 from typing import Mapping
+from typing import NamedTuple
+from typing import Union
+from urllib.parse import urlencode
 
 import lxml.etree as etree
 import urllib3
 from urllib3.exceptions import ConnectTimeoutError
+from urllib3.exceptions import HTTPError
 from urllib3.exceptions import MaxRetryError
 from urllib3.exceptions import NewConnectionError
 
 from src.Dictionaries.base import DictionaryError
 
-http = urllib3.PoolManager(
-    timeout=10,
-    headers={
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; rv:122.0) Gecko/20100101 Firefox/122.0',
-        'Accept-Encoding': 'gzip'
-    }
-)
+# Optional decoders, pages are smaller with them. urllib3 uses the same ones.
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:
+    try:
+        import brotlicffi as brotli  # type: ignore[import-not-found]
+    except ImportError:
+        brotli = None
+try:
+    import zstandard  # type: ignore[import-not-found]
+except ImportError:
+    zstandard = None
+
+# Bodies are decompressed in chunks of this size.
+CHUNK_SIZE = 64 * 1024
+
+# Functions that return a function that decompresses a body chunk by chunk.
+_DECODERS: dict[str, Callable[[], Callable[[bytes], bytes]]] = {
+    'gzip': lambda: zlib.decompressobj(16 + zlib.MAX_WBITS).decompress,
+    'deflate': lambda: zlib.decompressobj().decompress,
+}
+_DECODE_ERRORS: tuple[type[Exception], ...] = (zlib.error,)
+if brotli is not None:
+    _DECODERS['br'] = lambda: brotli.Decompressor().process
+    _DECODE_ERRORS += (brotli.error,)
+if zstandard is not None:
+    _DECODERS['zstd'] = lambda: zstandard.ZstdDecompressor().decompressobj().decompress
+    _DECODE_ERRORS += (zstandard.ZstdError,)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; rv:122.0) Gecko/20100101 Firefox/122.0',
+    'Accept-Encoding': ', '.join(x for x in ('zstd', 'br', 'gzip') if x in _DECODERS)
+}
+
+
+class EncodedPage(NamedTuple):
+    # Body as received, decompressed only while it is parsed.
+    body: bytes
+    # Value of the Content-Encoding header.
+    encoding: str
+
+
+# What dictionaries parse, pages are either decompressed or not.
+page_t = Union[bytes, EncodedPage]
+
+
+# Decompresses `body` in chunks, without keeping the whole result in memory.
+# raises: ValueError if the encoding is unsupported or the body is corrupted
+def iter_decoded(body: bytes, encoding: str) -> Iterator[bytes]:
+    encoding = encoding.lower()
+    if encoding in ('', 'identity'):
+        yield body
+        return
+    if encoding not in _DECODERS:
+        raise ValueError(f'unsupported content encoding: {encoding!r}')
+
+    decompress = _DECODERS[encoding]()
+    try:
+        for i in range(0, len(body), CHUNK_SIZE):
+            chunk = decompress(body[i:i + CHUNK_SIZE])
+            if chunk:
+                yield chunk
+    except _DECODE_ERRORS as e:
+        raise ValueError(f'corrupted {encoding} body: {e}')
+
+
+# raises: ConnectionError
+def iter_page(page: page_t) -> Iterator[bytes]:
+    if isinstance(page, bytes):
+        yield page
+        return
+    try:
+        yield from iter_decoded(page.body, page.encoding)
+    except ValueError:
+        raise ConnectionError('connection error: invalid response')
+
+
+# raises: ConnectionError
+def read_page(page: page_t) -> bytes:
+    if isinstance(page, bytes):
+        return page
+    return b''.join(iter_page(page))
+
+# Connections kept open per host. Audio downloads run on a few threads and
+# lookups of many queries hit the same host, with `block` they wait for
+# a free connection instead of opening ones that are thrown away afterwards.
+# Lookups made with `aio` are limited to the same number per host.
+POOL_MAXSIZE = 4
+POOL_BLOCK = True
+# Hosts that need a different number of connections.
+HOST_POOL_MAXSIZE: dict[str, int] = {}
+NUM_POOLS = 20
+
+CONNECT_TIMEOUT = 5.0
+READ_TIMEOUT = 10.0
+
+# Server errors and timeouts are retried with an exponential backoff:
+# 0.5s, 1s, ... between attempts.
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+
+
+class _PoolManager(urllib3.PoolManager):
+    def _new_pool(
+            self,
+            scheme: str,
+            host: str,
+            port: int,
+            request_context: dict[str, Any] | None = None
+    ) -> urllib3.HTTPConnectionPool:
+        if host in HOST_POOL_MAXSIZE:
+            if request_context is None:
+                request_context = self.connection_pool_kw.copy()
+            else:
+                request_context = request_context.copy()
+            request_context['maxsize'] = HOST_POOL_MAXSIZE[host]
+
+        return super()._new_pool(scheme, host, port, request_context)
+
+
+def make_pool_manager() -> urllib3.PoolManager:
+    return _PoolManager(
+        num_pools=NUM_POOLS,
+        maxsize=POOL_MAXSIZE,
+        block=POOL_BLOCK,
+        timeout=urllib3.Timeout(connect=CONNECT_TIMEOUT, read=READ_TIMEOUT),
+        retries=urllib3.Retry(
+            total=RETRIES,
+            backoff_factor=BACKOFF_FACTOR,
+            status_forcelist=RETRY_STATUSES,
+            raise_on_status=False
+        ),
+        headers=HEADERS
+    )
+
+
+http = make_pool_manager()
 atexit.register(http.pools.clear)
 
 
-def try_request(
-        url: str,
-        fields: Mapping[str, str | bytes] | None = None,
-        **kw: str
-) -> bytes:
+class PoolStats(NamedTuple):
+    requests: int
+    # Connections opened, requests over the same connection reuse it.
+    connections: int
+
+
+# return: Statistics of the connection pools that are still open, by host.
+def pool_stats(manager: urllib3.PoolManager | None = None) -> dict[str, PoolStats]:
+    manager = http if manager is None else manager
+
+    result = {}
+    for key in manager.pools.keys():
+        pool = manager.pools.get(key)
+        if pool is not None:
+            result[f'{pool.host}:{pool.port}'] = PoolStats(
+                pool.num_requests, pool.num_connections
+            )
+    return result
+
+
+# Makes a request with `http`, follows redirects.
+# raises: ConnectionError
+def urlopen(method: str, url: str, **kw: Any) -> urllib3.BaseHTTPResponse:
     try:
-        r = http.request_encode_url('GET', url, fields, None, **kw)
+        return http.urlopen(method, url, **kw)
     except MaxRetryError:
         raise ConnectionError('connection error: max retries exceeded')
     except Exception as e:
@@ -39,15 +195,50 @@ def try_request(
         else:
             raise
 
-    return r.data
+
+def try_request(
+        url: str,
+        fields: Mapping[str, str | bytes] | None = None,
+        **kw: Any
+) -> EncodedPage:
+    if fields:
+        url += '?' + urlencode(fields)
+    r = urlopen('GET', url, preload_content=False, **kw)
+
+    # The body stays compressed until it is parsed, see `parse_response`.
+    try:
+        return EncodedPage(
+            r.read(decode_content=False), r.headers.get('content-encoding', '')
+        )
+    except HTTPError:
+        raise ConnectionError('connection error: invalid response')
+    finally:
+        r.release_conn()
 
 
-def parse_response(data: bytes) -> etree._Element:
-    p = etree.HTMLParser()
-    p.feed(data)
+# Decompressed chunks are fed to the parser as they come, the whole
+# decompressed page is never held in memory.
+# `encoding` overrides the one declared by the page.
+# raises: ConnectionError
+def parse_response(page: page_t, encoding: str | None = None) -> etree._Element:
+    p = etree.HTMLParser(encoding=encoding)
+    for chunk in iter_page(page):
+        p.feed(chunk)
     return p.close()
 
 
+# Paths searched in loops are compiled once, with `etree.XPath`.
+# return: Elements matching `xpath` from `el`.
+def xpath_all(xpath: etree.XPath, el: etree._Element) -> list[etree._Element]:
+    return xpath(el)  # type: ignore[return-value]
+
+
+# return: The first element matching `xpath` from `el` or None.
+def xpath_first(xpath: etree.XPath, el: etree._Element) -> etree._Element | None:
+    result = xpath_all(xpath, el)
+    return result[0] if result else None
+
+
 def prepare_check_text(dictionary_name: str) -> Callable[[etree._Element], str]:
     def check_text(el: etree._Element) -> str:
         text = el.text
@@ -80,5 +271,11 @@ def full_strip(s: str) -> str:
     return ' '.join(s.split())
 
 
+# Collapses whitespace and removes it from around hyphens, e.g.
+# " well -  known " -> "well-known".
+def normalize_spacing(s: str) -> str:
+    return '-'.join(full_strip(x) for x in s.split('-'))
+
+
 def quote_example(s: str) -> str:
     return f'‘{s}’'
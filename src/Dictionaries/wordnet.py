@@ -1,11 +1,17 @@
 from __future__ import annotations
 
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import try_request_async
 from src.Dictionaries.base import Dictionary
 from src.Dictionaries.base import DictionaryError
 from src.Dictionaries.base import HEADER
 from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.base import PHRASE
 from src.Dictionaries.base import SYN
+from src.Dictionaries.util import normalize_spacing
+from src.Dictionaries.util import page_t
 from src.Dictionaries.util import parse_response
 from src.Dictionaries.util import prepare_check_text
 from src.Dictionaries.util import try_request
@@ -14,8 +20,12 @@ DICTIONARY = 'WordNet'
 DICTIONARY_URL = 'http://wordnetweb.princeton.edu/perl/webwn'
 
 
-def ask_wordnet(query: str) -> Dictionary:
-    soup = parse_response(try_request(DICTIONARY_URL, {'s': query}))
+def normalize_query(query: str) -> str:
+    return normalize_spacing(query).lower()
+
+
+def create_dictionary(html: page_t, query: str) -> Dictionary:
+    soup = parse_response(html)
 
     h3_tag = soup.find('.//h3')
     if h3_tag is None:
@@ -25,7 +35,7 @@ def ask_wordnet(query: str) -> Dictionary:
 
     h3_tag_text = check_text(h3_tag)
     if h3_tag_text.startswith(('Your', 'Sorry')):
-        raise DictionaryError(f'{DICTIONARY}: {query!r} not found')
+        raise NotFoundError(f'{DICTIONARY}: {query!r} not found')
 
     wordnet = Dictionary()
 
@@ -52,3 +62,15 @@ def ask_wordnet(query: str) -> Dictionary:
                 )
 
     return wordnet
+
+
+def wordnet_page(query: str) -> page_request_t:
+    return DICTIONARY_URL, {'s': query}
+
+
+def ask_wordnet(query: str) -> Dictionary:
+    return create_dictionary(try_request(*wordnet_page(query)), query)
+
+
+async def ask_wordnet_async(query: str, fetch: fetch_t = try_request_async) -> Dictionary:
+    return create_dictionary(await fetch(*wordnet_page(query)), query)
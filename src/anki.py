@@ -4,11 +4,16 @@ import atexit
 import json
 import os
 import sys
+import time
 from typing import Any
+from typing import Callable
+from typing import Generic
 from typing import Literal
 from typing import overload
 from typing import TYPE_CHECKING
+from typing import TypeVar
 
+from urllib3.exceptions import HTTPError
 from urllib3.exceptions import NewConnectionError
 
 from src.data import DATA_DIR
@@ -96,6 +101,7 @@ INVOKE_ACTIONS = Literal[
     'guiCurrentCard',
     'modelFieldNames',
     'modelNames',
+    'multi',
 ]
 # Overloads are added on an as-needed basis, some
 # signatures are just too complex to bother typing them.
@@ -106,6 +112,8 @@ def invoke(action: Literal['guiBrowse'], **params: Any) -> list[int]: ...
 @overload
 def invoke(action: Literal['addNote'], **params: Any) -> int: ...
 @overload
+def invoke(action: Literal['multi'], **params: Any) -> list[dict[str, Any]]: ...
+@overload
 def invoke(action: Literal['createModel', 'guiCurrentCard'], **params: Any) -> Any: ...
 
 
@@ -125,35 +133,42 @@ def invoke(action: INVOKE_ACTIONS, **params: Any) -> Any:
         )
     except NewConnectionError:
         raise AnkiError('could not connect with Anki')
+    except HTTPError:
+        # E.g. a timeout while Anki is busy, or a dropped connection.
+        raise AnkiError('Anki did not respond')
 
     err = response['error']
     if err is None:
         return response['result']
 
-    err = err.lower()
+    raise _translate_error(err)
+
+
+def _translate_error(error: str) -> Exception:
+    err = error.lower()
     if err.startswith('model was not found:'):
-        raise AnkiError('could not find note: ' + getconf('note'))
+        return AnkiError('could not find note: ' + getconf('note'))
 
     elif err.startswith('deck was not found'):
-        raise AnkiError('could not find deck: ' + getconf('deck'))
+        return AnkiError('could not find deck: ' + getconf('deck'))
 
     elif err.startswith('cannot create note because it is empty'):
-        raise FirstFieldEmptyError('first field empty')
+        return FirstFieldEmptyError('first field empty')
 
     elif err.startswith('cannot create note because it is a duplicate'):
-        raise AnkiError('card is a duplicate')
+        return AnkiError('card is a duplicate')
 
     elif err.startswith('model name already exists'):
-        raise ModelExistsError('note with this name already exists')
+        return ModelExistsError('note with this name already exists')
 
     elif err.startswith('gui review is not currently active'):
-        raise AnkiError('action available only in review mode')
+        return AnkiError('action available only in review mode')
 
     elif err.startswith(('collection is not available', "'nonetype' object has no attribute")):
-        raise AnkiError('could not connect with Anki')
+        return AnkiError('could not connect with Anki')
 
     else:
-        raise Exception(response['error'])
+        return Exception(error)
 
 
 def currently_reviewed_phrase() -> str:
@@ -210,7 +225,7 @@ class _AnkiModels:
 models = _AnkiModels()
 
 
-def _add_card(model_name: str, card: Card, model: dict[str, cardkey_t | None]) -> int:
+def _make_note(model_name: str, card: Card, model: dict[str, cardkey_t | None]) -> dict[str, Any]:
     fields = {
         anki_field_name: card[ckey]
         for anki_field_name, ckey in model.items()
@@ -219,19 +234,20 @@ def _add_card(model_name: str, card: Card, model: dict[str, cardkey_t | None]) -
     if not fields:
         raise IncompatibleModelError(f'note {getconf("note")} has no compatible fields, try rechecking (F4)')
 
-    return invoke(
-        'addNote',
-        note={
-            'deckName': getconf('deck'),
-            'modelName': model_name,
-            'fields': fields,
-            'options': {
-                'allowDuplicate': getconf('duplicates'),
-                'duplicateScope': getconf('dupescope')
-            },
-            'tags': getconf('tags').split(',')
-        }
-    )
+    return {
+        'deckName': getconf('deck'),
+        'modelName': model_name,
+        'fields': fields,
+        'options': {
+            'allowDuplicate': getconf('duplicates'),
+            'duplicateScope': getconf('dupescope')
+        },
+        'tags': getconf('tags').split(',')
+    }
+
+
+def _add_card(model_name: str, card: Card, model: dict[str, cardkey_t | None]) -> int:
+    return invoke('addNote', note=_make_note(model_name, card, model))
 
 
 def add_card(card: Card) -> int:
@@ -245,6 +261,116 @@ def add_card(card: Card) -> int:
         return _add_card(model_name, card, models.get_model(model_name, recheck=True))
 
 
+def _submit_notes(notes: list[dict[str, Any]]) -> list[int | AnkiError]:
+    # `addNotes` reports only which notes failed, `multi` keeps the reason.
+    response = invoke('multi', actions=[
+        {'action': 'addNote', 'params': {'note': note}, 'version': 6}
+        for note in notes
+    ])
+
+    result: list[int | AnkiError] = []
+    for r in response:
+        if r['error'] is None:
+            result.append(r['result'])
+        else:
+            e = _translate_error(r['error'])
+            result.append(e if isinstance(e, AnkiError) else AnkiError(str(e)))
+
+    return result
+
+
+# Adds all `cards` with a single request.
+# return: Note id or the reason of failure for every card, in order.
+def add_cards(cards: list[Card]) -> list[int | AnkiError]:
+    if not cards:
+        return []
+
+    model_name = getconf('note')
+    try:
+        model = models.get_model(model_name)
+        notes = [_make_note(model_name, card, model) for card in cards]
+    except IncompatibleModelError:
+        model = models.get_model(model_name, recheck=True)
+        notes = [_make_note(model_name, card, model) for card in cards]
+
+    result = _submit_notes(notes)
+
+    # Same as in `add_card`, the fields might have been renamed.
+    retry = [i for i, x in enumerate(result) if isinstance(x, FirstFieldEmptyError)]
+    if retry:
+        model = models.get_model(model_name, recheck=True)
+        try:
+            notes = [_make_note(model_name, cards[i], model) for i in retry]
+        except IncompatibleModelError as e:
+            for i in retry:
+                result[i] = e
+        else:
+            for i, x in zip(retry, _submit_notes(notes)):
+                result[i] = x
+
+    return result
+
+
+T = TypeVar('T')
+
+# Number of cards and the number of seconds after which CardQueue submits
+# the queued cards.
+QUEUE_MAX_SIZE = 100
+QUEUE_MAX_DELAY = 5.0
+
+
+class CardQueue(Generic[T]):
+    # Collects cards and adds them with a single request once `max_size`
+    # cards are queued or the oldest card has waited `max_delay` seconds.
+    # `on_flush` gets a (key, note id or error) pair for every submitted card,
+    # keys are whatever the caller used to tell the cards apart.
+    # The time threshold is checked only on `put` and `flush_if_due`, against
+    # `clock`.
+
+    def __init__(
+            self,
+            on_flush: Callable[[list[tuple[T, int | AnkiError]]], None],
+            *,
+            max_size: int = QUEUE_MAX_SIZE,
+            max_delay: float = QUEUE_MAX_DELAY,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.on_flush = on_flush
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.clock = clock
+        self._queue: list[tuple[T, Card]] = []
+        self._since = 0.0
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def put(self, key: T, card: Card) -> None:
+        if not self._queue:
+            self._since = self.clock()
+        self._queue.append((key, card))
+        self.flush_if_due()
+
+    def flush_if_due(self) -> None:
+        if self._queue and (
+                len(self._queue) >= self.max_size
+             or self.clock() - self._since >= self.max_delay
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._queue:
+            return
+
+        queue, self._queue = self._queue, []
+        try:
+            result = add_cards([card for _, card in queue])
+        except AnkiError as e:
+            self.on_flush([(key, e) for key, _ in queue])
+        else:
+            self.on_flush([(key, x) for (key, _), x in zip(queue, result)])
+
+
 def add_custom_note(note_name: str) -> str:
     with open(os.path.join(ROOT_DIR, note_name)) as f:
         note: note_t = json.load(f)
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import atexit
+import hashlib
+import json
+import os
+import threading
+from typing import NamedTuple
+from typing import TypedDict
+
+from src.data import DATA_DIR
+from src.Dictionaries.util import http
+
+# Downloaded audio files are indexed by URL and by the SHA-256 of their
+# content, separately for every media directory. Adding a card for the same
+# word again, or for a word whose audio another URL already downloaded,
+# costs no request. Files are named after the URL, a file with the same name
+# but a different content gets the hash appended to its name. Files can be
+# downloaded to a staging directory ahead of time and copied to the media
+# directory when they are needed, see `AudioStore.get`.
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _Entry(TypedDict):
+    filename: str
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+class _MediaIndex(TypedDict):
+    urls: dict[str, str]          # url -> filename
+    files: dict[str, _Entry]      # filename -> entry
+
+
+class AudioStats(NamedTuple):
+    hits: int
+    misses: int
+    # Downloads that turned out to be a copy of an already stored file.
+    duplicates: int
+    downloaded_bytes: int
+
+
+def _hash_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AudioStore:
+    def __init__(self, index_path: str | None = None) -> None:
+        self.index_path = index_path
+        self._index: dict[str, _MediaIndex] | None = None
+        # mediadir -> sha256 -> filename, built from `_MediaIndex.files` when
+        # a media directory is first stored to, changed along with it.
+        self._hashes: dict[str, dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+        self._hits = self._misses = self._duplicates = self._downloaded = 0
+
+    def _load(self) -> dict[str, _MediaIndex]:
+        if self._index is None:
+            self._index = {}
+            if self.index_path is not None:
+                try:
+                    with open(self.index_path) as f:
+                        self._index = json.load(f)
+                except (FileNotFoundError, ValueError):
+                    pass
+                atexit.register(self.save)
+
+        return self._index
+
+    def save(self) -> None:
+        if self.index_path is None or self._index is None:
+            return
+
+        with self._lock:
+            with open(self.index_path, 'w') as f:
+                json.dump(self._index, f)
+
+    def stats(self) -> AudioStats:
+        return AudioStats(self._hits, self._misses, self._duplicates, self._downloaded)
+
+    def _valid(self, mediadir: str, entry: _Entry) -> bool:
+        try:
+            st = os.stat(os.path.join(mediadir, entry['filename']))
+        except OSError:
+            return False
+
+        if st.st_size != entry['size']:
+            return False
+        if st.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        # Touched, but maybe not changed.
+        try:
+            digest = _hash_file(os.path.join(mediadir, entry['filename']))
+        except OSError:
+            return False
+        if digest != entry['sha256']:
+            return False
+
+        entry['mtime_ns'] = st.st_mtime_ns
+        return True
+
+    def _hashes_of(self, mediadir: str, media: _MediaIndex) -> dict[str, str]:
+        hashes = self._hashes.get(mediadir)
+        if hashes is None:
+            hashes = self._hashes[mediadir] = {
+                entry['sha256']: filename for filename, entry in media['files'].items()
+            }
+        return hashes
+
+    def _remove_file(self, mediadir: str, media: _MediaIndex, filename: str) -> None:
+        entry = media['files'].pop(filename, None)
+        hashes = self._hashes.get(mediadir)
+        if entry is not None and hashes is not None and hashes.get(entry['sha256']) == filename:
+            del hashes[entry['sha256']]
+
+    def _lookup_url(self, mediadir: str, url: str) -> str | None:
+        with self._lock:
+            media = self._load().get(mediadir)
+            if media is None or url not in media['urls']:
+                return None
+
+            filename = media['urls'].pop(url)
+            entry = media['files'].get(filename)
+            if entry is not None and self._valid(mediadir, entry):
+                self._hits += 1
+                media['urls'][url] = filename
+                return filename
+
+            self._remove_file(mediadir, media, filename)
+            return None
+
+    def _download(self, url: str, path: str) -> tuple[str, int]:
+        h = hashlib.sha256()
+        size = 0
+        response = http.urlopen('GET', url, preload_content=False)
+        try:
+            if response.status != 200:
+                raise OSError(f'{url}: HTTP status {response.status}')
+            with open(path, 'wb') as f:
+                for chunk in response.stream(CHUNK_SIZE):
+                    h.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+        finally:
+            response.release_conn()
+
+        return h.hexdigest(), size
+
+    def _copy(self, src: str, path: str) -> tuple[str, int]:
+        h = hashlib.sha256()
+        size = 0
+        with open(src, 'rb') as fsrc, open(path, 'wb') as f:
+            while chunk := fsrc.read(CHUNK_SIZE):
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+        return h.hexdigest(), size
+
+    def _store(self,
+            mediadir: str,
+            url: str,
+            part_path: str,
+            digest: str,
+            size: int,
+            downloaded: bool = True
+    ) -> str:
+        with self._lock:
+            if downloaded:
+                self._misses += 1
+                self._downloaded += size
+            media = self._load().setdefault(mediadir, {'urls': {}, 'files': {}})
+
+            hashes = self._hashes_of(mediadir, media)
+            if digest in hashes:
+                entry = media['files'][hashes[digest]]
+                if self._valid(mediadir, entry):
+                    os.remove(part_path)
+                    self._duplicates += 1
+                    media['urls'][url] = entry['filename']
+                    return entry['filename']
+                self._remove_file(mediadir, media, entry['filename'])
+
+            _, _, filename = url.rpartition('/')
+            path = os.path.join(mediadir, filename)
+            if os.path.exists(path) and _hash_file(path) != digest:
+                stem, ext = os.path.splitext(filename)
+                filename = f'{stem}-{digest[:8]}{ext}'
+                path = os.path.join(mediadir, filename)
+
+            os.replace(part_path, path)
+            st = os.stat(path)
+            # Entry of an earlier file of this name, removed since.
+            self._remove_file(mediadir, media, filename)
+            media['files'][filename] = {
+                'filename': filename,
+                'sha256': digest,
+                'size': st.st_size,
+                'mtime_ns': st.st_mtime_ns,
+            }
+            hashes[digest] = filename
+            media['urls'][url] = filename
+            return filename
+
+    # Returns the name of the file in `mediadir` with the audio from `url`,
+    # downloads it only if it is not already there, or in `staging`.
+    # raises: OSError, urllib3 exceptions
+    def get(self, url: str, mediadir: str, staging: str | None = None) -> str:
+        mediadir = os.path.abspath(mediadir)
+
+        filename = self._lookup_url(mediadir, url)
+        if filename is not None:
+            return filename
+
+        staged = None
+        if staging is not None:
+            staging = os.path.abspath(staging)
+            if staging != mediadir:
+                staged = self._lookup_url(staging, url)
+
+        # Write to a temporary file so that an interrupted download
+        # does not leave a broken file in the media directory.
+        part_path = os.path.join(
+            mediadir, f'.{url.rpartition("/")[2]}.{threading.get_ident()}.part'
+        )
+        try:
+            if staging is not None and staged is not None:
+                digest, size = self._copy(os.path.join(staging, staged), part_path)
+                return self._store(mediadir, url, part_path, digest, size, downloaded=False)
+
+            digest, size = self._download(url, part_path)
+            return self._store(mediadir, url, part_path, digest, size)
+        except BaseException:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+            raise
+
+
+store = AudioStore(os.path.join(DATA_DIR, 'audio.json'))
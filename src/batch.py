@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import sys
+import time
+from typing import Iterable
+from typing import Iterator
+from typing import NamedTuple
+from typing import Sequence
+from typing import TextIO
+from typing import TYPE_CHECKING
+
+import src.anki as anki
+import src.audio as audio
+import src.search as search
+from src.audio import AudioStats
+from src.card import Card
+from src.card import perror_make_cards
+from src.Curses.proto import SearchProgressProto
+from src.Curses.proto import StatusProto
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import DictionarySelection
+from src.Dictionaries.base import EntrySelector
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.base import SYN
+from src.Dictionaries.util import pool_stats
+from src.Dictionaries.util import PoolStats
+
+if TYPE_CHECKING:
+    from src.data import dictkey_t
+
+# Non-interactive mode: looks up a list of words and adds a card for every
+# one of them, with definitions selected by a `Rule` instead of by hand.
+
+
+class Rule(NamedTuple):
+    # Number of definitions to select.
+    ndefs: int = 1
+    # Select only definitions with a label containing `label`, e.g. "informal".
+    label: str | None = None
+    # Select only definitions of a part of speech starting with `pos`, e.g.
+    # "n" or "adj". Dictionaries use labels to divide entries by part of speech.
+    pos: str | None = None
+
+
+class PrintStatus(StatusProto):
+    def __init__(self, file: TextIO = sys.stderr) -> None:
+        self.file = file
+
+    def _print(self, prefix: str, header: str, body: str | None) -> None:
+        if body is None:
+            print(f'{prefix}{header}', file=self.file)
+        else:
+            print(f'{prefix}{header} {body}', file=self.file)
+
+    def writeln(self, header: str, body: str | None = None) -> None:
+        self._print('', header, body)
+
+    def error(self, header: str, body: str | None = None) -> None:
+        self._print('error: ', header, body)
+
+    def success(self, header: str, body: str | None = None) -> None:
+        self._print('', header, body)
+
+    def attention(self, header: str, body: str | None = None) -> None:
+        self._print('', header, body)
+
+    def clear(self) -> None:
+        pass
+
+
+class PrintProgress(SearchProgressProto):
+    def __init__(self, total: int, file: TextIO = sys.stderr) -> None:
+        self.total = total
+        self.file = file
+        self._done = 0
+
+    def result(self, slot: tuple[int, int], dictionary: Dictionary) -> None:
+        pass
+
+    def pending(self, lookups: Sequence[tuple[dictkey_t, str]]) -> None:
+        done = self.total - len(lookups)
+        if done != self._done and self.file.isatty():
+            self._done = done
+            print(f'\rLooked up: {done}/{self.total}', end='', file=self.file)
+            if not lookups:
+                print(file=self.file)
+
+
+def select(dictionary: Dictionary, rule: Rule) -> list[DictionarySelection] | None:
+    selector = EntrySelector(dictionary)
+
+    pos = ''
+    selected = 0
+    for i, op in enumerate(dictionary.contents):
+        if selected >= rule.ndefs:
+            break
+        if isinstance(op, PHRASE):
+            pos = ''
+        elif isinstance(op, LABEL):
+            if op.label:
+                pos = op.label
+        elif isinstance(op, (DEF, SYN)):
+            if rule.pos is not None and not pos.lower().startswith(rule.pos.lower()):
+                continue
+            if rule.label is not None and (
+                    not isinstance(op, DEF)
+                 or rule.label.lower() not in op.label.lower()
+            ):
+                continue
+
+            selector.toggle_index(i)
+            selected += 1
+
+    # All definitions of a word make up a single card.
+    return selector.dump_selection(respect_phrase_boundaries=False)
+
+
+def read_words(lines: Iterable[str]) -> list[search.Query]:
+    result = []
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        # Every line holds a single query, commas included, but dictionary
+        # flags are allowed.
+        queries = search.parse(line.replace(search.QUERY_SEPARATOR, ' '))
+        if queries is not None:
+            result.extend(queries)
+
+    return result
+
+
+class Report(NamedTuple):
+    words: int
+    cards: int
+    added: int
+    failures: list[tuple[str, str]]
+    elapsed: float
+    audio: AudioStats
+    connections: dict[str, PoolStats]
+
+
+def make_cards(
+        status: PrintStatus,
+        queries: list[search.Query],
+        rule: Rule,
+        failures: list[tuple[str, str]]
+) -> Iterator[tuple[str, Card]]:
+    results = search.search(status, queries, PrintProgress(len(queries)))
+
+    words: list[str] = []
+    selections = []
+    for query, dictionaries in zip(queries, results):
+        if dictionaries is None:
+            failures.append((query.query, 'not found'))
+            continue
+
+        selected = select(dictionaries[0], rule)
+        if selected is None:
+            failures.append((query.query, 'no definitions matching the rule'))
+            continue
+
+        words.extend(query.query for _ in selected)
+        selections.extend(selected)
+
+    # Audio of all the words is downloaded in the background.
+    yield from zip(words, perror_make_cards(status, selections))
+
+
+def run(lines: Iterable[str], rule: Rule, *, dry_run: bool = False) -> Report:
+    start = time.perf_counter()
+    status = PrintStatus()
+
+    queries = read_words(lines)
+    failures: list[tuple[str, str]] = []
+    cards = 0
+    added = 0
+
+    def on_flush(result: list[tuple[str, int | anki.AnkiError]]) -> None:
+        nonlocal added
+        for word, x in result:
+            if isinstance(x, anki.AnkiError):
+                failures.append((word, str(x)))
+            else:
+                added += 1
+
+    # Making cards with audio takes a while, the queue adds them
+    # to Anki in batches as they are made.
+    queue: anki.CardQueue[str] = anki.CardQueue(on_flush)
+    for word, card in make_cards(status, queries, rule, failures):
+        cards += 1
+        if dry_run:
+            print(word, json.dumps(card, ensure_ascii=False), sep='\t')
+        else:
+            queue.put(word, card)
+    queue.flush()
+
+    return Report(
+        len(queries), cards, added, failures,
+        time.perf_counter() - start,
+        audio.store.stats(),
+        pool_stats()
+    )
+
+
+def print_report(report: Report, file: TextIO = sys.stderr) -> None:
+    for word, reason in report.failures:
+        print(f'failed: {word}: {reason}', file=file)
+
+    rate = report.words / report.elapsed if report.elapsed else 0
+    print(
+        f'{report.added}/{report.cards} cards added from {report.words} words, '
+        f'{len(report.failures)} failed, '
+        f'in {report.elapsed:.1f}s ({rate:.1f} words/s)',
+        file=file
+    )
+    if report.audio.hits or report.audio.misses:
+        print(
+            f'audio: {report.audio.misses} downloaded '
+            f'({report.audio.downloaded_bytes / 1024:.0f} KiB, '
+            f'{report.audio.duplicates} duplicates), '
+            f'{report.audio.hits} already stored',
+            file=file
+        )
+    for host, stats in report.connections.items():
+        print(
+            f'{host}: {stats.requests} requests over {stats.connections} connections',
+            file=file
+        )
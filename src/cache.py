@@ -0,0 +1,577 @@
+from __future__ import annotations
+
+import dbm
+import glob
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from typing import Callable
+from typing import get_args
+from typing import Iterator
+from typing import Literal
+from typing import Mapping
+from typing import NamedTuple
+
+import src.Dictionaries.codec as codec
+from src.data import dictkey_t
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import MAGIC
+
+
+def _create_dictionaries_table(conn: sqlite3.Connection) -> None:
+    # Dictionaries are keyed by MAGIC, so that entries made incompatible by
+    # changes to the dataclasses are never returned, but can still be
+    # inspected or removed.
+    conn.execute(
+        'CREATE TABLE dictionaries ('
+        '  dictkey  TEXT NOT NULL,'
+        '  query    TEXT NOT NULL,'
+        '  magic    INTEGER NOT NULL,'
+        '  data     BLOB NOT NULL,'
+        '  size     INTEGER NOT NULL,'
+        '  created  REAL NOT NULL,'
+        '  accessed REAL NOT NULL,'
+        '  hits     INTEGER NOT NULL,'
+        '  PRIMARY KEY (dictkey, query, magic)'
+        ') WITHOUT ROWID'
+    )
+    # Least recently used entries are evicted first.
+    conn.execute('CREATE INDEX dictionaries_accessed ON dictionaries (accessed)')
+
+
+def _create_not_found_table(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        'CREATE TABLE not_found ('
+        '  dictkey TEXT NOT NULL,'
+        '  query   TEXT NOT NULL,'
+        '  message TEXT NOT NULL,'
+        '  created REAL NOT NULL,'
+        '  PRIMARY KEY (dictkey, query)'
+        ') WITHOUT ROWID'
+    )
+
+
+def _create_audio_urls_table(conn: sqlite3.Connection) -> None:
+    # An empty url means there is no audio.
+    conn.execute(
+        'CREATE TABLE audio_urls ('
+        '  source  TEXT NOT NULL,'
+        '  query   TEXT NOT NULL,'
+        '  url     TEXT NOT NULL,'
+        '  created REAL NOT NULL,'
+        '  PRIMARY KEY (source, query)'
+        ') WITHOUT ROWID'
+    )
+
+
+def _create_responses_table(conn: sqlite3.Connection) -> None:
+    # Responses dictionaries were parsed from, with bodies as received,
+    # i.e. usually compressed.
+    conn.execute(
+        'CREATE TABLE responses ('
+        '  dictkey       TEXT NOT NULL,'
+        '  query         TEXT NOT NULL,'
+        '  url           TEXT NOT NULL,'
+        '  etag          TEXT,'
+        '  last_modified TEXT,'
+        '  encoding      TEXT NOT NULL,'
+        '  body          BLOB NOT NULL,'
+        '  created       REAL NOT NULL,'
+        '  PRIMARY KEY (dictkey, query, url)'
+        ') WITHOUT ROWID'
+    )
+
+
+# The n-th migration brings the database to `user_version` n + 1.
+MIGRATIONS: tuple[Callable[[sqlite3.Connection], None], ...] = (
+    _create_dictionaries_table,
+    _create_not_found_table,
+    _create_audio_urls_table,
+    _create_responses_table,
+)
+
+COLUMNS = 'dictkey, query, magic, data, size, created, accessed, hits'
+
+# Queries not found in a dictionary are remembered for a short time only,
+# dictionaries get updated and a typo made today might be a word tomorrow.
+NOT_FOUND_TTL = 24 * 60 * 60
+
+SIZE_QUERY = (
+    'SELECT COUNT(*),'
+    '  TOTAL(size) + (SELECT TOTAL(length(body)) FROM responses) '
+    'FROM dictionaries'
+)
+
+
+class StoredResponse(NamedTuple):
+    url: str
+    etag: str | None
+    last_modified: str | None
+    # Content encoding of the body, see `util.iter_decoded`.
+    encoding: str
+    body: bytes
+
+
+BYTE_SUFFIXES = {'B': 1, 'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+class Limits(NamedTuple):
+    entries: int | None
+    nbytes: int | None
+
+    def allow(self, entries: int, nbytes: int) -> bool:
+        return (
+                (self.entries is None or entries <= self.entries)
+            and (self.nbytes is None or nbytes <= self.nbytes)
+        )
+
+
+# Parses the 'cachelimit' option, e.g. "50000", "256M" or "50000 256M".
+# A bare number limits the number of entries, a number with one of the
+# B, K, M or G suffixes limits the size of the cache, "-" means no limit.
+def parse_limits(s: str) -> Limits:
+    entries = nbytes = None
+    for part in s.replace(',', ' ').upper().split():
+        if part == '-':
+            continue
+        try:
+            if part[-1] in BYTE_SUFFIXES:
+                nbytes = int(float(part[:-1]) * BYTE_SUFFIXES[part[-1]])
+            else:
+                entries = int(part)
+        except ValueError:
+            raise ValueError(f'invalid cache limit: {part!r}')
+
+    return Limits(entries, nbytes)
+
+
+# Parses the 'cachettl' option, e.g. "diki:90 ahd:365". Every part is
+# a dictionary key or its prefix followed by the number of days entries
+# of that dictionary are kept for. "-" means that entries do not expire.
+# return: Mapping of dictionary keys to their TTL in seconds.
+def parse_ttls(s: str) -> dict[dictkey_t, float]:
+    result: dict[dictkey_t, float] = {}
+    for part in s.replace(',', ' ').lower().split():
+        if part == '-':
+            continue
+
+        prefix, sep, days = part.partition(':')
+        try:
+            if not sep:
+                raise ValueError
+            ttl = float(days) * 24 * 60 * 60
+        except ValueError:
+            raise ValueError(f'invalid cache TTL: {part!r}')
+
+        keys = [x for x in get_args(dictkey_t) if x.startswith(prefix)]
+        if not keys:
+            raise ValueError(f'invalid cache TTL: unknown dictionary {prefix!r}')
+        for key in keys:
+            result[key] = ttl
+
+    return result
+
+
+def _dictkey_of(shelf_key: str) -> tuple[dictkey_t, str] | None:
+    for key in get_args(dictkey_t):
+        if shelf_key.startswith(key):
+            return key, shelf_key[len(key):]
+
+    return None
+
+
+class DictionaryCache:
+    def __init__(self,
+            path: str | None = None, *,
+            ttls: Mapping[dictkey_t, float] | None = None,
+            not_found_ttl: float = NOT_FOUND_TTL
+    ) -> None:
+        self.path = path
+        self.ttls = ttls or {}
+        self.not_found_ttl = not_found_ttl
+        self._lock = threading.Lock()
+
+        # Access statistics are written out in batches by `self.flush()`.
+        self._accessed: dict[tuple[dictkey_t, str], tuple[float, int]] = {}
+
+        # Access is serialized with `self._lock`, sqlite's own check is
+        # too strict for us.
+        self._conn = sqlite3.connect(
+            ':memory:' if path is None else path,
+            timeout=10,
+            isolation_level=None,
+            check_same_thread=False
+        )
+        try:
+            if path is not None:
+                # WAL lets other instances of the program read the cache
+                # while we are writing to it.
+                self._conn.execute('PRAGMA journal_mode = WAL')
+                self._conn.execute('PRAGMA synchronous = NORMAL')
+            self._migrate()
+        except sqlite3.Error:
+            self._conn.close()
+            raise
+
+    @property
+    def in_memory(self) -> bool:
+        return self.path is None
+
+    def _migrate(self) -> None:
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version, = conn.execute('PRAGMA user_version').fetchone()
+            for migration in MIGRATIONS[version:]:
+                migration(conn)
+            conn.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+
+    def __len__(self) -> int:
+        with self._lock:
+            r, = self._conn.execute(
+                'SELECT COUNT(*) FROM dictionaries WHERE magic = ?', (MAGIC,)
+            ).fetchone()
+        return r  # type: ignore[no-any-return]
+
+    def __contains__(self, item: tuple[dictkey_t, str]) -> bool:
+        key, query = item
+        with self._lock:
+            return self._conn.execute(
+                'SELECT 1 FROM dictionaries '
+                'WHERE dictkey = ? AND query = ? AND magic = ?',
+                (key, query, MAGIC)
+            ).fetchone() is not None
+
+    # stale: Return entries past their TTL as well.
+    def get(self, key: dictkey_t, query: str, *, stale: bool = False) -> Dictionary | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, created FROM dictionaries '
+                'WHERE dictkey = ? AND query = ? AND magic = ?',
+                (key, query, MAGIC)
+            ).fetchone()
+            if row is None:
+                return None
+
+            data, created = row
+            now = time.time()
+            if not stale and key in self.ttls and created + self.ttls[key] < now:
+                # Expired entries are removed by `self.evict()`.
+                return None
+
+            _, hits = self._accessed.get((key, query), (0, 0))
+            self._accessed[key, query] = (now, hits + 1)
+
+        try:
+            return codec.loads(data)
+        except codec.CodecError:
+            return None
+
+    # replace: Replace the entry of `query` if there is one.
+    def put(self,
+            key: dictkey_t,
+            query: str,
+            dictionary: Dictionary, *,
+            replace: bool = True
+    ) -> None:
+        data = codec.dumps(dictionary)
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            inserted = self._conn.execute(
+                f'INSERT OR {"REPLACE" if replace else "IGNORE"} INTO dictionaries ({COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                (key, query, MAGIC, data, len(data), now, now)
+            ).rowcount
+            if inserted:
+                self._conn.execute(
+                    'DELETE FROM not_found WHERE dictkey = ? AND query = ?',
+                    (key, query)
+                )
+                self._conn.execute(
+                    'DELETE FROM dictionaries WHERE dictkey = ? AND query = ? AND magic != ?',
+                    (key, query, MAGIC)
+                )
+            self._conn.execute('COMMIT')
+
+    # return: Error message of a recent lookup that found nothing or None.
+    def get_not_found(self, key: dictkey_t, query: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT message FROM not_found '
+                'WHERE dictkey = ? AND query = ? AND created >= ?',
+                (key, query, time.time() - self.not_found_ttl)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put_not_found(self, key: dictkey_t, query: str, message: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO not_found VALUES (?, ?, ?, ?)',
+                (key, query, message, time.time())
+            )
+
+    # return: URL of the audio of `query` found by `source`, an empty string
+    #   if `source` recently had no audio for it, None if it is not cached.
+    def get_audio_url(self, source: str, query: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url FROM audio_urls '
+                "WHERE source = ? AND query = ? AND (url != '' OR created >= ?)",
+                (source, query, time.time() - self.not_found_ttl)
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def put_audio_url(self, source: str, query: str, url: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO audio_urls VALUES (?, ?, ?, ?)',
+                (source, query, url, time.time())
+            )
+
+    def get_response(self, key: dictkey_t, query: str, url: str) -> StoredResponse | None:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT url, etag, last_modified, encoding, body FROM responses '
+                'WHERE dictkey = ? AND query = ? AND url = ?',
+                (key, query, url)
+            ).fetchone()
+        return None if row is None else StoredResponse(*row)
+
+    def put_response(self, key: dictkey_t, query: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, query, *response, time.time())
+            )
+
+    def remove_pages(self, key: dictkey_t, query: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                'DELETE FROM responses WHERE dictkey = ? AND query = ?', (key, query)
+            )
+
+    # Yields stored pages of entries that have no dictionary of the current
+    # MAGIC, i.e. pages that can be parsed again, as (key, query, pages).
+    # Entries are read `batch_size` at a time and can be updated in between.
+    def stale_pages(self,
+            batch_size: int = 64
+    ) -> Iterator[tuple[dictkey_t, str, list[StoredResponse]]]:
+        last = ('', '')
+        while True:
+            with self._lock:
+                entries = self._conn.execute(
+                    'SELECT DISTINCT dictkey, query FROM responses AS r '
+                    'WHERE (dictkey, query) > (?, ?) AND NOT EXISTS ('
+                    '  SELECT 1 FROM dictionaries AS d'
+                    '  WHERE d.dictkey = r.dictkey AND d.query = r.query AND d.magic = ?'
+                    ') ORDER BY dictkey, query LIMIT ?',
+                    (*last, MAGIC, batch_size)
+                ).fetchall()
+            if not entries:
+                return
+
+            for key, query in entries:
+                with self._lock:
+                    pages = [
+                        StoredResponse(*x) for x in self._conn.execute(
+                            'SELECT url, etag, last_modified, encoding, body FROM responses '
+                            'WHERE dictkey = ? AND query = ?',
+                            (key, query)
+                        )
+                    ]
+                if pages:
+                    yield key, query, pages
+
+            last = entries[-1]
+
+    def _flush(self) -> None:
+        if not self._accessed:
+            return
+
+        self._conn.execute('BEGIN')
+        self._conn.executemany(
+            'UPDATE dictionaries SET accessed = ?, hits = hits + ? '
+            'WHERE dictkey = ? AND query = ? AND magic = ?',
+            (
+                (accessed, hits, key, query, MAGIC)
+                for (key, query), (accessed, hits) in self._accessed.items()
+            )
+        )
+        self._conn.execute('COMMIT')
+        self._accessed.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def _rows(self) -> Iterator[tuple[str, str, int, bytes, int, float, float, int]]:
+        yield from self._conn.execute(f'SELECT {COLUMNS} FROM dictionaries')
+
+    def copy_to(self, other: DictionaryCache) -> None:
+        with self._lock, other._lock:
+            self._flush()
+            other._conn.execute('BEGIN')
+            other._conn.executemany(
+                f'INSERT OR REPLACE INTO dictionaries ({COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self._rows()
+            )
+            other._conn.executemany(
+                'INSERT OR REPLACE INTO not_found VALUES (?, ?, ?, ?)',
+                self._conn.execute('SELECT * FROM not_found')
+            )
+            other._conn.executemany(
+                'INSERT OR REPLACE INTO audio_urls VALUES (?, ?, ?, ?)',
+                self._conn.execute('SELECT * FROM audio_urls')
+            )
+            other._conn.executemany(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                self._conn.execute('SELECT * FROM responses')
+            )
+            other._conn.execute('COMMIT')
+
+    # return: Number of entries and their size, responses included.
+    def size(self) -> tuple[int, int]:
+        with self._lock:
+            r = self._conn.execute(SIZE_QUERY).fetchone()
+        return r[0], int(r[1])
+
+    # Removes expired entries, entries incompatible with the current MAGIC
+    # (unless their pages are stored) and then, least recently ('lru') or least frequently ('lfu') used
+    # entries until the cache fits within `limits`. Expired not found
+    # queries and missing audio, and responses of removed entries are removed
+    # as well.
+    # return: Number of removed dictionary entries.
+    def evict(self, limits: Limits, policy: Literal['lru', 'lfu'] = 'lru') -> int:
+        with self._lock:
+            self._flush()
+
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Entries with stored pages are kept until the pages are
+                # parsed again, or until the size limit removes them.
+                removed = conn.execute(
+                    'DELETE FROM dictionaries WHERE magic != ? AND NOT EXISTS ('
+                    '  SELECT 1 FROM responses AS r'
+                    '  WHERE r.dictkey = dictionaries.dictkey AND r.query = dictionaries.query'
+                    ')',
+                    (MAGIC,)
+                ).rowcount
+
+                now = time.time()
+                conn.execute(
+                    'DELETE FROM not_found WHERE created < ?',
+                    (now - self.not_found_ttl,)
+                )
+                conn.execute(
+                    "DELETE FROM audio_urls WHERE url = '' AND created < ?",
+                    (now - self.not_found_ttl,)
+                )
+                for key, ttl in self.ttls.items():
+                    removed += conn.execute(
+                        'DELETE FROM dictionaries WHERE dictkey = ? AND created < ?',
+                        (key, now - ttl)
+                    ).rowcount
+
+                nentries, nbytes = conn.execute(SIZE_QUERY).fetchone()
+
+                # Entries are ordered only when some of them have to go.
+                order = 'accessed' if policy == 'lru' else 'hits, accessed'
+                to_remove = []
+                if not limits.allow(nentries, nbytes):
+                    for key, query, size in conn.execute(
+                            'SELECT dictkey, query, size + ('
+                            '  SELECT TOTAL(length(body)) FROM responses AS r'
+                            '  WHERE r.dictkey = d.dictkey AND r.query = d.query'
+                            f') FROM dictionaries AS d ORDER BY {order}'
+                    ):
+                        to_remove.append((key, query))
+                        nentries -= 1
+                        nbytes -= size
+                        if limits.allow(nentries, nbytes):
+                            break
+
+                conn.executemany(
+                    'DELETE FROM dictionaries WHERE dictkey = ? AND query = ?',
+                    to_remove
+                )
+                removed += len(to_remove)
+
+                conn.execute(
+                    'DELETE FROM responses WHERE NOT EXISTS ('
+                    '  SELECT 1 FROM dictionaries AS d'
+                    '  WHERE d.dictkey = responses.dictkey AND d.query = responses.query'
+                    ')'
+                )
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            else:
+                conn.execute('COMMIT')
+
+        return removed
+
+    # Rewrites the database file without the free pages left after removed
+    # entries.
+    def compact(self) -> None:
+        with self._lock:
+            self._flush()
+            self._conn.execute('VACUUM')
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    # Copies entries from the `shelve` cache used by previous versions of the
+    # program and removes it. Entries that cannot be unpickled are skipped.
+    # return: Number of imported entries or -1 if the shelf is in use.
+    def import_shelf(self, path: str) -> int:
+        if not dbm.whichdb(path):
+            return 0
+
+        try:
+            shelf = dbm.open(path, 'r')
+        except dbm.error:
+            return -1
+
+        now = time.time()
+        rows = []
+        with shelf:
+            for shelf_key in shelf.keys():
+                # shelve encodes its keys in UTF-8.
+                if isinstance(shelf_key, bytes):
+                    parts = _dictkey_of(shelf_key.decode())
+                else:
+                    parts = _dictkey_of(shelf_key)
+                if parts is None:
+                    continue
+                try:
+                    data = codec.dumps(pickle.loads(shelf[shelf_key]))
+                except Exception:
+                    continue
+                rows.append((*parts, MAGIC, data, len(data), now, now))
+
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                f'INSERT OR IGNORE INTO dictionaries ({COLUMNS}) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, 0)',
+                rows
+            )
+            self._conn.execute('COMMIT')
+
+        for file in glob.glob(glob.escape(path)) + glob.glob(f'{glob.escape(path)}.*'):
+            os.remove(file)
+
+        return len(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._conn.close()
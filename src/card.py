@@ -2,18 +2,23 @@ from __future__ import annotations
 
 import functools
 import os
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
 from typing import Callable
 from typing import Iterable
+from typing import Iterator
 from typing import Literal
 from typing import TYPE_CHECKING
 from typing import TypedDict
 
+from urllib3.exceptions import HTTPError
+
 import src.anki as anki
+import src.audio as audio
+import src.search as search
 from src.data import AUDIO_DIR
 from src.data import getconf
 from src.Dictionaries.base import DictionaryError
-from src.Dictionaries.diki import diki_audio
-from src.Dictionaries.util import http
 
 if TYPE_CHECKING:
     from src.Curses.proto import StatusProto
@@ -178,61 +183,133 @@ def make_card(selection: DictionarySelection) -> Card:
     return card
 
 
-def _save_audio(url: str) -> str:
-    audio_bytes = http.urlopen('GET', url).data
+# Audio files are downloaded in the background: a card waits only for its
+# own file and selections are downloaded in parallel. Downloads are started
+# as soon as it is known what is going to be downloaded, see `prefetch_audio`.
+# Files are downloaded to AUDIO_DIR and copied to the media directory only
+# when a card is made with them, Anki should not see files of no card.
+AUDIO_WORKERS = 4
+
+_audio_executor: ThreadPoolExecutor | None = None
+
+# Downloads in progress by url or phrase, only the main thread uses it.
+# Finished ones are in `audio.store`.
+_audio_downloads: dict[str, Future[str]] = {}
 
-    mediadir_path = os.path.expanduser(
+
+def _mediadir() -> str:
+    return os.path.expanduser(
         AUDIO_DIR if getconf('mediadir') == '-' else getconf('mediadir')
     )
-    _, _, filename = url.rpartition('/')
 
+
+# return: URL of the audio.
+def _fetch_audio(phrase: str, url: str | None) -> str:
+    try:
+        if url is None:
+            url = search.diki_audio(phrase)
+        audio.store.get(url, AUDIO_DIR)
+    except OSError as e:
+        raise anki.AnkiError(str(e))
+    except HTTPError as e:
+        raise anki.AnkiError(f'connection error: {e}')
+
+    return url
+
+
+def _save_audio(url: str, mediadir_path: str) -> str:
     try:
-        with open(os.path.join(mediadir_path, filename), 'wb') as f:
-            f.write(audio_bytes)
-    except Exception as e:
+        filename = audio.store.get(url, mediadir_path, staging=AUDIO_DIR)
+    except OSError as e:
         raise anki.AnkiError(str(e))
+    except HTTPError as e:
+        raise anki.AnkiError(f'connection error: {e}')
 
     return f'[sound:{filename}]'
 
 
-def _perror_save_audio(
-        status: StatusProto,
-        selection: DictionarySelection
-) -> str:
-    phrase = selection.PHRASE.phrase
+def _start_audio_download(phrase: str, url: str | None) -> Future[str]:
+    global _audio_executor
+
+    for k in [k for k, v in _audio_downloads.items() if v.done()]:
+        del _audio_downloads[k]
+
+    key = phrase if url is None else url
+    if key in _audio_downloads:
+        return _audio_downloads[key]
+
+    if _audio_executor is None:
+        _audio_executor = ThreadPoolExecutor(AUDIO_WORKERS, 'audio')
+
+    future = _audio_executor.submit(_fetch_audio, phrase, url)
+    _audio_downloads[key] = future
+    return future
+
+
+def prefetch_audio(url: str) -> None:
+    if getconf('audio'):
+        _start_audio_download('', url)
+
 
+def _audio_url(selection: DictionarySelection) -> str | None:
     if selection.AUDIO is None:
-        try:
-            url = diki_audio(phrase)
-        except DictionaryError as e:
-            status.error(str(e))
-            status.attention(f'No audio available for {phrase!r}')
-            return ''
-    else:
-        url = selection.AUDIO.resource
+        return None
+    return selection.AUDIO.resource
+
 
+def _perror_join_audio(
+        status: StatusProto,
+        selection: DictionarySelection,
+        download: Future[str]
+) -> str:
     try:
-        return _save_audio(url)
-    except anki.AnkiError as e:
-        status.error('Saving audio failed:', str(e))
+        return _save_audio(download.result(), _mediadir())
+    except (DictionaryError, anki.AnkiError) as e:
+        if isinstance(e, DictionaryError):
+            status.error(str(e))
+            status.attention(f'No audio available for {selection.PHRASE.phrase!r}')
+        else:
+            status.error('Saving audio failed:', str(e))
         return ''
 
 
+def perror_make_cards(
+        status: StatusProto,
+        selections: Iterable[DictionarySelection]
+) -> Iterator[Card]:
+    selections = list(selections)
+    if getconf('audio'):
+        downloads: list[Future[str] | None] = [
+            _start_audio_download(x.PHRASE.phrase, _audio_url(x))
+            for x in selections
+        ]
+    else:
+        downloads = [None] * len(selections)
+
+    for selection, download in zip(selections, downloads):
+        card = make_card(selection)
+        if download is not None:
+            card['AUDIO'] = _perror_join_audio(status, selection, download)
+        yield card
+
+
 def create_and_add_card(
         status: StatusProto,
         selections: list[DictionarySelection]
 ) -> list[int]:
-    nids = []
-    for selection in selections:
-        card = make_card(selection)
-        if getconf('audio'):
-            card['AUDIO'] = _perror_save_audio(status, selection)
+    cards = list(perror_make_cards(status, selections))
+    try:
+        result = anki.add_cards(cards)
+    except anki.AnkiError as e:
+        status.error('Adding card failed:', str(e))
+        return []
 
-        try:
-            nids.append(anki.add_card(card))
-        except anki.AnkiError as e:
-            status.error('Adding card failed:', str(e))
+    nids = []
+    for x in result:
+        if isinstance(x, anki.AnkiError):
+            status.error('Adding card failed:', str(x))
         else:
+            nids.append(x)
             status.success('Card added successfully:', 'press "b" to open in Anki')
 
     return nids
@@ -18,6 +18,9 @@ config_t = TypedDict(
     {
         'audio':       bool,
         'cachefile':   bool,
+        'cachelimit':  str,
+        'cachepolicy': Literal['lru', 'lfu'],
+        'cachettl':    str,
         'deck':        str,
         'dupescope':   Literal['deck', 'collection'],
         'duplicates':  bool,
@@ -35,6 +38,7 @@ config_t = TypedDict(
         'note':        str,
         'pos':         bool,
         'primary':     dictkey_t,
+        'procparse':   bool,
         'secondary':   Literal[dictkey_t, '-'],
         'shortetyms':  bool,
         'syn':         bool,
@@ -65,17 +69,26 @@ config_t = TypedDict(
 bool_configkey_t = Literal[
     'audio', 'cachefile', 'duplicates', 'etym', 'formatdefs', 'hidedef',
     'hideexsen', 'hidepreps', 'hidesyn', 'histsave', 'histshow', 'nohelp',
-    'pos', 'shortetyms', 'syn', 'toipa'
+    'pos', 'procparse', 'shortetyms', 'syn', 'toipa'
 ]
 colorkey_t = Literal[
     'c.cursor', 'c.def1', 'c.def2', 'c.delimit', 'c.err', 'c.etym', 'c.exsen',
     'c.heed', 'c.hl', 'c.index', 'c.infl', 'c.label', 'c.phon', 'c.phrase',
     'c.pos', 'c.selection', 'c.sign', 'c.success', 'c.syn',
 ]
-str_configkey_t = Literal['deck', 'hides', 'mediadir', 'note', 'tags', colorkey_t]
+str_configkey_t = Literal[
+    'cachelimit', 'cachettl', 'deck', 'hides', 'mediadir', 'note', 'tags',
+    colorkey_t
+]
 
-configkey_t = Literal[bool_configkey_t, str_configkey_t, 'dupescope', 'primary', 'secondary']
-configval_t = Union[bool, str, Literal['deck', 'collection'], dictkey_t, Literal[dictkey_t, '-']]
+configkey_t = Literal[
+    bool_configkey_t, str_configkey_t, 'cachepolicy', 'dupescope', 'primary',
+    'secondary'
+]
+configval_t = Union[
+    bool, str, Literal['lru', 'lfu'], Literal['deck', 'collection'], dictkey_t,
+    Literal[dictkey_t, '-']
+]
 
 
 class note_t(TypedDict):
@@ -92,6 +105,8 @@ def getconf(key: bool_configkey_t) -> bool: ...
 @overload
 def getconf(key: str_configkey_t) -> str: ...
 @overload
+def getconf(key: Literal['cachepolicy']) -> Literal['lru', 'lfu']: ...
+@overload
 def getconf(key: Literal['dupescope']) -> Literal['deck', 'collection']: ...
 @overload
 def getconf(key: Literal['primary']) -> dictkey_t: ...
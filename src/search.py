@@ -1,33 +1,63 @@
 from __future__ import annotations
 
+import asyncio
 import atexit
 import os
-import shelve
-import threading
+import sqlite3
+import zlib
+from concurrent.futures import as_completed
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from typing import Awaitable
 from typing import Callable
-from typing import Dict
+from typing import Container
+from typing import Iterable
 from typing import Mapping
 from typing import NamedTuple
 from typing import TYPE_CHECKING
 from typing import Union
-
+from urllib.parse import urlencode
+
+from src.cache import DictionaryCache
+from src.cache import parse_limits
+from src.cache import parse_ttls
+from src.cache import StoredResponse
+from src.data import config
+from src.data import config_t
 from src.data import DATA_DIR
 from src.data import dictkey_t
 from src.data import getconf
-from src.Dictionaries.ahd import ask_ahd
+import src.Dictionaries.ahd as ahd
+import src.Dictionaries.collins as collins
+import src.Dictionaries.diki as diki
+import src.Dictionaries.farlex as farlex
+import src.Dictionaries.wordnet as wordnet
+from src.Dictionaries.ahd import ask_ahd_async
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import page_request_t
+from src.Dictionaries.aio import request_async
 from src.Dictionaries.base import Dictionary
 from src.Dictionaries.base import DictionaryError
 from src.Dictionaries.base import MAGIC
-from src.Dictionaries.collins import ask_collins
-from src.Dictionaries.diki import ask_diki_english
-from src.Dictionaries.diki import ask_diki_french
-from src.Dictionaries.diki import ask_diki_german
-from src.Dictionaries.diki import ask_diki_italian
-from src.Dictionaries.diki import ask_diki_spanish
-from src.Dictionaries.farlex import ask_farlex
-from src.Dictionaries.wordnet import ask_wordnet
+from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.collins import ask_collins_async
+from src.Dictionaries.diki import ask_diki_english_async
+from src.Dictionaries.diki import ask_diki_french_async
+from src.Dictionaries.diki import ask_diki_german_async
+from src.Dictionaries.diki import ask_diki_italian_async
+from src.Dictionaries.diki import ask_diki_spanish_async
+from src.Dictionaries.farlex import ask_farlex_async
+from src.Dictionaries.util import EncodedPage
+from src.Dictionaries.util import page_t
+from src.Dictionaries.wordnet import ask_wordnet_async
 
 if TYPE_CHECKING:
+    from src.Curses.proto import SearchProgressProto
     from src.Curses.proto import StatusProto
 
 QUERY_SEPARATOR = ','
@@ -56,172 +86,458 @@ DICT_KEY_ALIASES: Mapping[str, dictkey_t] = {
 # with identical dictionaries that were called with the same query
 # but different "dictionary flag", which acts as nothing more but
 # an alias.
-DICTIONARY_LOOKUP: Mapping[dictkey_t, Callable[[str], Dictionary]] = {
-    'ahd': ask_ahd,
-    'collins': ask_collins,
-    'diki-en': ask_diki_english,
-    'diki-fr': ask_diki_french,
-    'diki-de': ask_diki_german,
-    'diki-it': ask_diki_italian,
-    'diki-es': ask_diki_spanish,
-    'farlex': ask_farlex,
-    'wordnet': ask_wordnet,
+DICTIONARY_LOOKUP: Mapping[dictkey_t, Callable[[str, fetch_t], Awaitable[Dictionary]]] = {
+    'ahd': ask_ahd_async,
+    'collins': ask_collins_async,
+    'diki-en': ask_diki_english_async,
+    'diki-fr': ask_diki_french_async,
+    'diki-de': ask_diki_german_async,
+    'diki-it': ask_diki_italian_async,
+    'diki-es': ask_diki_spanish_async,
+    'farlex': ask_farlex_async,
+    'wordnet': ask_wordnet_async,
 }
 
-MONOLINGUAL_DICTIONARIES = [x for x in DICTIONARY_LOOKUP if 'diki' not in x]
+# Same lookups, split into the request of the page a query is looked up on and
+# the parser of that page, which worker processes can run on their own, see
+# `_lookup_in_pool`. Every lookup is a single page.
+DICTIONARY_PAGES: Mapping[dictkey_t, Callable[[str], page_request_t]] = {
+    'ahd': ahd.ahd_page,
+    'collins': collins.collins_page,
+    'diki-en': diki.diki_english_page,
+    'diki-fr': diki.diki_french_page,
+    'diki-de': diki.diki_german_page,
+    'diki-it': diki.diki_italian_page,
+    'diki-es': diki.diki_spanish_page,
+    'farlex': farlex.farlex_page,
+    'wordnet': wordnet.wordnet_page,
+}
+DICTIONARY_PARSERS: Mapping[dictkey_t, Callable[[page_t, str], Dictionary]] = {
+    'ahd': ahd.create_dictionary,
+    'collins': collins.create_dictionary,
+    'diki-en': diki.create_dictionary,
+    'diki-fr': diki.create_dictionary,
+    'diki-de': diki.create_dictionary,
+    'diki-it': diki.create_dictionary,
+    'diki-es': diki.create_dictionary,
+    'farlex': farlex.create_dictionary,
+    'wordnet': wordnet.create_dictionary,
+}
 
-db_t = Union[shelve.DbfilenameShelf[Dictionary], Dict[str, Dictionary]]
+# Queries are normalized before they are looked up, so that e.g. "Gullible"
+# and "gullible " share a single request and a single cache entry.
+QUERY_NORMALIZERS: Mapping[dictkey_t, Callable[[str], str]] = {
+    'ahd': ahd.normalize_query,
+    'collins': collins.normalize_query,
+    'diki-en': diki.normalize_query,
+    'diki-fr': diki.normalize_query,
+    'diki-de': diki.normalize_query,
+    'diki-it': diki.normalize_query,
+    'diki-es': diki.normalize_query,
+    'farlex': farlex.normalize_query,
+    'wordnet': wordnet.normalize_query,
+}
 
+MONOLINGUAL_DICTIONARIES = [x for x in DICTIONARY_LOOKUP if 'diki' not in x]
 
 class _Cache:
     def __init__(self) -> None:
-        self._path = os.path.join(DATA_DIR, f'dictionary_cache.{MAGIC}')
-        self._db: db_t | None = None
+        self._path = os.path.join(DATA_DIR, 'dictionary_cache.sqlite3')
+        self._db: DictionaryCache | None = None
 
-    def _open_shelf(self) -> shelve.DbfilenameShelf[Dictionary] | None:
+    def _open_file(self) -> tuple[DictionaryCache | None, str | None]:
         try:
-            # We use features from the 4th protocol at max.
-            return shelve.DbfilenameShelf(self._path, protocol=4)
-        except OSError:
-            return None
+            db = DictionaryCache(self._path, ttls=parse_ttls(getconf('cachettl')))
+        except ValueError as e:
+            return None, f'{e} (F2 Config)'
+        except sqlite3.Error as e:
+            return None, str(e)
+
+        # Entries cached by the older, shelve based, versions of the program.
+        db.import_shelf(os.path.join(DATA_DIR, f'dictionary_cache.{MAGIC}'))
+
+        return db, None
 
     def _save(self) -> None:
         if self._db is None:
             return
-        if isinstance(self._db, shelve.DbfilenameShelf):
-            self._db.close()
-        elif getconf('cachefile'):
-            dbfile = self._open_shelf()
+        if self._db.in_memory and getconf('cachefile'):
+            dbfile, _ = self._open_file()
             if dbfile is not None:
-                for key, dictionary in self._db.items():
-                    dbfile[key] = dictionary
-                dbfile.close()
+                self._db.copy_to(dbfile)
+                self._db.close()
+                self._db = dbfile
+
+        if not self._db.in_memory:
+            try:
+                self._db.evict(
+                    parse_limits(getconf('cachelimit')),
+                    getconf('cachepolicy')
+                )
+            except (ValueError, sqlite3.Error):
+                pass
+
+        self._db.close()
 
     @property
-    def db(self) -> tuple[db_t, bool]:
-        err = False
+    def db(self) -> tuple[DictionaryCache, str | None]:
+        err = None
         if self._db is None:
             if getconf('cachefile'):
-                dbfile = self._open_shelf()
-                if dbfile is None:
-                    err = True
-                    self._db = {}
-                else:
-                    self._db = dbfile
-            else:
-                self._db = {}
+                self._db, err = self._open_file()
+            if self._db is None:
+                self._db = DictionaryCache()
             atexit.register(self._save)
-        elif isinstance(self._db, dict) and getconf('cachefile'):
-            dbfile = self._open_shelf()
-            if dbfile is None:
-                err = True
-            else:
-                for key, dictionary in self._db.items():
-                    dbfile[key] = dictionary
+        elif self._db.in_memory and getconf('cachefile'):
+            dbfile, err = self._open_file()
+            if dbfile is not None:
+                self._db.copy_to(dbfile)
+                self._db.close()
                 self._db = dbfile
 
         return self._db, err
 
+    # Removes expired and excess entries, and rewrites the cache file.
+    # return: Size of the cache file before and after compaction.
+    def compact(self) -> tuple[int, int]:
+        db, err = self._open_file()
+        if db is None:
+            raise ValueError(err)
 
-_cache = _Cache()
-def _query(key: dictkey_t, query: str, db: db_t) -> Dictionary:
-    try:
-        return db[key + query]
-    except KeyError:
-        # Lookup might raise a DictionaryError or a ConnectionError.
-        # Invalid results will not be cached.
-        result = DICTIONARY_LOOKUP[key](query)
-        db[key + query] = result
-        return result
+        before = os.path.getsize(self._path)
+        try:
+            db.evict(parse_limits(getconf('cachelimit')), getconf('cachepolicy'))
+            db.compact()
+        finally:
+            db.close()
 
+        return before, os.path.getsize(self._path)
 
-def _query_thread(
-        key: dictkey_t,
-        query: str,
-        keyid: int,
-        success: dict[int, Dictionary],
-        error: dict[int, str],
-        db: db_t
-) -> None:
-    try:
-        success[keyid] = _query(key, query, db)
-    except (DictionaryError, ConnectionError) as e:
-        error[keyid] = str(e)
-
+    # Parses stored pages of entries made by older versions of the parsers
+    # again, see `_rebuild`.
+    def rebuild(self, progress: Callable[[int, int], None] | None = None) -> tuple[int, int]:
+        db, err = self._open_file()
+        if db is None:
+            raise ValueError(err)
 
-def perror_threaded_query(
-        status: StatusProto,
-        query: str,
-        keys: list[dictkey_t],
-        db: db_t
-) -> list[Dictionary] | None:
-    success: dict[int, Dictionary] = {}
-    error: dict[int, str] = {}
-    threads = []
-
-    for keyid, key in enumerate(keys):
         try:
-            success[keyid] = db[key + query]
-        except KeyError:
-            # I hope it's ok to make them daemonic. It simplifies the handling
-            # of SIGINT, but try-finally blocks don't run inside of urllib3.
-            t = threading.Thread(
-                target=_query_thread,
-                args=(key, query, keyid, success, error, db),
-                daemon=True
-            )
-            t.start()
-            threads.append(t)
+            return _rebuild(db, progress=progress)
+        finally:
+            db.close()
 
-    for t in threads:
-        t.join()
 
-    result = []
-    for keyid, _ in enumerate(keys):
-        if keyid in success:
-            result.append(success[keyid])
-        elif keyid in error:
-            status.error(error[keyid])
+_cache = _Cache()
+
+# Lookup result: a `Dictionary` or an error message.
+lookup_result_t = Union[Dictionary, str]
+
+
+class _NotModified(Exception):
+    pass
+
+
+# return: `url` with `fields`, as responses to it are stored.
+def _page_url(url: str, fields: Mapping[str, str] | None) -> str:
+    if fields:
+        url += '?' + urlencode(fields)
+    return url
+
+
+class _Responses:
+    # Pages of a single lookup. Pages stored in the cache are requested
+    # conditionally, new ones are kept in `self.received` until the lookup
+    # succeeds and its dictionary is stored.
+    def __init__(self, db: DictionaryCache, key: dictkey_t, query: str) -> None:
+        self.db = db
+        self.key = key
+        self.query = query
+        self.received: list[StoredResponse] = []
+        self.not_modified: Dictionary | None = None
+
+    async def fetch(self, url: str, fields: Mapping[str, str] | None = None) -> EncodedPage:
+        url = _page_url(url, fields)
+        stored = self.db.get_response(self.key, self.query, url)
+        headers = {}
+        if stored is not None:
+            if stored.etag is not None:
+                headers['If-None-Match'] = stored.etag
+            if stored.last_modified is not None:
+                headers['If-Modified-Since'] = stored.last_modified
+
+        response = await request_async(url, headers=headers)
+        if response.status == 304 and stored is not None:
+            # The page has not changed, neither has the dictionary parsed
+            # from it, unless it is gone or the parser changed (MAGIC).
+            self.not_modified = self.db.get(self.key, self.query, stale=True)
+            if self.not_modified is not None:
+                raise _NotModified
+            self.received.append(stored)
+            body, encoding = stored.body, stored.encoding
         else:
-            raise AssertionError('unreachable')
+            body = response.body
+            encoding = response.headers.get('content-encoding', 'identity')
+            if response.status == 200:
+                if encoding in ('', 'identity'):
+                    body, encoding = zlib.compress(body), 'deflate'
+                self.received.append(StoredResponse(
+                    url,
+                    response.headers.get('etag'),
+                    response.headers.get('last-modified'),
+                    encoding,
+                    body
+                ))
+
+        # Decompressed by the parser.
+        return EncodedPage(body, encoding)
+
+
+_parser_pool: ProcessPoolExecutor | None = None
+
+
+def _get_parser_pool() -> ProcessPoolExecutor:
+    global _parser_pool
+    if _parser_pool is None:
+        _parser_pool = ProcessPoolExecutor()
+        atexit.register(_parser_pool.shutdown)
+    return _parser_pool
+
+
+# Parsers read the config, e.g. AHD's 'toipa'. Workers keep the config of
+# the time they were started, every job brings the current one.
+def _parse_with_config(conf: config_t, key: dictkey_t, page: page_t, query: str) -> Dictionary:
+    config.update(conf)
+    return DICTIONARY_PARSERS[key](page, query)
+
+
+# Pages are requested here, as they are in `_lookup`, but parsed by worker
+# processes: parsing holds the GIL for long enough to stall the UI and other
+# lookups, which in workers can also be parsed in parallel. Workers get only
+# the page, once per lookup.
+async def _lookup_in_pool(key: dictkey_t, query: str, responses: _Responses) -> Dictionary:
+    page = await responses.fetch(*DICTIONARY_PAGES[key](query))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_parser_pool(), _parse_with_config, config.copy(), key, page, query
+    )
+
+
+async def _lookup(key: dictkey_t, query: str, responses: _Responses) -> Dictionary | Exception:
+    try:
+        if getconf('procparse'):
+            return await _lookup_in_pool(key, query, responses)
+        return await DICTIONARY_LOOKUP[key](query, responses.fetch)
+    except _NotModified:
+        assert responses.not_modified is not None
+        return responses.not_modified
+    except (DictionaryError, ConnectionError) as e:
+        return e
 
-    if not result:
-        return None
+
+async def _lookup_all(
+        lookups: list[_Responses],
+        on_done: Callable[[tuple[dictkey_t, str], Dictionary | Exception], None]
+) -> list[Dictionary | Exception]:
+    async def lookup(responses: _Responses) -> Dictionary | Exception:
+        result = await _lookup(responses.key, responses.query, responses)
+        on_done((responses.key, responses.query), result)
+        return result
+
+    return await asyncio.gather(*map(lookup, lookups))
+
+
+# return: Normalized headword if every phrase of `dictionary` is the same
+# headword, None otherwise.
+def _headword_of(key: dictkey_t, dictionary: Dictionary) -> str | None:
+    normalize = QUERY_NORMALIZERS[key]
+    headwords = {
+        normalize(op.phrase) for op in dictionary.contents if isinstance(op, PHRASE)
+    }
+    if len(headwords) == 1:
+        return headwords.pop()
+    return None
+
+
+# return: `dictionary` looked up with `query`, as if it was looked up with its
+# `headword`: without the notes parsers add when the phrase differs from the
+# query, and with diki's "(query) ->" notes naming the headword.
+def _as_headword(dictionary: Dictionary, query: str, headword: str) -> Dictionary:
+    result = Dictionary()
+    for op in dictionary.contents:
+        if isinstance(op, NOTE):
+            if op.note == 'Showing results for:':
+                continue
+            op = NOTE(op.note.replace(f'({query})', f'({headword})'))
+        result.add(op)
 
     return result
 
 
-class Query(NamedTuple):
-    query:       str
-    dict_flags:  list[dictkey_t]
-    query_flags: list[str]
+# `on_done` is called with every lookup from `lookups` as soon as its result
+# is known, on the calling thread. Lookups of queries in `refresh` skip the
+# cache, but pages that did not change are not downloaded and parsed again.
+def _lookup_concurrently(
+        lookups: Iterable[tuple[dictkey_t, str]],
+        db: DictionaryCache,
+        on_done: Callable[[tuple[dictkey_t, str], lookup_result_t], None] | None = None,
+        refresh: Container[str] = ()
+) -> dict[tuple[dictkey_t, str], lookup_result_t]:
+    canonical = {
+        (key, query): (key, QUERY_NORMALIZERS[key](query))
+        for key, query in lookups
+    }
+    lookups_of: dict[tuple[dictkey_t, str], list[tuple[dictkey_t, str]]] = {}
+    for lookup, canonical_lookup in canonical.items():
+        lookups_of.setdefault(canonical_lookup, []).append(lookup)
+
+    results: dict[tuple[dictkey_t, str], lookup_result_t] = {}
+    to_fetch = []
+
+    def done(
+            canonical_lookup: tuple[dictkey_t, str],
+            result: Dictionary | Exception | str
+    ) -> None:
+        if isinstance(result, Exception):
+            result = str(result)
+        results[canonical_lookup] = result
+        if on_done is not None:
+            for lookup in lookups_of[canonical_lookup]:
+                on_done(lookup, result)
+
+    # Equivalent (key, query) pairs are collapsed into a single request.
+    for (key, query), raw in lookups_of.items():
+        if any(q in refresh for _, q in raw):
+            to_fetch.append(_Responses(db, key, query))
+            continue
 
+        dictionary = db.get(key, query)
+        if dictionary is not None:
+            done((key, query), dictionary)
+            continue
 
-def perror_query(
-        status: StatusProto,
-        query: str,
-        key: dictkey_t,
-        db: db_t
-) -> list[Dictionary] | None:
+        not_found = db.get_not_found(key, query)
+        if not_found is not None:
+            done((key, query), not_found)
+        else:
+            to_fetch.append(_Responses(db, key, query))
+
+    # All lookups are made concurrently, see `aio`. On Ctrl-C, `asyncio.run()`
+    # cancels the pending ones.
+    fetched = asyncio.run(_lookup_all(to_fetch, done)) if to_fetch else []
+
+    # Of the errors, only "not found" is cached, connection and parsing
+    # errors might be gone with the next request.
+    for responses, result in zip(to_fetch, fetched):
+        key, query = responses.key, responses.query
+        if isinstance(result, Dictionary):
+            db.put(key, query, result)
+            for response in responses.received:
+                db.put_response(key, query, response)
+
+            # Derived forms, e.g. "ran", lead to the page of their headword,
+            # which then does not have to be requested when looked up. Entries
+            # of the headword itself are better than ours and are kept.
+            headword = _headword_of(key, result)
+            if headword is not None and headword != query:
+                db.put(key, headword, _as_headword(result, query, headword), replace=False)
+        elif isinstance(result, NotFoundError):
+            db.put_not_found(key, query, str(result))
+
+    return {x: results[canonical[x]] for x in canonical}
+
+
+# Runs the parser over stored pages, without making any requests.
+def _reparse(key: dictkey_t, query: str, pages: list[StoredResponse]) -> Dictionary | None:
     try:
-        return [_query(key, query, db)]
-    except (DictionaryError, ConnectionError) as e:
-        status.error(str(e))
+        url = _page_url(*DICTIONARY_PAGES[key](query))
+        for page in pages:
+            if page.url == url:
+                return DICTIONARY_PARSERS[key](EncodedPage(page.body, page.encoding), query)
+    except (DictionaryError, ConnectionError):
+        # Corrupted pages.
         return None
 
+    # Or pages of other requests.
+    return None
+
+
+# Number of entries whose pages are parsed or waiting to be parsed by
+# `_rebuild` at a time.
+REBUILD_BATCH = 64
+
+
+# Rebuilds entries made by older versions of the parsers (of other MAGIC)
+# from their stored pages, instead of downloading them again. Parsing is
+# CPU bound, pages are parsed in parallel by `executor`, a process pool by
+# default. `progress` is called with the numbers so far after every entry.
+# return: Number of rebuilt entries and of pages that failed to parse.
+def _rebuild(
+        db: DictionaryCache,
+        executor: Executor | None = None,
+        progress: Callable[[int, int], None] | None = None
+) -> tuple[int, int]:
+    rebuilt = failed = 0
+
+    def store(future: Future[Dictionary | None], key: dictkey_t, query: str) -> None:
+        nonlocal rebuilt, failed
+        dictionary = future.result()
+        if dictionary is None:
+            # Do not try again, the entry will be looked up when needed.
+            db.remove_pages(key, query)
+            failed += 1
+        else:
+            db.put(key, query, dictionary)
+            rebuilt += 1
+        if progress is not None:
+            progress(rebuilt, failed)
+
+    with executor or ProcessPoolExecutor() as pool:
+        # Only a batch of entries at a time, pages of the others stay on disk.
+        futures: dict[Future[Dictionary | None], tuple[dictkey_t, str]] = {}
+        for key, query, pages in db.stale_pages(REBUILD_BATCH):
+            futures[pool.submit(_reparse, key, query, pages)] = (key, query)
+            if len(futures) >= REBUILD_BATCH:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    store(future, *futures.pop(future))
 
-def perror_query_with_fallback(
-        status: StatusProto,
-        query: str,
-        key: dictkey_t,
-        fallback_key: dictkey_t,
-        db: db_t
-) -> list[Dictionary] | None:
-    result = perror_query(status, query, key, db)
-    if result is None:
-        result = perror_query(status, query, fallback_key, db)
+        for future in as_completed(futures):
+            store(future, *futures[future])
 
-    return result
+    return rebuilt, failed
+
+
+def compact_cache() -> tuple[int, int]:
+    return _cache.compact()
+
+
+def rebuild_cache(progress: Callable[[int, int], None] | None = None) -> tuple[int, int]:
+    return _cache.rebuild(progress)
+
+
+# Same as `diki.diki_audio`, but remembers the URLs it found and, for
+# a while, the phrases it found nothing for.
+def diki_audio(phrase: str, flag: str = '') -> str:
+    db, _ = _cache.db
+    # URLs of e.g. "-n" and "-v" differ.
+    source = f'diki{flag}'
+    url = db.get_audio_url(source, phrase)
+    if url is None:
+        try:
+            url = diki.diki_audio(phrase, flag)
+        except NotFoundError:
+            db.put_audio_url(source, phrase, '')
+            raise
+        db.put_audio_url(source, phrase, url)
+    elif not url:
+        raise NotFoundError(f'{diki.DICTIONARY}: no audio for {phrase!r}')
+
+    return url
+
+
+class Query(NamedTuple):
+    query:       str
+    dict_flags:  list[dictkey_t]
+    query_flags: list[str]
 
 
 def parse(s: str) -> list[Query] | None:
@@ -265,50 +581,116 @@ def parse(s: str) -> list[Query] | None:
     return result
 
 
+# If `progress` is given, it is notified about every dictionary as soon as it
+# is looked up and about lookups that are still pending.
 def search(
         status: StatusProto,
-        queries: list[Query]
+        queries: list[Query],
+        progress: SearchProgressProto | None = None
 ) -> list[list[Dictionary] | None]:
-    # TODO: Use threads for multiple queries like "a -c, b, c" etc.
-    #       We can do this by turning `perror_threaded_query()` into a
-    #       generator that yields just before `Thread.join()`, we can then
-    #       collect the return values of these generators here. Keep in mind
-    #       that we want to minimize the number of requests and handle
-    #       duplicate queries (or disallow them) so that we can avoid the race
-    #       condition when accessing the `_cache` in parallel.
-
     db, err = _cache.db
-    if err:
-        status.error(
-            'Cannot open cache file:',
-            'another instance of the program is using the cache'
-        )
-        status.attention('- you can switch to the other instance or')
-        status.attention('- close it and continue using this one, alternatively')
+    if err is not None:
+        status.error('Cannot open cache file:', err)
         status.attention('- disable the \'cachefile\' option in the F2 Config')
 
-    result = []
+    primary = getconf('primary')
+    fallback_key = getconf('secondary')
+
+    # Queries with the "-refresh" flag are looked up again, bypassing the
+    # cache.
+    refresh = {q.query for q in queries if 'refresh' in q.query_flags}
+
+    # Dictionaries to look up for every query. All lookups of a prompt line
+    # are made concurrently. If a query without dictionary flags fails in the
+    # primary dictionary, the secondary one is looked up in the second wave.
+    planned: list[list[dictkey_t]] = []
     for query, flags, _ in queries:
-        if len(flags) == 0:
-            fallback_key = getconf('secondary')
-            if fallback_key == '-':
-                result.append(perror_query(status, query, getconf('primary'), db))
-            else:
-                cached = []
-                for key in DICTIONARY_LOOKUP:
-                    try:
-                        cached.append(db[key + query])
-                    except KeyError:
-                        continue
-
-                result.append(
-                    cached or perror_query_with_fallback(
-                        status, query, getconf('primary'), fallback_key, db
-                    )
-                )
-        elif len(flags) == 1:
-            result.append(perror_query(status, query, flags.pop(), db))
+        if flags:
+            planned.append(flags)
+        elif fallback_key == '-' or query in refresh:
+            planned.append([primary])
         else:
-            result.append(perror_threaded_query(status, query, flags, db))
+            cached = [
+                key for key, normalize in QUERY_NORMALIZERS.items()
+                if (key, normalize(query)) in db
+            ]
+            if cached:
+                planned.append(cached)
+            elif db.get_not_found(primary, QUERY_NORMALIZERS[primary](query)) is not None:
+                # Known to be missing from the primary dictionary, go
+                # straight to the secondary one.
+                planned.append([primary, fallback_key])
+            else:
+                planned.append([primary])
+
+    # Where dictionaries of a lookup end up in the results.
+    slots: dict[tuple[dictkey_t, str], list[tuple[int, int]]] = {}
+    pending: dict[tuple[dictkey_t, str], None] = {}
+
+    def on_done(lookup: tuple[dictkey_t, str], result: lookup_result_t) -> None:
+        assert progress is not None
+        if isinstance(result, Dictionary):
+            for slot in slots[lookup]:
+                progress.result(slot, result)
+        pending.pop(lookup, None)
+        progress.pending(list(pending))
+
+    def plan(lookups: Iterable[tuple[int, int]]) -> list[tuple[dictkey_t, str]]:
+        result = []
+        for qi, ki in lookups:
+            lookup = (planned[qi][ki], queries[qi].query)
+            slots.setdefault(lookup, []).append((qi, ki))
+            pending[lookup] = None
+            result.append(lookup)
+        return result
 
-    return result
+    results = _lookup_concurrently(
+        plan((qi, ki) for qi, keys in enumerate(planned) for ki in range(len(keys))),
+        db,
+        None if progress is None else on_done,
+        refresh
+    )
+
+    if fallback_key != '-':
+        fallbacks = []
+        for qi, (q, keys) in enumerate(zip(queries, planned)):
+            if (
+                    not q.dict_flags
+                and keys == [primary]
+                and isinstance(results[primary, q.query], str)
+            ):
+                keys.append(fallback_key)
+                fallbacks.append((qi, 1))
+
+        slots.clear()
+        lookups = []
+        for lookup in dict.fromkeys(plan(fallbacks)):
+            if lookup in results:
+                # Already looked up in the first wave.
+                if progress is not None:
+                    on_done(lookup, results[lookup])
+            else:
+                lookups.append(lookup)
+
+        results.update(
+            _lookup_concurrently(
+                lookups,
+                db,
+                None if progress is None else on_done,
+                refresh
+            )
+        )
+
+    ret: list[list[Dictionary] | None] = []
+    for q, keys in zip(queries, planned):
+        dictionaries = []
+        for key in keys:
+            result = results[key, q.query]
+            if isinstance(result, Dictionary):
+                dictionaries.append(result)
+            else:
+                status.error(result)
+
+        ret.append(dictionaries or None)
+
+    return ret
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# Compares pickle with src.Dictionaries.codec on entries of a dictionary
+# cache, by default the cache of the current user.
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import sys
+import time
+from typing import Callable
+from typing import Sequence
+from typing import TypeVar
+
+if os.path.basename(sys.path[0]) == 'testing':
+    sys.path[0] = os.path.dirname(sys.path[0])
+
+from src.data import DATA_DIR
+from src.Dictionaries import codec
+from src.Dictionaries.base import Dictionary
+
+T = TypeVar('T')
+U = TypeVar('U')
+
+
+def load_corpus(path: str) -> list[Dictionary]:
+    # Opened read-only, so that no migrations are applied.
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute('SELECT data FROM dictionaries').fetchall()
+    finally:
+        conn.close()
+
+    result = []
+    for data, in rows:
+        try:
+            result.append(codec.loads(data))
+        except codec.CodecError:
+            pass
+
+    return result
+
+
+def timeit(f: Callable[[T], U], items: Sequence[T], repeat: int) -> tuple[float, list[U]]:
+    best = float('inf')
+    result: list[U] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = [f(x) for x in items]
+        best = min(best, time.perf_counter() - t0)
+
+    return best, result
+
+
+def main(args: argparse.Namespace) -> int:
+    corpus = load_corpus(args.file)
+    if not corpus:
+        print(f'{args.file!r} has no entries', file=sys.stderr)
+        return 1
+
+    print(f'{len(corpus)} entries, best of {args.repeat}\n')
+    print(f'{"":8}{"size":>12}{"dumps":>12}{"loads":>12}')
+    for name, dumps, loads in (
+            ('pickle', lambda x: pickle.dumps(x, protocol=4), pickle.loads),
+            ('codec', codec.dumps, codec.loads),
+    ):
+        dumps_t, blobs = timeit(dumps, corpus, args.repeat)
+        loads_t, _ = timeit(loads, blobs, args.repeat)
+        size = sum(map(len, blobs))
+        print(
+            f'{name:8}{size / 1024:>8.0f} KiB'
+            f'{dumps_t * 1000:>9.1f} ms'
+            f'{loads_t * 1000:>9.1f} ms'
+        )
+
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'file',
+        nargs='?',
+        default=os.path.join(DATA_DIR, 'dictionary_cache.sqlite3'),
+        help='dictionary cache database (default: the cache of the current user)'
+    )
+    parser.add_argument(
+        '--repeat',
+        '-n',
+        type=int,
+        default=5,
+        help='number of timed runs (default: 5)'
+    )
+    raise SystemExit(main(parser.parse_args()))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# Times the Collins parser on pages stored in a dictionary cache, by default
+# the cache of the current user, or on saved HTML files. If BeautifulSoup is
+# installed, also times building its tree of the same pages, which the
+# parser used to do before anything else, and compares import times.
+from __future__ import annotations
+
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+from typing import Callable
+from typing import Sequence
+
+if os.path.basename(sys.path[0]) == 'testing':
+    sys.path[0] = os.path.dirname(sys.path[0])
+
+from src.data import DATA_DIR
+from src.Dictionaries import collins
+from src.Dictionaries.base import DictionaryError
+from src.Dictionaries.util import EncodedPage
+from src.Dictionaries.util import read_page
+
+
+def load_pages(args: argparse.Namespace) -> list[tuple[str, bytes]]:
+    if args.html:
+        result = []
+        for path in args.html:
+            with open(path, 'rb') as f:
+                result.append((os.path.splitext(os.path.basename(path))[0], f.read()))
+        return result
+
+    # Opened read-only, so that no migrations are applied.
+    conn = sqlite3.connect(f'file:{args.file}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(
+            "SELECT query, encoding, body FROM responses WHERE dictkey = 'collins'"
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        (query, read_page(EncodedPage(body, encoding)))
+        for query, encoding, body in rows
+    ]
+
+
+def best_of(f: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+# Cumulative time of importing `module` in a new interpreter, after
+# the modules in `after` are imported.
+def import_time(module: str, after: Sequence[str] = ()) -> float:
+    code = '; '.join(f'import {x}' for x in (*after, module))
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True, text=True, check=True
+    ).stderr
+    for line in reversed(output.splitlines()):
+        _, cumulative, name = line.split('|')
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+    raise ValueError(f'no import time of {module!r}')
+
+
+def parse(pages: Sequence[tuple[str, bytes]]) -> int:
+    ops = 0
+    for lookup, html in pages:
+        try:
+            ops += len(collins.create_dictionary(html, lookup).contents)
+        except DictionaryError:
+            pass
+    return ops
+
+
+def main(args: argparse.Namespace) -> int:
+    pages = load_pages(args)
+    if not pages:
+        print('no Collins pages, look up some words first', file=sys.stderr)
+        return 1
+
+    size = sum(len(x) for _, x in pages)
+    print(f'{len(pages)} pages ({size / 1024:.0f} KiB), best of {args.repeat}\n')
+
+    t = best_of(lambda: parse(pages), args.repeat)
+    print(f'{"lxml parser":24}{t * 1000:>9.1f} ms  ({parse(pages)} ops)')
+
+    try:
+        from bs4 import BeautifulSoup
+    except ImportError:
+        print('bs4 is not installed, nothing to compare with')
+        return 0
+
+    t = best_of(
+        lambda: [BeautifulSoup(html.decode(), 'lxml') for _, html in pages],
+        args.repeat
+    )
+    print(f'{"bs4 tree only":24}{t * 1000:>9.1f} ms')
+
+    print()
+    t = import_time('src.Dictionaries.collins')
+    print(f'{"import collins":24}{t * 1000:>9.1f} ms')
+    # What the first lookup used to cost on top of that.
+    t = import_time('bs4', after=['src.Dictionaries.collins'])
+    print(f'{"import bs4 afterwards":24}{t * 1000:>9.1f} ms')
+
+    return 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        'file',
+        nargs='?',
+        default=os.path.join(DATA_DIR, 'dictionary_cache.sqlite3'),
+        help='dictionary cache database (default: the cache of the current user)'
+    )
+    parser.add_argument(
+        '--html',
+        nargs='+',
+        metavar='PAGE',
+        help='saved Collins pages to use instead of the cache, '
+             'named after the query they were looked up with'
+    )
+    parser.add_argument(
+        '--repeat',
+        '-n',
+        type=int,
+        default=5,
+        help='number of timed runs (default: 5)'
+    )
+    raise SystemExit(main(parser.parse_args()))
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# Times the dictionary parsers on recorded pages, by default those in
+# testing/pages, <dictionary key>/<query>.html with spaces in the query
+# written as '_'. Pages stored in a dictionary cache can be used instead.
+#
+# Lookups run as they do in the program, but `fetch` is a stand-in that
+# returns the page instead of requesting it. Reported per page: the time of
+# the lookup and of building the HTML tree alone, the number of ops produced,
+# the peak and retained Python memory during the lookup (tracemalloc, the
+# tree built by libxml2 is not included) and the number of memory blocks
+# retained, i.e. allocations made for the result.
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+import time
+import tracemalloc
+from typing import Awaitable
+from typing import Callable
+from typing import cast
+from typing import Mapping
+from typing import NamedTuple
+from typing import TypeVar
+
+if os.path.basename(sys.path[0]) == 'testing':
+    sys.path[0] = os.path.dirname(sys.path[0])
+
+from src.data import DATA_DIR
+from src.data import dictkey_t
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import DictionaryError
+from src.Dictionaries.util import EncodedPage
+from src.Dictionaries.util import page_t
+from src.Dictionaries.util import parse_response
+from src.search import DICTIONARY_LOOKUP
+
+T = TypeVar('T')
+
+PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages')
+
+
+class Page(NamedTuple):
+    key: dictkey_t
+    query: str
+    page: page_t
+
+    def size(self) -> int:
+        return len(self.page) if isinstance(self.page, bytes) else len(self.page.body)
+
+
+class Result(NamedTuple):
+    lookup_t: float
+    tree_t: float
+    ops: int
+    peak: int
+    kept: int
+    blocks: int
+
+
+def load_recorded(path: str) -> list[Page]:
+    result = []
+    for key in sorted(os.listdir(path)):
+        if key not in DICTIONARY_LOOKUP:
+            continue
+        for name in sorted(os.listdir(os.path.join(path, key))):
+            query, ext = os.path.splitext(name)
+            if ext == '.html':
+                with open(os.path.join(path, key, name), 'rb') as f:
+                    result.append(
+                        Page(cast(dictkey_t, key), query.replace('_', ' '), f.read())
+                    )
+
+    return result
+
+
+def load_stored(path: str) -> list[Page]:
+    # Opened read-only, so that no migrations are applied.
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        rows = conn.execute(
+            'SELECT dictkey, query, encoding, body FROM responses ORDER BY dictkey, query'
+        ).fetchall()
+    finally:
+        conn.close()
+
+    return [
+        Page(cast(dictkey_t, key), query, EncodedPage(body, encoding))
+        for key, query, encoding, body in rows
+        if key in DICTIONARY_LOOKUP
+    ]
+
+
+# Runs a coroutine that never waits, which is what lookups with the
+# stand-in `fetch` are, without the overhead of an event loop.
+def run_now(aw: Awaitable[T]) -> T:
+    it = aw.__await__()
+    try:
+        next(it)
+    except StopIteration as e:
+        return e.value  # type: ignore[no-any-return]
+    raise RuntimeError('the lookup is waiting for something')
+
+
+def lookup(page: Page) -> Dictionary:
+    async def fetch(url: str, fields: Mapping[str, str] | None = None) -> page_t:
+        return page.page
+
+    return run_now(DICTIONARY_LOOKUP[page.key](page.query, fetch))
+
+
+def best_of(f: Callable[[], object], repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def measure(page: Page, repeat: int) -> Result:
+    # Warm up, the first lookup fills caches of e.g. the config.
+    lookup(page)
+
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        dictionary = lookup(page)
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    blocks = sys.getallocatedblocks() - blocks
+
+    return Result(
+        best_of(lambda: lookup(page), repeat),
+        best_of(lambda: parse_response(page.page), repeat),
+        len(dictionary.contents),
+        peak - before,
+        after - before,
+        blocks,
+    )
+
+
+def main(args: argparse.Namespace) -> int:
+    if args.cache is None:
+        pages = load_recorded(args.pages)
+    else:
+        pages = load_stored(args.cache)
+    if args.dictionary:
+        pages = [x for x in pages if x.key in args.dictionary]
+    if not pages:
+        print('no pages', file=sys.stderr)
+        return 1
+
+    print(f'best of {args.repeat}, memory in KiB\n')
+    print(
+        f'{"":10}{"query":20}{"size":>6}{"lookup":>11}{"tree":>11}'
+        f'{"ops":>6}{"peak":>7}{"kept":>7}{"blocks":>8}'
+    )
+    failed = 0
+    for page in pages:
+        try:
+            r = measure(page, args.repeat)
+        except DictionaryError as e:
+            print(f'{page.key:10}{page.query[:19]:20}{e}')
+            failed += 1
+            continue
+
+        print(
+            f'{page.key:10}{page.query[:19]:20}{page.size() / 1024:>6.0f}'
+            f'{r.lookup_t * 1000:>8.2f} ms{r.tree_t * 1000:>8.2f} ms'
+            f'{r.ops:>6}{r.peak / 1024:>7.0f}{r.kept / 1024:>7.0f}{r.blocks:>8}'
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        'pages',
+        nargs='?',
+        default=PAGES_DIR,
+        help='directory with recorded pages (default: testing/pages)'
+    )
+    source.add_argument(
+        '--cache',
+        nargs='?',
+        const=os.path.join(DATA_DIR, 'dictionary_cache.sqlite3'),
+        metavar='FILE',
+        help='use pages stored in a dictionary cache instead '
+             '(default: the cache of the current user)'
+    )
+    parser.add_argument(
+        '--dictionary',
+        '-d',
+        action='append',
+        choices=sorted(DICTIONARY_LOOKUP),
+        help='time only this dictionary, can be given more than once'
+    )
+    parser.add_argument(
+        '--repeat',
+        '-n',
+        type=int,
+        default=5,
+        help='number of timed runs (default: 5)'
+    )
+    raise SystemExit(main(parser.parse_args()))
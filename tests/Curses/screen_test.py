@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import curses
+from typing import Any
+
+import pytest
+
+import src.Curses.screen as screen
+from src.Curses.color import Color
+from src.Curses.screen import format_dictionary
+from src.Curses.screen import LazyColumn
+from src.Curses.screen import ReflowCache
+from src.Curses.screen import Screen
+from src.Curses.util import Attr
+from src.Curses.util import attr_runs
+from src.data import config
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.base import SYN
+
+stdscr = curses.initscr()
+curses.start_color()
+Color.refresh(config)
+
+
+def make_dictionary(ndefinitions: int) -> Dictionary:
+    d = Dictionary()
+    d.add(HEADER('Test'))
+    d.add(PHRASE('run', 'rʌn'))
+    d.add(LABEL('verb', 'ran, run, running'))
+    for i in range(ndefinitions):
+        d.add(DEF(
+            f'definition {i} ' + 'of a few words ' * (i % 5),
+            [f'example {i}'] * (i % 3),
+            'label' if i % 4 else '',
+            bool(i % 2)
+        ))
+    d.add(SYN('sprint, dash', 'move fast', ['synonym example']))
+    return d
+
+
+@pytest.mark.parametrize('width', [10, 30, 80])
+def test_format_dictionary_memo(width):
+    d = make_dictionary(20)
+    memo: dict[int, list[screen.FLine]] = {}
+
+    expected = format_dictionary(d, width)
+    assert format_dictionary(d, width, memo) == expected
+    assert sorted(memo) == list(range(len(d.contents)))
+    # Wrapped only once.
+    assert format_dictionary(d, width, memo) == expected
+    assert all(memo[x.op_i] for x in expected)
+
+
+def test_lazy_column_formats_lines_as_needed(monkeypatch):
+    monkeypatch.setattr(screen, 'LAYOUT_LOOKAHEAD', 5)
+    d = make_dictionary(200)
+    expected = format_dictionary(d, 40)
+    memo: dict[int, list[screen.FLine]] = {}
+    column = LazyColumn(d, 40, memo)
+
+    assert column[10] == expected[10]
+    assert 16 <= sum(map(len, memo.values())) < 30
+    with pytest.raises(IndexError):
+        column[len(expected)]
+    assert list(column) == expected
+    assert len(column) == len(expected)
+    assert column[-1] == expected[-1]
+
+
+def test_screen_lays_out_long_entries_lazily(monkeypatch):
+    monkeypatch.setattr(curses, 'COLS', 80)
+    monkeypatch.setattr(curses, 'LINES', 24)
+    s = Screen(stdscr, make_dictionary(1000))
+    s.draw()
+    s.dispatch(b'v')
+    for _ in range(10):
+        s.dispatch(b'j')
+
+    column, = s.columns
+    assert isinstance(column, LazyColumn)
+    assert len(column._lines) < 24 + 2*screen.LAYOUT_LOOKAHEAD
+    assert s.cursor.cur() == 3 + 10
+
+    s.dispatch(b'G')
+    assert s.cursor.cur() == len(s.selector.dictionary.contents) - 1
+    assert s._scroll == len(column) - s.page_height
+
+
+def test_reflow_cache_remembers_recent_widths(monkeypatch):
+    monkeypatch.setattr(screen, 'REFLOW_WIDTHS', 2)
+    reflow = ReflowCache()
+
+    memo = reflow.lines_for(40)
+    memo[0] = []
+    assert reflow.lines_for(50) == {}
+    assert reflow.lines_for(40) is memo
+    # 50 is the least recently used one.
+    reflow.lines_for(60)
+    assert reflow.lines_for(40) is memo
+    assert reflow.lines_for(50) == {}
+    reflow.lines_for(70)
+    assert reflow.lines_for(40) == {}
+
+
+def test_reflow_cache_is_cleared_when_colors_change():
+    reflow = ReflowCache()
+    memo = reflow.lines_for(40)
+    memo[0] = []
+
+    Color.refresh(config)
+    assert reflow.lines_for(40) == {}
+
+
+def test_screen_resize_reuses_lines(monkeypatch):
+    cols = curses.COLS
+    s = Screen(stdscr, make_dictionary(40))
+    columns = [list(x) for x in s.columns]
+    assert not s.needs_resize()
+
+    wrapped = []
+    format_op = screen._format_op
+
+    def record(dest: list[screen.FLine], i: int, *args: Any) -> None:
+        wrapped.append(i)
+        format_op(dest, i, *args)
+
+    monkeypatch.setattr(screen, '_format_op', record)
+
+    monkeypatch.setattr(curses, 'COLS', cols + 20)
+    assert s.needs_resize()
+    s.resize()
+    assert not s.needs_resize()
+    for column in s.columns:
+        list(column)
+    assert sorted(wrapped) == list(range(len(s.selector.dictionary.contents)))
+
+    # Back to the previous width.
+    wrapped.clear()
+    monkeypatch.setattr(curses, 'COLS', cols)
+    s.resize()
+    assert [list(x) for x in s.columns] == columns
+    assert wrapped == []
+
+
+def window_cells(win: curses.window) -> list[list[int]]:
+    height, width = win.getmaxyx()
+    return [[win.inch(y, x) for x in range(width - 1)] for y in range(height)]
+
+
+@pytest.mark.parametrize('cols', [80, 200])
+def test_screen_draws_only_what_changed(monkeypatch, cols):
+    monkeypatch.setattr(curses, 'COLS', cols)
+    monkeypatch.setattr(curses, 'LINES', 30)
+    incremental_win = curses.newwin(30, cols)
+    full_win = curses.newwin(30, cols)
+    d = make_dictionary(60)
+    incremental = Screen(incremental_win, d)
+    full = Screen(full_win, d)
+
+    def check() -> int:
+        incremental.draw()
+        full_win.erase()
+        full.damage_all()
+        full.draw()
+        assert window_cells(incremental_win) == window_cells(full_win)
+        return incremental.curses_calls
+
+    assert check() == full.curses_calls
+    assert check() == 0
+
+    incremental.dispatch(b'v')
+    full.dispatch(b'v')
+    check()
+    for key in (b'j', b's', b'l', b'k', b'd'):
+        incremental.dispatch(key)
+        full.dispatch(key)
+        # Two entries at most.
+        assert check() < full.curses_calls / 2
+
+    for key in (b'J', b'KEY_NPAGE', b'G', b'v', b'g'):
+        incremental.dispatch(key)
+        full.dispatch(key)
+        check()
+
+    for s in (incremental, full):
+        s.hlsearch('few')
+    check()
+    for s in (incremental, full):
+        s.hl_clear()
+    check()
+
+
+def test_redrawn_lines_of_wide_characters(monkeypatch):
+    monkeypatch.setattr(curses, 'COLS', 40)
+    monkeypatch.setattr(curses, 'LINES', 10)
+    incremental_win = curses.newwin(10, 40)
+    full_win = curses.newwin(10, 40)
+    d = Dictionary()
+    d.add(HEADER('Test'))
+    d.add(PHRASE('日本語', ''))
+    d.add(DEF('にほんご', [], '', False))
+    incremental = Screen(incremental_win, d)
+    full = Screen(full_win, d)
+    incremental.draw()
+
+    for key in (b'v', b'j'):
+        incremental.dispatch(key)
+        full.dispatch(key)
+    incremental.draw()
+    full.draw()
+    assert window_cells(incremental_win) == window_cells(full_win)
+
+
+@pytest.mark.parametrize(('text', 'attrs', 'expected'), [
+    ('', [], []),
+    ('abc', [], [(0, 'abc', 0)]),
+    ('>1 def', [Attr(0, 1, 1), Attr(1, 1, 2), Attr(2, 1, 0), Attr(3, 3, 4)], [
+        (0, '>', 1), (1, '1', 2), (2, ' ', 0), (3, 'def', 4),
+    ]),
+    # Equal neighbours are merged, uncolored characters get no attributes.
+    ('  abc def', [Attr(2, 3, 4), Attr(5, 1, 4), Attr(6, 3, 4)], [
+        (0, '  ', 0), (2, 'abc def', 4),
+    ]),
+    # Later attributes win, as with chgat().
+    ('abc def', [Attr(0, 7, 4), Attr(4, 2, 8)], [
+        (0, 'abc ', 4), (4, 'de', 8), (6, 'f', 4),
+    ]),
+    ('ab', [Attr(1, 3, 4), Attr(0, 0, 8)], [(0, 'a', 0), (1, 'b  ', 4)]),
+])
+def test_attr_runs(text, attrs, expected):
+    assert attr_runs(text, attrs) == expected
+
+
+def test_runs_after_wide_characters_start_at_their_cells(monkeypatch):
+    monkeypatch.setattr(curses, 'COLS', 40)
+    monkeypatch.setattr(curses, 'LINES', 10)
+    win = curses.newwin(10, 40)
+    d = Dictionary()
+    d.add(HEADER('Test'))
+    d.add(PHRASE('abc', ''))
+    d.add(PHRASE('日本語', 'xyz'))
+    d.add(DEF('definition', [], '', False))
+    Screen(win, d).draw()
+
+    # Characters of the cells of a line, wide ones are left out.
+    def line(y: int) -> str:
+        cells = (win.inch(y, x) & curses.A_CHARTEXT for x in range(39))
+        return ''.join(chr(c) if c < 0x80 else '?' for c in cells)
+
+    lines = [line(y) for y in range(10)]
+    start = next(x.index('abc') for x in lines if 'abc' in x)
+    # Three characters of two cells each, then a change of color.
+    assert any(x[start + 6:start + 11] == '  xyz' for x in lines)
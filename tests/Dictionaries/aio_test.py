@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import threading
+from typing import Awaitable
+from typing import Callable
+from typing import Mapping
+from typing import TypeVar
+
+import pytest
+
+import src.Dictionaries.aio as aio
+import src.Dictionaries.util as util
+from src.Dictionaries.aio import try_request_async
+
+T = TypeVar('T')
+
+RESPONSES = {
+    b'/plain': b'HTTP/1.1 200 OK\r\nContent-Length: 5\r\n\r\nplain',
+    b'/chunked': (
+        b'HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n'
+        b'3\r\nchu\r\n4;ext=1\r\nnked\r\n0\r\n\r\n'
+    ),
+    b'/gzip': (
+        b'HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\n\r\n' + gzip.compress(b'gzip')
+    ),
+    b'/redirect': b'HTTP/1.1 302 Found\r\nLocation: /plain\r\nContent-Length: 0\r\n\r\n',
+    b'/loop': b'HTTP/1.1 301 Moved\r\nLocation: /loop\r\nContent-Length: 0\r\n\r\n',
+    b'/garbage': b'garbage\r\n\r\n',
+    b'/cached': b'HTTP/1.1 304 Not Modified\r\nETag: "v1"\r\n\r\n',
+}
+
+
+@pytest.fixture(autouse=True)
+def pool(monkeypatch):
+    # Every test gets its own connections, retries are not waited for.
+    monkeypatch.setattr(util, 'BACKOFF_FACTOR', 0)
+    monkeypatch.setattr(util, 'http', util.make_pool_manager())
+
+
+# `responses` override RESPONSES, a list is a response for every request.
+def run_with_server(
+        coro_fn: Callable[[str], Awaitable[T]],
+        delay: float = 0.0,
+        responses: Mapping[bytes, bytes | list[bytes]] | None = None
+) -> tuple[T, list[bytes], int]:
+    requests: list[bytes] = []
+    active = [0, 0]  # current, max
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        active[0] += 1
+        active[1] = max(active)
+        request_line = await reader.readline()
+        while (await reader.readline()).strip():
+            pass
+
+        _, target, _ = request_line.split()
+        requests.append(target)
+        await asyncio.sleep(delay)
+        path = target.partition(b'?')[0]
+        response = {**RESPONSES, **(responses or {})}.get(path, RESPONSES[b'/plain'])
+        if isinstance(response, list):
+            response = response.pop(0)
+        writer.write(response)
+        await writer.drain()
+        writer.close()
+        active[0] -= 1
+
+    async def main() -> T:
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await coro_fn(f'http://127.0.0.1:{port}')
+
+    return asyncio.run(main()), requests, active[1]
+
+
+@pytest.mark.parametrize(('path', 'expected'), [
+    ('/plain', b'plain'),
+    ('/chunked', b'chunked'),
+    ('/gzip', b'gzip'),
+    ('/redirect', b'plain'),
+])
+def test_try_request_async(path, expected):
+    result, _, _ = run_with_server(lambda url: try_request_async(url + path))
+    assert result == expected
+
+
+def test_try_request_async_encodes_url():
+    _, requests, _ = run_with_server(
+        lambda url: try_request_async(url + '/break the ice', {'q': 'a b+ż'})
+    )
+    assert requests == [b'/break%20the%20ice?q=a+b%2B%C5%BC']
+
+
+@pytest.mark.parametrize('path', ['/loop', '/garbage'])
+def test_try_request_async_errors(path):
+    with pytest.raises(ConnectionError):
+        run_with_server(lambda url: try_request_async(url + path))
+
+
+def test_try_request_async_limits_concurrency_per_host(monkeypatch):
+    monkeypatch.setitem(util.HOST_POOL_MAXSIZE, '127.0.0.1', 2)
+
+    async def many(url):
+        return await asyncio.gather(*(try_request_async(url) for _ in range(6)))
+
+    result, requests, max_active = run_with_server(many, delay=0.05)
+    assert result == 6 * [b'plain']
+    assert len(requests) == 6
+    assert max_active == 2
+    stats, = util.pool_stats().values()
+    assert stats.requests == 6
+
+
+def test_try_request_async_retries_server_errors():
+    flaky = [
+        b'HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n',
+        RESPONSES[b'/plain'],
+    ]
+    result, requests, _ = run_with_server(
+        lambda url: try_request_async(url + '/flaky'), responses={b'/flaky': flaky}
+    )
+    assert result == b'plain'
+    assert requests == [b'/flaky', b'/flaky']
+
+
+def test_cancelled_requests_do_not_block_exit(monkeypatch):
+    release = threading.Event()
+    threads = []
+
+    def stuck(*args):
+        threads.append(threading.current_thread())
+        release.wait(5)
+        return aio.Response(200, {}, b'late')
+
+    monkeypatch.setattr(aio, '_urlopen', stuck)
+
+    async def cancelled() -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(try_request_async('http://127.0.0.1/stuck'), 0.05)
+
+    try:
+        asyncio.run(cancelled())
+        thread, = threads
+        assert thread.is_alive()
+        # Not joined at the exit of the interpreter.
+        assert thread.daemon
+    finally:
+        release.set()
+    thread.join(5)
+    assert not thread.is_alive()
+
+
+def test_head_async():
+    result, requests, _ = run_with_server(lambda url: aio.head_async(url + '/redirect'))
+    assert result == 200
+    assert requests == [b'/redirect', b'/plain']
+
+
+def test_request_async_sends_headers_and_keeps_the_body():
+    result, _, _ = run_with_server(
+        lambda url: aio.request_async(url + '/cached', headers={'If-None-Match': '"v1"'})
+    )
+    assert result == aio.Response(304, {'etag': '"v1"'}, b'')
+
+    result, _, _ = run_with_server(lambda url: aio.request_async(url + '/gzip'))
+    assert aio.decode_body(result.body, result.headers['content-encoding']) == b'gzip'
+
+
+def test_requests_reuse_connections():
+    connections = []
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connections.append(writer)
+        while await reader.readline():
+            while (await reader.readline()).strip():
+                pass
+            writer.write(RESPONSES[b'/plain'])
+            await writer.drain()
+        writer.close()
+
+    async def main() -> list[bytes]:
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            url = f'http://127.0.0.1:{port}/plain'
+            return [await try_request_async(url) for _ in range(3)]
+
+    assert asyncio.run(main()) == 3 * [b'plain']
+    assert len(connections) == 1
@@ -100,3 +100,27 @@ def test_dump_selection():
     assert e.dump_selection(respect_phrase_boundaries=False) == [
         DictionarySelection(audio_two, [def_three, def_four], etym_two, phrase_two, pos_two, [])
     ]
+
+
+def test_on_select():
+    d = Dictionary()
+    d.add(HEADER('test'))
+    d.add(PHRASE('1', ''))
+    d.add(DEF('1', [], '', subdef=False))
+    d.add(DEF('2', [], '', subdef=False))
+    d.add(PHRASE('2', ''))
+    d.add(DEF('3', [], '', subdef=False))
+
+    selected: list[int] = []
+    e = EntrySelector(d, on_select=selected.append)
+    e.toggle_index(2)
+    e.toggle_index(3)
+    assert selected == [1]
+
+    e.toggle_index(5)
+    assert selected == [1, 4]
+
+    e.toggle_index(2)
+    e.toggle_index(3)
+    e.toggle_index(2)
+    assert selected == [1, 4, 1]
@@ -0,0 +1,62 @@
+import pytest
+
+from src.Dictionaries.base import AUDIO
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import ETYM
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.base import POS
+from src.Dictionaries.base import SYN
+from src.Dictionaries.codec import CodecError
+from src.Dictionaries.codec import dumps
+from src.Dictionaries.codec import loads
+
+
+def make_dictionary() -> Dictionary:
+    d = Dictionary()
+    d.add(HEADER('AH Dictionary'))
+    d.add(PHRASE('test', 'tĕst'))
+    d.add(AUDIO('https://example.com/test.wav'))
+    d.add(LABEL('n.', ''))
+    d.add(DEF('A procedure for critical evaluation.', ['a test of skill'], '', False))
+    d.add(DEF('A series of questions.', [], 'often tests', True))
+    d.add(POS([('test', ''), ('tests', 'tĕsts')]))
+    d.add(ETYM('Middle English, from Old French.'))
+    d.add(SYN('proof, trial', 'A means of determining.', ['ex. 1', 'ex. 2']))
+    d.add(NOTE('Zażółć gęślą jaźń'))
+    d.add(HEADER(''))
+    return d
+
+
+def test_round_trip():
+    d = make_dictionary()
+    assert loads(dumps(d)).contents == d.contents
+    assert loads(dumps(Dictionary())).contents == []
+
+
+def test_strings_are_interned():
+    d = Dictionary()
+    for _ in range(100):
+        d.add(LABEL('a long repeated label', 'a long repeated label'))
+
+    assert len(dumps(d)) < 400
+
+
+def test_wide_codes():
+    d = Dictionary()
+    d.add(DEF('x' * 70000, [str(i) for i in range(300)], '', False))
+    assert loads(dumps(d)).contents == d.contents
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'XYZ' + dumps(make_dictionary())[3:],
+    dumps(make_dictionary())[:-40],
+    dumps(make_dictionary())[:20],
+])
+def test_invalid_data(data):
+    with pytest.raises(CodecError):
+        loads(data)
@@ -0,0 +1,173 @@
+import gzip
+
+import pytest
+
+import src.Dictionaries.collins as collins
+from src.Dictionaries.base import AUDIO
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import ETYM
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.base import POS
+from src.Dictionaries.util import EncodedPage
+
+# Trimmed down page with the structure of Collins' pages, the expected ops
+# are those the BeautifulSoup based parser produced.
+PAGE = '''\
+<!DOCTYPE html>
+<html><head><title>run</title></head><body>
+<div class="dictionaries dictionary">
+<div class="dictionary Cob_Adv_Brit" data-type-block="definition.title.type.cobuild">
+ <div class="title_container"><h2 class="h2_entry"><span class="orth">run</span></h2></div>
+ <div class="mini_h2"><span class="pron type-">r<span class="ptr hwd_sound">ʌ</span>n <a class="hwd_sound sound" data-src-mp3="https://www.collinsdictionary.com/sounds/run.mp3">Pronunciation</a></span></div>
+ <div class="content definitions cobuild br">
+  <div class="hom">
+   <span class="gramGrp pos">verb</span>
+   <div class="sense"><span class="sensenum">1</span>
+    <div class="def">When you <b>run</b>, you move more quickly than when you walk.</div>
+    <div class="cit type-example"><span class="quote">I excused myself and ran back to the telephone.</span></div>
+    <div class="cit type-example"><span class="quote">She ran to the door.</span></div>
+    <div class="thes"><span class="lbl">Synonyms:</span> <a class="form ref">race</a>, <a class="form ref">rush</a>,
+     <span class="form">dash</span> <a class="moreSyn" href="#">More Synonyms of run</a></div>
+   </div>
+  </div>
+  <div class="hom">
+   <span class="gramGrp pos">noun</span>
+   <div class="sense"><span class="sensenum">2</span>
+    A run is a period of time spent running. <span class="lbl">[informal]</span>
+    <div class="cit type-example"><span class="quote">a six-mile run</span></div>
+   </div>
+  </div>
+  <div class="hom">
+   <span class="gramGrp"><span class="pos">phrase</span></span>
+   <div class="def">If something is <em>on the run</em>, it is escaping.</div>
+   <div class="cit type-example"><span class="quote">He is on the run.</span></div>
+  </div>
+  <div class="hom">
+   <span class="xr">See also <a class="ref">running</a></span>
+  </div>
+  <div class="hom">
+   <a class="xr ref">run-up</a>
+  </div>
+ </div>
+</div>
+<div class="dictionary Collins_Eng_Dict" data-type-block="definition.title.type.ced">
+ <div class="title_container"><span class="orth">Run</span></div>
+ <span class="pron">rʌn</span>
+ <div class="content definitions ced">
+  <div class="hom">
+   <span class="gramGrp pos">verb</span>
+   <div class="sense"><span class="sensenum">1</span>
+    <span class="gramGrp subc">(intransitive)</span>
+    <span class="lbl">(of a person)</span>
+    <div class="def">to move on foot at a rapid pace</div>
+    <div class="cit type-example quote">to run for a bus</div>
+   </div>
+   <div class="sense"><span class="sensenum">2</span>
+    <span class="lbl">informal</span>
+    <div class="def">to manage or be in charge of</div>
+   </div>
+   <div class="sense"><span class="sensenum">3</span>
+    <span class="lbl">(sport)</span>
+    <div class="sense"><span class="sensenum">a</span> to compete in a race</div>
+    <div class="sense"><span class="sensenum">b</span> to finish a race in a position</div>
+   </div>
+   <div class="sense"><span class="sensenum">4</span>
+    <span class="lbl">another word for</span> <span class="xr"><a class="ref">flee</a></span>
+   </div>
+   <div class="sense"><span class="sensenum">5</span>
+    <span class="gramGrp subc">(transitive)</span>
+    <span class="lbl">short for</span> <span class="xr">run up</span>
+   </div>
+   <div class="sense"><span class="sensenum">6</span> here be dragons</div>
+  </div>
+  <div class="hom">
+   <span class="gramGrp pos">noun</span>
+   <div class="type-idm">
+    <span class="orth">a run for one's money</span>
+    <div class="sense"><div class="def">a strong challenge</div></div>
+   </div>
+  </div>
+  <div class="hom">
+   <span class="gramGrp pos">idiom</span>
+   <span class="def">the run of something</span>
+   <div class="xr">see <a class="ref">mill</a></div>
+  </div>
+ </div>
+ <div class="derivs">
+  <span class="form type-drv"><span class="orth">runner</span> <span class="pos">noun</span></span>
+  <span class="form type-drv">jowly</span>
+ </div>
+ <div class="etyms"><div class="entry_title">Word origin</div>
+  Old English <span class="lang">rinnan</span>
+ </div>
+</div>
+<div class="dictionary Collins_Eng_Dict" data-type-block="definition.title.type.ced">
+ <span class="orth">runaway</span>
+ <span class="pron">ˈrʌnəˌweɪ <a class="hwd_sound" data-src-mp3="https://x/runaway.mp3">snd</a></span>
+ <div class="content definitions ced">
+  <div class="hom">
+   <div class="def">a person or animal that runs away</div>
+  </div>
+ </div>
+ <div class="etym"><div class="entry_title">Word origin</div> C14</div>
+</div>
+</div>
+</body></html>
+'''.encode()
+
+EXPECTED = [
+    HEADER(header='Collins'),
+    PHRASE(phrase='run', extra='/rʌn Pronunciation/'),
+    AUDIO(resource='https://www.collinsdictionary.com/sounds/run.mp3'),
+    LABEL(label='verb', extra=''),
+    DEF(definition='When you run, you move more quickly than when you walk. ~ race, rush, dash.', examples=['‘I excused myself and ran back to the telephone.’', '‘She ran to the door.’'], label='', subdef=False),
+    LABEL(label='noun', extra=''),
+    DEF(definition='2\n    A run is a period of time spent running. [informal]\na six-mile run', examples=['‘a six-mile run’'], label='', subdef=False),
+    LABEL(label='phrase', extra=''),
+    DEF(definition='If something is on the run, it is escaping.', examples=['‘He is on the run.’'], label='', subdef=False),
+    DEF(definition='See also running', examples=[], label='', subdef=True),
+    DEF(definition='run-up', examples=[], label='', subdef=True),
+    HEADER(header='Collins BrE Dictionary'),
+    NOTE(note='Showing results for:'),
+    PHRASE(phrase='Run', extra='/rʌn/'),
+    AUDIO(resource=''),
+    LABEL(label='verb', extra=''),
+    DEF(definition='(of a person) to move on foot at a rapid pace', examples=['‘to run for a bus’'], label='intransitive', subdef=False),
+    DEF(definition='to manage or be in charge of', examples=[], label='informal', subdef=False),
+    DEF(definition='to compete in a race', examples=[], label='sport', subdef=False),
+    DEF(definition='to finish a race in a position', examples=[], label='sport', subdef=True),
+    DEF(definition='flee', examples=[], label='another word for', subdef=True),
+    DEF(definition='short for run up', examples=[], label='transitive', subdef=True),
+    DEF(definition='6 here be dragons', examples=[], label='', subdef=True),
+    LABEL(label='noun', extra=''),
+    DEF(definition='a strong challenge', examples=[], label='', subdef=False),
+    LABEL(label='idiom', extra=''),
+    DEF(definition='the run of something', examples=[], label='', subdef=False),
+    DEF(definition='see mill', examples=[], label='', subdef=False),
+    POS(pos=[('runner', 'noun'), ('jowly', '')]),
+    ETYM(etymology='[Old English rinnan]'),
+    HEADER(header=''),
+    PHRASE(phrase='runaway', extra='/ˈrʌnəˌweɪ snd/'),
+    AUDIO(resource='https://x/runaway.mp3'),
+    LABEL(label='', extra=''),
+    DEF(definition='a person or animal that runs away', examples=[], label='', subdef=False),
+    ETYM(etymology='[C14]'),
+]
+
+
+def test_create_dictionary():
+    assert collins.create_dictionary(PAGE, 'run').contents == EXPECTED
+
+
+def test_create_dictionary_compressed_page():
+    page = EncodedPage(gzip.compress(PAGE), 'gzip')
+    assert collins.create_dictionary(page, 'run').contents == EXPECTED
+
+
+def test_not_found():
+    with pytest.raises(NotFoundError):
+        collins.create_dictionary(b'<html><body><p>nothing</p></body></html>', 'x')
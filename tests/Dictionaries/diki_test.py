@@ -1,6 +1,10 @@
+import asyncio
+
 import pytest
 
+import src.Dictionaries.diki as diki
 from src.Dictionaries.base import DictionaryError
+from src.Dictionaries.base import NotFoundError
 from src.Dictionaries.diki import diki_audio
 
 # British English pronunciation
@@ -73,3 +77,78 @@ def test_diki_incorrect_query(query, expected_exc_val):
 )
 def test_diki_with_flag(query, flag, expected):
     assert diki_audio(query, flag) == expected
+
+
+@pytest.mark.parametrize(
+    ('query', 'flag', 'expected'),
+    (
+        ('mince', '', [f'{gb}mince.mp3', f'{ame}mince.mp3']),
+        ('cast lots', '-v', [
+            f'{gb}cast_lots-v.mp3', f'{ame}cast_lots-v.mp3',
+            f'{gb}cast_lots.mp3', f'{ame}cast_lots.mp3',
+            f'{gb}cast_lot.mp3', f'{gb}cast.mp3',
+        ]),
+        ('account for', '', [
+            f'{gb}account_for.mp3', f'{ame}account_for.mp3',
+            f'{gb}account_for_somebody.mp3',
+        ]),
+    )
+)
+def test_audio_candidates(query, flag, expected):
+    assert diki._audio_candidates(query, flag) == expected
+
+
+@pytest.fixture
+def probes(monkeypatch):
+    found: set[str] = set()
+    probed = []
+
+    async def head_async(url):
+        probed.append(url)
+        # The most likely candidates are the slowest to respond.
+        await asyncio.sleep(0.01 if url.startswith(gb) else 0)
+        if url == 'error':
+            raise ConnectionError('connection error: no Internet connection?')
+        return 200 if url in found else 404
+
+    monkeypatch.setattr(diki, 'head_async', head_async)
+    return found, probed
+
+
+def test_diki_audio_prefers_likely_candidates(probes):
+    found, probed = probes
+    found.update((f'{ame}mince.mp3', f'{gb}mince.mp3'))
+    assert diki_audio('mince') == f'{gb}mince.mp3'
+    assert probed == [f'{gb}mince.mp3', f'{ame}mince.mp3']
+
+
+def test_diki_audio_probes_concurrently(probes):
+    found, probed = probes
+    found.update((f'{ame}cast_lots.mp3', f'{gb}cast.mp3'))
+    assert diki_audio('cast lots') == f'{ame}cast_lots.mp3'
+    assert len(probed) == 4
+
+
+def test_diki_audio_not_found(probes):
+    with pytest.raises(NotFoundError):
+        diki_audio('mince')
+
+
+def test_diki_audio_connection_error(probes, monkeypatch):
+    monkeypatch.setattr(diki, '_audio_candidates', lambda *a: ['error', f'{ame}x.mp3'])
+    with pytest.raises(ConnectionError):
+        diki_audio('x')
+
+
+
+def test_diki_audio_waits_for_cancelled_probes(probes):
+    found, _ = probes
+    found.add(f'{ame}x.mp3')
+
+    async def main() -> None:
+        urls = [f'{ame}x.mp3', 'error', f'{gb}x.mp3']
+        assert await diki._first_available(urls) == f'{ame}x.mp3'
+        # Probes that failed or were cancelled are not left behind.
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+
+    asyncio.run(main())
@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from src.Dictionaries.base import PHRASE
+from src.search import DICTIONARY_LOOKUP
+from src.search import DICTIONARY_PARSERS
+
+# Recorded pages of testing/parse_bench.py
+PAGES_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'testing', 'pages')
+
+PAGES = [
+    (key, name)
+    for key in sorted(os.listdir(PAGES_DIR))
+    for name in sorted(os.listdir(os.path.join(PAGES_DIR, key)))
+]
+
+
+def test_every_dictionary_has_pages():
+    assert {key for key, _ in PAGES} == set(DICTIONARY_LOOKUP)
+
+
+@pytest.mark.parametrize(('key', 'name'), PAGES)
+def test_recorded_pages_parse(key, name):
+    with open(os.path.join(PAGES_DIR, key, name), 'rb') as f:
+        page = f.read()
+
+    query = os.path.splitext(name)[0].replace('_', ' ')
+    dictionary = DICTIONARY_PARSERS[key](page, query)
+    phrases = [x.phrase.lower() for x in dictionary.contents if isinstance(x, PHRASE)]
+    assert any(x.startswith(query) for x in phrases)
@@ -0,0 +1,135 @@
+import gzip
+import importlib.util
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import src.Dictionaries.util as util
+from src.Dictionaries.util import EncodedPage
+
+PAGE = b'<html><body>' + b'<p>definition</p>' * 10000 + b'</body></html>'
+
+
+@pytest.fixture
+def server():
+    failures = {'/flaky': 2}
+    requests = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            requests.append(self.path)
+            headers = {}
+            if failures.get(self.path):
+                failures[self.path] -= 1
+                status, body = 503, b'unavailable'
+            elif self.path == '/gzip':
+                status, body = 200, gzip.compress(PAGE)
+                headers['Content-Encoding'] = 'gzip'
+            else:
+                status, body = 200, b'ok'
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{httpd.server_port}', requests
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(util, 'BACKOFF_FACTOR', 0)
+    return util.make_pool_manager()
+
+
+def test_connections_are_reused(server, manager):
+    url, _ = server
+    for _ in range(3):
+        assert manager.request('GET', url + '/').data == b'ok'
+
+    host = url[len('http://'):]
+    assert util.pool_stats(manager) == {host: util.PoolStats(requests=3, connections=1)}
+
+
+def test_server_errors_are_retried(server, manager):
+    url, requests = server
+    r = manager.request('GET', url + '/flaky')
+
+    assert r.status == 200
+    assert requests == 3 * ['/flaky']
+
+
+def test_host_pool_maxsize(server, monkeypatch):
+    url, _ = server
+    monkeypatch.setattr(util, 'HOST_POOL_MAXSIZE', {'127.0.0.1': 7})
+    manager = util.make_pool_manager()
+    manager.request('GET', url + '/')
+
+    pool, = (manager.pools.get(key) for key in manager.pools.keys())
+    assert pool is not None and pool.pool is not None
+    assert pool.pool.maxsize == 7
+    assert pool.block
+
+
+def test_try_request_leaves_the_page_compressed(server):
+    url, _ = server
+    page = util.try_request(url + '/gzip')
+
+    assert page.encoding == 'gzip'
+    assert util.read_page(page) == PAGE
+
+
+@pytest.mark.parametrize(('encoding', 'compress'), [
+    ('gzip', gzip.compress),
+    ('deflate', zlib.compress),
+    ('identity', lambda x: x),
+    ('br', lambda x: pytest.importorskip('brotli').compress(x)),
+    ('zstd', lambda x: pytest.importorskip('zstandard').ZstdCompressor().compress(x)),
+])
+def test_iter_decoded(encoding, compress, monkeypatch):
+    monkeypatch.setattr(util, 'CHUNK_SIZE', 64)
+    body = compress(PAGE)
+    chunks = list(util.iter_decoded(body, encoding))
+
+    assert b''.join(chunks) == PAGE
+    if encoding != 'identity':
+        assert len(chunks) > 1
+
+
+@pytest.mark.parametrize(('body', 'encoding'), [
+    (b'not gzip', 'gzip'),
+    (b'ok', 'compress'),
+])
+def test_iter_decoded_errors(body, encoding):
+    with pytest.raises(ValueError):
+        list(util.iter_decoded(body, encoding))
+    with pytest.raises(ConnectionError):
+        util.parse_response(EncodedPage(body, encoding))
+
+
+def test_parse_response_decodes_the_page():
+    root = util.parse_response(EncodedPage(gzip.compress(PAGE), 'gzip'))
+    assert len(root.findall('.//p')) == 10000
+
+
+def test_accept_encoding_lists_available_decoders():
+    encodings = util.HEADERS['Accept-Encoding'].split(', ')
+    assert 'gzip' in encodings
+    assert ('br' in encodings) == any(
+        importlib.util.find_spec(x) is not None for x in ('brotli', 'brotlicffi')
+    )
+    assert ('zstd' in encodings) == (importlib.util.find_spec('zstandard') is not None)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from urllib3.exceptions import ReadTimeoutError
+
+import src.anki as anki
+from src.card import Card
+from src.data import config
+
+
+def make_card(phrase: str) -> Card:
+    return {
+        'DEF': '', 'SYN': '', 'PHRASE': phrase, 'EXSEN': '', 'POS': '', 'ETYM': '', 'AUDIO': ''
+    }
+
+
+@pytest.fixture
+def submitted(monkeypatch):
+    config['note'] = 'note'
+    config['deck'] = 'deck'
+    config['duplicates'] = False
+    config['dupescope'] = 'deck'
+    config['tags'] = 'test'
+    monkeypatch.setattr(anki.models, 'get_model', lambda *a, **kw: {'Phrase': 'PHRASE'})
+
+    requests = []
+
+    def invoke(action: str, **params: Any) -> list[dict[str, Any]]:
+        assert action == 'multi'
+        requests.append(params['actions'])
+        result: list[dict[str, Any]] = []
+        for x in params['actions']:
+            phrase = x['params']['note']['fields']['Phrase']
+            if phrase == 'dupe':
+                result.append({'result': None, 'error': 'cannot create note because it is a duplicate'})
+            else:
+                result.append({'result': len(phrase), 'error': None})
+        return result
+
+    monkeypatch.setattr(anki, 'invoke', invoke)
+    return requests
+
+
+def test_add_cards(submitted):
+    result = anki.add_cards([make_card('one'), make_card('dupe'), make_card('three')])
+
+    assert len(submitted) == 1
+    assert [x['action'] for x in submitted[0]] == 3 * ['addNote']
+    assert result[0] == 3
+    assert isinstance(result[1], anki.AnkiError)
+    assert str(result[1]) == 'card is a duplicate'
+    assert result[2] == 5
+
+
+def test_card_queue_flushes_on_size(submitted):
+    flushed: list[tuple[str, int | anki.AnkiError]] = []
+    queue = anki.CardQueue(flushed.extend, max_size=2, max_delay=60)
+
+    queue.put('a', make_card('one'))
+    assert not submitted
+    queue.put('b', make_card('dupe'))
+    queue.put('c', make_card('three'))
+
+    assert len(submitted) == 1
+    assert [(k, x) for k, x in flushed if not isinstance(x, anki.AnkiError)] == [('a', 3)]
+    assert len(queue) == 1
+
+    queue.flush()
+    assert len(submitted) == 2
+    assert flushed[-1] == ('c', 5)
+
+
+def test_card_queue_flushes_on_time(submitted):
+    now = 0.0
+    flushed: list[tuple[str, int | anki.AnkiError]] = []
+    queue = anki.CardQueue(flushed.extend, max_size=100, max_delay=5, clock=lambda: now)
+
+    queue.put('a', make_card('one'))
+    now = 4.0
+    queue.put('b', make_card('two'))
+    queue.flush_if_due()
+    assert not submitted
+
+    now = 5.0
+    queue.flush_if_due()
+    assert flushed == [('a', 3), ('b', 3)]
+    assert len(queue) == 0
+
+
+def test_card_queue_connection_error(monkeypatch):
+    def add_cards(cards: list[Card]) -> list[int | anki.AnkiError]:
+        raise anki.AnkiError('could not connect with Anki')
+
+    monkeypatch.setattr(anki, 'add_cards', add_cards)
+    flushed: list[tuple[str, int | anki.AnkiError]] = []
+    queue = anki.CardQueue(flushed.extend)
+    queue.put('a', make_card('one'))
+    queue.flush()
+
+    assert [(k, str(x)) for k, x in flushed] == [('a', 'could not connect with Anki')]
+
+
+def test_card_queue_timeout(monkeypatch):
+    class TimingOutHttp:
+        def urlopen(self, method: str, url: str, **kw: Any) -> Any:
+            raise ReadTimeoutError(None, url, 'Read timed out.')  # type: ignore[arg-type]
+
+    monkeypatch.setattr(anki.models, 'get_model', lambda *a, **kw: {'Phrase': 'PHRASE'})
+    monkeypatch.setattr(anki, 'http', TimingOutHttp())
+    flushed: list[tuple[str, int | anki.AnkiError]] = []
+    queue = anki.CardQueue(flushed.extend)
+    queue.put('a', make_card('one'))
+    queue.put('b', make_card('two'))
+    queue.flush()
+
+    assert [(k, str(x)) for k, x in flushed] == [
+        ('a', 'Anki did not respond'), ('b', 'Anki did not respond')
+    ]
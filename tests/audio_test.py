@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import os
+from typing import Iterator
+
+import pytest
+
+import src.audio as audio
+from src.audio import AudioStats
+from src.audio import AudioStore
+
+
+class FakeResponse:
+    def __init__(self, data: bytes, status: int = 200) -> None:
+        self.status = status
+        self.data = data
+
+    def stream(self, n: int) -> Iterator[bytes]:
+        for i in range(0, len(self.data), n):
+            yield self.data[i:i + n]
+
+    def release_conn(self) -> None:
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    files: dict[str, bytes] = {}
+    requests = []
+
+    class FakeHttp:
+        def urlopen(self, method, url, **kw):
+            requests.append(url)
+            if url not in files:
+                return FakeResponse(b'not found', 404)
+            return FakeResponse(files[url])
+
+    monkeypatch.setattr(audio, 'http', FakeHttp())
+    return files, requests
+
+
+def test_get_downloads_once(server, tmp_path):
+    files, requests = server
+    files['http://a/run.mp3'] = b'run'
+
+    store = AudioStore()
+    assert store.get('http://a/run.mp3', str(tmp_path)) == 'run.mp3'
+    assert store.get('http://a/run.mp3', str(tmp_path)) == 'run.mp3'
+
+    assert requests == ['http://a/run.mp3']
+    assert (tmp_path / 'run.mp3').read_bytes() == b'run'
+    assert store.stats() == AudioStats(hits=1, misses=1, duplicates=0, downloaded_bytes=3)
+
+
+def test_get_deduplicates_content(server, tmp_path):
+    files, _ = server
+    files['http://a/run.mp3'] = b'run'
+    files['http://b/running.mp3'] = b'run'
+
+    store = AudioStore()
+    store.get('http://a/run.mp3', str(tmp_path))
+    assert store.get('http://b/running.mp3', str(tmp_path)) == 'run.mp3'
+
+    assert os.listdir(tmp_path) == ['run.mp3']
+    assert store.stats().duplicates == 1
+
+
+def test_get_copies_staged_files(server, tmp_path):
+    files, requests = server
+    files['http://a/run.mp3'] = b'run'
+    (tmp_path / 'staging').mkdir()
+    (tmp_path / 'media').mkdir()
+
+    store = AudioStore()
+    store.get('http://a/run.mp3', str(tmp_path / 'staging'))
+    filename = store.get('http://a/run.mp3', str(tmp_path / 'media'), str(tmp_path / 'staging'))
+
+    assert filename == 'run.mp3'
+    assert (tmp_path / 'media' / 'run.mp3').read_bytes() == b'run'
+    assert requests == ['http://a/run.mp3']
+    assert store.stats().downloaded_bytes == 3
+
+
+def test_get_renames_conflicting_files(server, tmp_path):
+    files, _ = server
+    files['http://a/run.mp3'] = b'run a'
+    files['http://b/run.mp3'] = b'run b'
+
+    store = AudioStore()
+    store.get('http://a/run.mp3', str(tmp_path))
+    filename = store.get('http://b/run.mp3', str(tmp_path))
+
+    assert filename.startswith('run-') and filename.endswith('.mp3')
+    assert (tmp_path / 'run.mp3').read_bytes() == b'run a'
+    assert (tmp_path / filename).read_bytes() == b'run b'
+
+
+def test_get_redownloads_changed_files(server, tmp_path):
+    files, requests = server
+    files['http://a/run.mp3'] = b'run'
+
+    store = AudioStore()
+    store.get('http://a/run.mp3', str(tmp_path))
+    os.remove(tmp_path / 'run.mp3')
+    assert store.get('http://a/run.mp3', str(tmp_path)) == 'run.mp3'
+    assert len(requests) == 2
+
+    # Files changed by someone else are left alone.
+    (tmp_path / 'run.mp3').write_bytes(b'xyz')
+    filename = store.get('http://a/run.mp3', str(tmp_path))
+    assert len(requests) == 3
+    assert filename != 'run.mp3'
+    assert (tmp_path / filename).read_bytes() == b'run'
+    assert (tmp_path / 'run.mp3').read_bytes() == b'xyz'
+
+
+def test_get_http_error(server, tmp_path):
+    with pytest.raises(OSError):
+        AudioStore().get('http://a/missing.mp3', str(tmp_path))
+    assert os.listdir(tmp_path) == []
+
+
+def test_index_is_saved(server, tmp_path):
+    files, requests = server
+    files['http://a/run.mp3'] = b'run'
+    mediadir = tmp_path / 'media'
+    mediadir.mkdir()
+
+    store = AudioStore(str(tmp_path / 'audio.json'))
+    store.get('http://a/run.mp3', str(mediadir))
+    store.save()
+
+    store = AudioStore(str(tmp_path / 'audio.json'))
+    assert store.get('http://a/run.mp3', str(mediadir)) == 'run.mp3'
+    assert len(requests) == 1
+
+
+def test_get_deduplicates_content_of_saved_index(server, tmp_path):
+    files, requests = server
+    files['http://a/run.mp3'] = b'run'
+    files['http://b/running.mp3'] = b'run'
+
+    store = AudioStore(str(tmp_path / 'audio.json'))
+    store.get('http://a/run.mp3', str(tmp_path))
+    store.save()
+
+    store = AudioStore(str(tmp_path / 'audio.json'))
+    assert store.get('http://b/running.mp3', str(tmp_path)) == 'run.mp3'
+    assert store.stats().duplicates == 1
+
+
+def test_get_forgets_content_of_replaced_files(server, tmp_path):
+    files, _ = server
+    files['http://a/run.mp3'] = b'run'
+    files['http://b/run.mp3'] = b'xyz'
+    files['http://c/walk.mp3'] = b'run'
+
+    store = AudioStore()
+    store.get('http://a/run.mp3', str(tmp_path))
+    os.remove(tmp_path / 'run.mp3')
+    assert store.get('http://b/run.mp3', str(tmp_path)) == 'run.mp3'
+
+    assert store.get('http://c/walk.mp3', str(tmp_path)) == 'walk.mp3'
+    assert (tmp_path / 'walk.mp3').read_bytes() == b'run'
+    assert store.stats().duplicates == 0
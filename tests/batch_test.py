@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+import src.anki as anki
+import src.batch as batch
+import src.search as search
+from src.batch import Rule
+from src.data import config
+from src.Dictionaries.base import DEF
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import DictionarySelection
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import LABEL
+from src.Dictionaries.base import NotFoundError
+from src.Dictionaries.base import PHRASE
+
+
+def make_dictionary(query: str) -> Dictionary:
+    d = Dictionary()
+    d.add(HEADER('AH Dictionary'))
+    d.add(PHRASE(query, ''))
+    d.add(LABEL('n.', ''))
+    d.add(DEF('noun one', [], '', False))
+    d.add(DEF('noun two', [], 'Informal', False))
+    d.add(LABEL('tr.v.', ''))
+    d.add(DEF('verb one', [], '', False))
+    d.add(DEF('verb two', [], 'Informal', False))
+    return d
+
+
+def definitions(selections: list[DictionarySelection] | None) -> list[str]:
+    assert selections is not None
+    assert len(selections) == 1
+    return [x.definition for x in selections[0].DEF]
+
+
+@pytest.mark.parametrize(('rule', 'expected'), [
+    (Rule(), ['noun one']),
+    (Rule(3), ['noun one', 'noun two', 'verb one']),
+    (Rule(1, pos='tr'), ['verb one']),
+    (Rule(5, label='informal'), ['noun two', 'verb two']),
+    (Rule(5, label='informal', pos='tr.v'), ['verb two']),
+])
+def test_select(rule, expected):
+    assert definitions(batch.select(make_dictionary('test'), rule)) == expected
+
+
+def test_select_nothing():
+    assert batch.select(make_dictionary('test'), Rule(pos='adj')) is None
+
+
+def test_read_words():
+    queries = batch.read_words(['# comment\n', 'one\n', '\n', '  two, three -col \n'])
+    assert [(x.query, x.dict_flags) for x in queries] == [
+        ('one', []), ('two three', ['collins'])
+    ]
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    config['cachefile'] = False
+    config['primary'] = 'ahd'
+    config['secondary'] = '-'
+    config['audio'] = False
+    monkeypatch.setattr(search, '_cache', search._Cache())
+
+    async def ask(query, fetch=None):
+        if query == 'missing':
+            raise NotFoundError(f'{query!r} not found')
+        return make_dictionary(query)
+
+    monkeypatch.setattr(search, 'DICTIONARY_LOOKUP', {'ahd': ask})
+
+
+def test_run(lookups, monkeypatch):
+    added = []
+
+    def add_cards(cards):
+        added.extend(cards)
+        return [1, anki.AnkiError('card is a duplicate')]
+
+    monkeypatch.setattr(anki, 'add_cards', add_cards)
+    report = batch.run(['one', 'missing', 'two'], Rule())
+
+    assert [x['PHRASE'] for x in added] == ['one', 'two']
+    assert (report.words, report.cards, report.added) == (3, 2, 1)
+    assert report.failures == [('missing', 'not found'), ('two', 'card is a duplicate')]
+
+
+def test_run_connection_error(lookups, monkeypatch):
+    def add_cards(cards):
+        raise anki.AnkiError('could not connect with Anki')
+
+    monkeypatch.setattr(anki, 'add_cards', add_cards)
+    report = batch.run(['one', 'two'], Rule())
+
+    assert (report.cards, report.added) == (2, 0)
+    assert report.failures == [
+        ('one', 'could not connect with Anki'),
+        ('two', 'could not connect with Anki'),
+    ]
+
+
+def test_run_dry(lookups, monkeypatch, capsys):
+    config['formatdefs'] = False
+    config['hidedef'] = False
+    monkeypatch.setattr(anki, 'add_cards', None)
+    report = batch.run(['one'], Rule(2), dry_run=True)
+
+    assert (report.words, report.cards, report.added) == (1, 1, 0)
+    word, card = capsys.readouterr().out.split('\t')
+    assert word == 'one'
+    assert json.loads(card)['DEF'] == 'noun one<br>[Informal] noun two'
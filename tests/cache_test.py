@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import os
+import shelve
+import sqlite3
+
+import pytest
+
+import src.cache
+import src.Dictionaries.codec as codec
+from src.cache import DictionaryCache
+from src.cache import Limits
+from src.cache import parse_limits
+from src.cache import parse_ttls
+from src.cache import StoredResponse
+from src.data import dictkey_t
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import MAGIC
+from src.Dictionaries.base import op_t
+from src.Dictionaries.base import PHRASE
+
+
+def make_dictionary(phrase: str) -> Dictionary:
+    d = Dictionary()
+    d.add(HEADER('Test'))
+    d.add(PHRASE(phrase, ''))
+    return d
+
+
+def contents(cache: DictionaryCache, key: dictkey_t, query: str) -> list[op_t]:
+    d = cache.get(key, query)
+    assert d is not None
+    return d.contents
+
+
+def test_get_and_put():
+    cache = DictionaryCache()
+    assert cache.get('ahd', 'test') is None
+    assert ('ahd', 'test') not in cache
+
+    cache.put('ahd', 'test', make_dictionary('test'))
+    assert ('ahd', 'test') in cache
+    assert ('collins', 'test') not in cache
+    assert contents(cache, 'ahd', 'test') == make_dictionary('test').contents
+    assert len(cache) == 1
+
+
+def test_entries_are_shared_between_connections(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    one = DictionaryCache(path)
+    two = DictionaryCache(path)
+
+    one.put('diki-en', 'test', make_dictionary('test'))
+    assert ('diki-en', 'test') in two
+
+
+def test_copy_to(tmp_path):
+    memory = DictionaryCache()
+    memory.put('ahd', 'one', make_dictionary('one'))
+    memory.put('farlex', 'two', make_dictionary('two'))
+
+    dbfile = DictionaryCache(str(tmp_path / 'cache.sqlite3'))
+    memory.copy_to(dbfile)
+    assert len(dbfile) == 2
+    assert contents(dbfile, 'farlex', 'two') == make_dictionary('two').contents
+
+
+def test_import_shelf(tmp_path):
+    shelf_path = str(tmp_path / 'dictionary_cache.0')
+    shelf: shelve.Shelf[Dictionary] = shelve.DbfilenameShelf(shelf_path, protocol=4)
+    with shelf:
+        shelf['ahdtest'] = make_dictionary('test')
+        shelf['diki-ensome phrase'] = make_dictionary('some phrase')
+
+    cache = DictionaryCache(str(tmp_path / 'cache.sqlite3'))
+    assert cache.import_shelf(shelf_path) == 2
+    assert contents(cache, 'ahd', 'test') == make_dictionary('test').contents
+    assert ('diki-en', 'some phrase') in cache
+
+    assert not any(x.startswith('dictionary_cache.0') for x in os.listdir(tmp_path))
+    assert cache.import_shelf(shelf_path) == 0
+
+
+@pytest.mark.parametrize(
+    ('s', 'expected'),
+    (
+        ('-', Limits(None, None)),
+        ('500', Limits(500, None)),
+        ('2K', Limits(None, 2048)),
+        ('1.5m', Limits(None, 1572864)),
+        ('500 1G', Limits(500, 1 << 30)),
+        ('1G, 500', Limits(500, 1 << 30)),
+    )
+)
+def test_parse_limits(s, expected):
+    assert parse_limits(s) == expected
+
+
+def test_parse_ttls():
+    day = 24 * 60 * 60
+    assert parse_ttls('-') == {}
+    assert parse_ttls('ahd:1 diki-en:2') == {'ahd': day, 'diki-en': 2 * day}
+    assert set(parse_ttls('diki:90')) == {
+        'diki-en', 'diki-fr', 'diki-de', 'diki-it', 'diki-es'
+    }
+    with pytest.raises(ValueError):
+        parse_ttls('ahd')
+    with pytest.raises(ValueError):
+        parse_ttls('nonexistent:90')
+
+
+def test_evict_least_recently_used():
+    cache = DictionaryCache()
+    for phrase in ('one', 'two', 'three', 'four'):
+        cache.put('ahd', phrase, make_dictionary(phrase))
+
+    cache.get('ahd', 'one')
+    cache.get('ahd', 'three')
+
+    assert cache.evict(Limits(2, None), 'lru') == 2
+    assert ('ahd', 'one') in cache
+    assert ('ahd', 'three') in cache
+    assert len(cache) == 2
+
+
+def test_evict_least_frequently_used():
+    cache = DictionaryCache()
+    for phrase in ('one', 'two', 'three'):
+        cache.put('ahd', phrase, make_dictionary(phrase))
+
+    for _ in range(3):
+        cache.get('ahd', 'two')
+    cache.get('ahd', 'three')
+    cache.get('ahd', 'one')
+
+    assert cache.evict(Limits(1, None), 'lfu') == 2
+    assert ('ahd', 'two') in cache
+
+
+def test_evict_to_size():
+    cache = DictionaryCache()
+    for phrase in ('one', 'two', 'three', 'four'):
+        cache.put('ahd', phrase, make_dictionary(phrase))
+
+    _, nbytes = cache.size()
+    cache.evict(Limits(None, nbytes // 2), 'lru')
+    assert cache.size()[1] <= nbytes // 2
+    assert ('ahd', 'four') in cache
+
+
+def test_evict_within_limits():
+    cache = DictionaryCache()
+    for phrase in ('one', 'two'):
+        cache.put('ahd', phrase, make_dictionary(phrase))
+
+    _, nbytes = cache.size()
+    assert cache.evict(Limits(2, nbytes), 'lru') == 0
+    assert len(cache) == 2
+
+
+def test_least_recently_used_entries_are_found_by_index(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    DictionaryCache(path).close()
+
+    conn = sqlite3.connect(path)
+    plan = conn.execute(
+        'EXPLAIN QUERY PLAN SELECT dictkey, query FROM dictionaries ORDER BY accessed'
+    ).fetchall()
+    conn.close()
+    details = ' '.join(row[-1] for row in plan)
+    assert 'INDEX dictionaries_accessed' in details
+    assert 'TEMP B-TREE' not in details
+
+
+def test_expired_entries():
+    cache = DictionaryCache(ttls={'diki-en': -1})
+    cache.put('diki-en', 'test', make_dictionary('test'))
+    cache.put('ahd', 'test', make_dictionary('test'))
+
+    assert cache.get('diki-en', 'test') is None
+    assert cache.get('ahd', 'test') is not None
+
+    assert cache.evict(Limits(None, None)) == 1
+    assert ('diki-en', 'test') not in cache
+
+
+def test_not_found():
+    cache = DictionaryCache(not_found_ttl=60)
+    assert cache.get_not_found('ahd', 'tset') is None
+
+    cache.put_not_found('ahd', 'tset', "'tset' not found")
+    assert cache.get_not_found('ahd', 'tset') == "'tset' not found"
+    assert cache.get_not_found('farlex', 'tset') is None
+    assert ('ahd', 'tset') not in cache
+
+    cache.put('ahd', 'tset', make_dictionary('tset'))
+    assert cache.get_not_found('ahd', 'tset') is None
+
+
+def test_not_found_expires():
+    cache = DictionaryCache(not_found_ttl=-1)
+    cache.put_not_found('ahd', 'tset', "'tset' not found")
+    assert cache.get_not_found('ahd', 'tset') is None
+
+    assert cache.evict(Limits(None, None)) == 0
+    # Removed, not only expired.
+    cache.not_found_ttl = 60
+    assert cache.get_not_found('ahd', 'tset') is None
+
+
+def test_put_without_replacing():
+    cache = DictionaryCache()
+    cache.put('ahd', 'run', make_dictionary('run'))
+    cache.put('ahd', 'run', make_dictionary('ran'), replace=False)
+    assert contents(cache, 'ahd', 'run') == make_dictionary('run').contents
+
+    cache.put_not_found('ahd', 'ran', "'ran' not found")
+    cache.put('ahd', 'ran', make_dictionary('ran'), replace=False)
+    assert contents(cache, 'ahd', 'ran') == make_dictionary('ran').contents
+    assert cache.get_not_found('ahd', 'ran') is None
+
+
+def test_audio_urls():
+    cache = DictionaryCache(not_found_ttl=-1)
+    assert cache.get_audio_url('diki', 'run') is None
+
+    cache.put_audio_url('diki', 'run', 'https://x/run.mp3')
+    cache.put_audio_url('diki', 'tset', '')
+    assert cache.get_audio_url('diki', 'run') == 'https://x/run.mp3'
+    # Missing audio expires like not found queries.
+    assert cache.get_audio_url('diki', 'tset') is None
+
+    cache.evict(Limits(None, None))
+    cache.not_found_ttl = 60
+    assert cache.get_audio_url('diki', 'run') == 'https://x/run.mp3'
+    assert cache.get_audio_url('diki', 'tset') is None
+
+
+def test_responses():
+    cache = DictionaryCache()
+    response = StoredResponse('https://x/run', '"v1"', None, 'gzip', b'body')
+    cache.put('ahd', 'run', make_dictionary('run'))
+    cache.put_response('ahd', 'run', response)
+
+    assert cache.get_response('ahd', 'run', 'https://x/run') == response
+    assert cache.get_response('ahd', 'ran', 'https://x/run') is None
+    assert cache.get_response('ahd', 'run', 'https://x/ran') is None
+
+    _, nbytes = cache.size()
+    assert nbytes == len(codec.dumps(make_dictionary('run'))) + len(b'body')
+
+    cache.evict(Limits(0, None))
+    assert cache.get_response('ahd', 'run', 'https://x/run') is None
+    assert cache.size() == (0, 0)
+
+
+def test_entries_with_pages_survive_magic_changes(monkeypatch):
+    cache = DictionaryCache()
+    for phrase in ('one', 'two'):
+        cache.put('ahd', phrase, make_dictionary(phrase))
+    cache.put_response('ahd', 'one', StoredResponse('https://x/one', None, None, '', b'one'))
+    monkeypatch.setattr(src.cache, 'MAGIC', MAGIC + 1)
+
+    assert [x[:2] for x in cache.stale_pages()] == [('ahd', 'one')]
+    assert cache.evict(Limits(None, None)) == 1
+    assert [x[:2] for x in cache.stale_pages()] == [('ahd', 'one')]
+
+    # Rebuilt entries replace the old ones.
+    cache.put('ahd', 'one', make_dictionary('one'))
+    assert list(cache.stale_pages()) == []
+    assert cache.size()[0] == 1
+
+
+def test_stale_pages_are_read_in_batches():
+    cache = DictionaryCache()
+    for phrase in ('one', 'two', 'three', 'four', 'five'):
+        for url in ('https://x/1', 'https://x/2'):
+            cache.put_response('ahd', phrase, StoredResponse(url, None, None, '', b''))
+
+    seen = []
+    for key, query, pages in cache.stale_pages(2):
+        assert [x.url for x in pages] == ['https://x/1', 'https://x/2']
+        seen.append(query)
+        # Entries can be updated while they are read.
+        if query == 'one':
+            cache.remove_pages('ahd', 'three')
+        cache.put('ahd', query, make_dictionary(query))
+
+    assert seen == ['five', 'four', 'one', 'two']
+    assert list(cache.stale_pages()) == []
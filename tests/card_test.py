@@ -1,7 +1,16 @@
+from __future__ import annotations
+
+import threading
+from typing import Iterator
+
 import pytest
 
+import src.audio as audio
 import src.card as card
 from src.data import config
+from src.Dictionaries.base import AUDIO
+from src.Dictionaries.base import DictionarySelection
+from src.Dictionaries.base import PHRASE
 
 
 @pytest.mark.parametrize(
@@ -44,3 +53,98 @@ def test_hide_nohidepreps(target, phrase_to_hide, expected):
     config['hides'] = '___'
     hide_func = card.prepare_hide_func(phrase_to_hide)
     assert hide_func(target) == expected
+
+
+class DummyStatus:
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+
+    def writeln(self, header: str, body: str | None = None) -> None: pass
+    def success(self, header: str, body: str | None = None) -> None: pass
+    def attention(self, header: str, body: str | None = None) -> None: pass
+    def clear(self) -> None: pass
+
+    def error(self, header: str, body: str | None = None) -> None:
+        self.errors.append(header)
+
+
+class FakeResponse:
+    def __init__(self, data: bytes) -> None:
+        self.status = 200
+        self.data = data
+
+    def stream(self, n: int) -> Iterator[bytes]:
+        for i in range(0, len(self.data), n):
+            yield self.data[i:i + n]
+
+    def release_conn(self) -> None:
+        pass
+
+
+@pytest.fixture
+def downloads(tmp_path, monkeypatch):
+    config['audio'] = True
+    config['mediadir'] = str(tmp_path / 'media')
+    (tmp_path / 'media').mkdir()
+    (tmp_path / 'audio').mkdir()
+    monkeypatch.setattr(card, 'AUDIO_DIR', str(tmp_path / 'audio'))
+    monkeypatch.setattr(card, '_audio_downloads', {})
+    monkeypatch.setattr(audio, 'store', audio.AudioStore())
+    monkeypatch.setattr(audio, 'CHUNK_SIZE', 2)
+
+    barrier = threading.Barrier(2, timeout=5)
+    requests = []
+
+    class FakeHttp:
+        def urlopen(self, method, url, **kw):
+            requests.append(url)
+            # Blocks unless both downloads run at the same time.
+            barrier.wait()
+            return FakeResponse(url.encode())
+
+    monkeypatch.setattr(audio, 'http', FakeHttp())
+    return requests
+
+
+def make_selection(phrase: str, audio: str) -> DictionarySelection:
+    return DictionarySelection(AUDIO(audio), [], None, PHRASE(phrase, ''), None, [])
+
+
+def test_audio_downloads_are_concurrent(downloads, tmp_path):
+    status = DummyStatus()
+    cards = list(card.perror_make_cards(status, [
+        make_selection('one', 'http://x/one.mp3'),
+        make_selection('two', 'http://x/two.mp3'),
+    ]))
+
+    assert not status.errors
+    assert [x['AUDIO'] for x in cards] == ['[sound:one.mp3]', '[sound:two.mp3]']
+    assert (tmp_path / 'media' / 'one.mp3').read_bytes() == b'http://x/one.mp3'
+    assert sorted(p.name for p in (tmp_path / 'media').iterdir()) == ['one.mp3', 'two.mp3']
+
+
+def test_prefetched_audio_is_downloaded_once(downloads, tmp_path):
+    card.prefetch_audio('http://x/one.mp3')
+    card.prefetch_audio('http://x/two.mp3')
+    cards = list(card.perror_make_cards(DummyStatus(), [
+        make_selection('one', 'http://x/one.mp3'),
+    ]))
+
+    assert cards[0]['AUDIO'] == '[sound:one.mp3]'
+    assert sorted(downloads) == ['http://x/one.mp3', 'http://x/two.mp3']
+    # Audio of selections that were not added stays out of the media directory.
+    assert [p.name for p in (tmp_path / 'media').iterdir()] == ['one.mp3']
+
+
+def test_audio_deleted_from_media_directory_is_restored(downloads, tmp_path):
+    selections = [
+        make_selection('one', 'http://x/one.mp3'),
+        make_selection('two', 'http://x/two.mp3'),
+    ]
+    list(card.perror_make_cards(DummyStatus(), selections))
+    (tmp_path / 'media' / 'one.mp3').unlink()
+
+    cards = list(card.perror_make_cards(DummyStatus(), selections[:1]))
+    assert cards[0]['AUDIO'] == '[sound:one.mp3]'
+    assert (tmp_path / 'media' / 'one.mp3').read_bytes() == b'http://x/one.mp3'
+    assert len(downloads) == 2
@@ -0,0 +1,520 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable
+from typing import Callable
+from typing import Container
+from typing import Mapping
+from typing import Sequence
+
+import pytest
+
+import src.cache
+import src.search as search
+from src.cache import DictionaryCache
+from src.cache import StoredResponse
+from src.data import config
+from src.data import dictkey_t
+import src.Dictionaries.diki as diki
+from src.Dictionaries.aio import fetch_t
+from src.Dictionaries.aio import Response
+from src.Dictionaries.base import Dictionary
+from src.Dictionaries.base import DictionaryError
+from src.Dictionaries.base import HEADER
+from src.Dictionaries.base import MAGIC
+from src.Dictionaries.base import NOTE
+from src.Dictionaries.base import NotFoundError
+from src.Dictionaries.base import PHRASE
+from src.Dictionaries.util import page_t
+from src.Dictionaries.util import read_page
+
+
+class DummyStatus:
+    def __init__(self) -> None:
+        self.errors: list[str] = []
+
+    def writeln(self, header: str, body: str | None = None) -> None: pass
+    def success(self, header: str, body: str | None = None) -> None: pass
+    def attention(self, header: str, body: str | None = None) -> None: pass
+    def clear(self) -> None: pass
+
+    def error(self, header: str, body: str | None = None) -> None:
+        self.errors.append(header)
+
+
+class Barrier:
+    # asyncio.Barrier is new in Python 3.11.
+    def __init__(self, parties: int) -> None:
+        self.parties = parties
+        self.waiting = 0
+        self.event: asyncio.Event | None = None
+
+    async def wait(self) -> None:
+        if self.event is None:
+            self.event = asyncio.Event()
+        self.waiting += 1
+        if self.waiting == self.parties:
+            self.event.set()
+        await asyncio.wait_for(self.event.wait(), 5)
+
+
+def make_dictionary(name: str, query: str) -> Dictionary:
+    d = Dictionary()
+    d.add(HEADER(name))
+    d.add(PHRASE(query, ''))
+    return d
+
+
+class Progress:
+    def __init__(self) -> None:
+        self.results: list[tuple[tuple[int, int], str]] = []
+        self.pending_calls: list[list[tuple[dictkey_t, str]]] = []
+
+    def result(self, slot: tuple[int, int], dictionary: Dictionary) -> None:
+        self.results.append((slot, dictionary.header()))
+
+    def pending(self, lookups: Sequence[tuple[dictkey_t, str]]) -> None:
+        self.pending_calls.append(list(lookups))
+
+
+def search_for(
+        s: str,
+        status: DummyStatus | None = None,
+        progress: Progress | None = None
+) -> list[list[Dictionary] | None]:
+    queries = search.parse(s)
+    assert queries is not None
+    return search.search(status or DummyStatus(), queries, progress)
+
+
+def headers(result: list[list[Dictionary] | None]) -> list[list[str] | None]:
+    return [None if x is None else [d.header() for d in x] for x in result]
+
+
+# return: Dictionaries found for the `i`th query.
+def found(result: list[list[Dictionary] | None], i: int = 0) -> list[Dictionary]:
+    dictionaries = result[i]
+    assert dictionaries is not None
+    return dictionaries
+
+
+lookup_t = Callable[[str, fetch_t], Awaitable[Dictionary]]
+
+
+@pytest.fixture
+def lookups(monkeypatch):
+    config['cachefile'] = False
+    config['primary'] = 'ahd'
+    config['secondary'] = 'farlex'
+    monkeypatch.setattr(search, '_cache', search._Cache())
+
+    calls: list[tuple[str, str]] = []
+
+    def prepare(
+            name: str,
+            barrier: Barrier | None = None,
+            missing: Container[str] = (),
+            broken: Container[str] = ()
+    ) -> lookup_t:
+        async def ask(query: str, fetch: fetch_t | None = None) -> Dictionary:
+            calls.append((name, query))
+            if barrier is not None:
+                await barrier.wait()
+            if query in missing:
+                raise NotFoundError(f'{name}: {query!r} not found')
+            if query in broken:
+                raise DictionaryError(f'ERROR: {name}: {query!r} broken')
+            return make_dictionary(name, query)
+        return ask
+
+    def install(
+            barrier: Barrier | None = None,
+            missing: Container[str] = (),
+            broken: Container[str] = ()
+    ) -> list[tuple[str, str]]:
+        lookup: Mapping[dictkey_t, lookup_t] = {
+            'ahd': prepare('ahd', barrier, missing, broken),
+            'collins': prepare('collins', barrier),
+            'farlex': prepare('farlex', barrier),
+        }
+        monkeypatch.setattr(search, 'DICTIONARY_LOOKUP', lookup)
+        return calls
+
+    return install
+
+
+def test_search_queries_are_looked_up_concurrently(lookups):
+    # Every lookup waits for all the other ones, if they were made one
+    # after another, the barrier would time out.
+    calls = lookups(barrier=Barrier(5))
+
+    result = search_for('a, b, c, d, e')
+
+    assert sorted(calls) == [('ahd', x) for x in 'abcde']
+    assert headers(result) == 5 * [['ahd']]
+
+
+def test_search_collapses_duplicate_lookups(lookups):
+    calls = lookups()
+
+    result = search_for('a -ahd -col, a, b -col, a -ahd')
+
+    assert sorted(calls) == [('ahd', 'a'), ('collins', 'a'), ('collins', 'b')]
+    assert headers(result) == [
+        ['ahd', 'collins'], ['ahd'], ['collins'], ['ahd']
+    ]
+
+
+def test_search_falls_back_to_secondary(lookups):
+    calls = lookups(missing=('b',))
+    status = DummyStatus()
+
+    result = search_for('a, b', status)
+
+    assert sorted(calls) == [('ahd', 'a'), ('ahd', 'b'), ('farlex', 'b')]
+    assert headers(result) == [['ahd'], ['farlex']]
+    assert status.errors == ["ahd: 'b' not found"]
+
+
+def test_search_uses_cache(lookups):
+    calls = lookups()
+
+    search_for('a, b -col')
+    calls.clear()
+    result = search_for('a, b -col')
+
+    assert calls == []
+    assert headers(result) == [['ahd'], ['collins']]
+
+
+def test_search_remembers_not_found_queries(lookups):
+    calls = lookups(missing=('b',))
+
+    search_for('b -ahd')
+    calls.clear()
+    status = DummyStatus()
+    result = search_for('b -ahd', status)
+
+    assert calls == []
+    assert result == [None]
+    assert status.errors == ["ahd: 'b' not found"]
+
+
+def test_search_goes_straight_to_secondary(lookups):
+    # Every lookup of the second search waits for the other one, if farlex
+    # was looked up only after ahd had failed, the barrier would time out.
+    calls = lookups(missing=('b',))
+    search_for('b -ahd')
+    calls.clear()
+
+    calls = lookups(barrier=Barrier(2), missing=('b',))
+    result = search_for('b, x -col')
+
+    assert sorted(calls) == [('collins', 'x'), ('farlex', 'b')]
+    assert headers(result) == [['farlex'], ['collins']]
+
+
+def test_search_does_not_remember_other_errors(lookups):
+    config['secondary'] = '-'
+    calls = lookups(broken=('b',))
+
+    search_for('b')
+    calls.clear()
+    search_for('b')
+
+    assert calls == [('ahd', 'b')]
+
+
+def test_search_normalizes_queries(lookups):
+    calls = lookups()
+
+    result = search_for('Test, test , TEST -col, tes  t -col')
+    calls.sort()
+
+    assert calls == [('ahd', 'test'), ('collins', 'TEST'), ('collins', 'tes t')]
+    assert headers(result) == [['ahd'], ['ahd'], ['collins'], ['collins']]
+
+
+def test_search_shares_entries_of_derived_forms(lookups, monkeypatch):
+    lookups()
+    calls: list[str] = []
+
+    # Every form of "run" leads to the same page, which is numbered.
+    async def ask_ahd(query: str, fetch: fetch_t | None = None) -> Dictionary:
+        calls.append(query)
+        d = Dictionary()
+        d.add(HEADER('ahd'))
+        if query != 'run':
+            d.add(NOTE('Showing results for:'))
+        d.add(PHRASE('run', str(len(calls))))
+        d.add(NOTE(f'({query}) -> run'))
+        return d
+
+    monkeypatch.setitem(search.DICTIONARY_LOOKUP, 'ahd', ask_ahd)
+
+    search_for('ran')
+    result = search_for('run, ran')
+
+    assert calls == ['ran']
+    assert found(result)[0].contents == [HEADER('ahd'), PHRASE('run', '1'), NOTE('(run) -> run')]
+    assert found(result, 1)[0].contents == [
+        HEADER('ahd'), NOTE('Showing results for:'), PHRASE('run', '1'), NOTE('(ran) -> run')
+    ]
+
+    # Entries of the headword itself are not replaced.
+    search_for('run -refresh')
+    search_for('running')
+    result = search_for('run')
+    assert calls == ['ran', 'run', 'running']
+    assert found(result)[0].contents == [HEADER('ahd'), PHRASE('run', '2'), NOTE('(run) -> run')]
+
+
+@pytest.mark.parametrize(('key', 'query', 'expected'), [
+    ('ahd', ' "Gullible"; ', 'gullible'),
+    ('ahd', 'well -  known', 'well-known'),
+    ('collins', ' US ', 'US'),
+    ('diki-en', 'Break+the  ice', 'break the ice'),
+    ('farlex', 'Break  the ice', 'break the ice'),
+    ('wordnet', 'Dog', 'dog'),
+])
+def test_normalize_query(key, query, expected):
+    assert search.QUERY_NORMALIZERS[key](query) == expected
+
+
+def test_search_reports_progress(lookups):
+    lookups(missing=('b',))
+    progress = Progress()
+
+    result = search_for('a -ahd -col, b', progress=progress)
+
+    assert sorted(progress.results) == [
+        ((0, 0), 'ahd'), ((0, 1), 'collins'), ((1, 1), 'farlex')
+    ]
+    assert progress.pending_calls[-1] == []
+    assert [len(x) for x in progress.pending_calls] == [2, 1, 0, 0]
+    assert headers(result) == [['ahd', 'collins'], ['farlex']]
+
+
+def test_search_reports_results_as_they_complete(lookups, monkeypatch):
+    lookups()
+    progress = Progress()
+    order = []
+
+    async def slow(query: str, fetch: fetch_t | None = None) -> Dictionary:
+        await asyncio.sleep(0.05)
+        order.append('slow')
+        return make_dictionary('collins', query)
+
+    async def fast(query: str, fetch: fetch_t | None = None) -> Dictionary:
+        order.append('fast')
+        return make_dictionary('ahd', query)
+
+    monkeypatch.setitem(search.DICTIONARY_LOOKUP, 'collins', slow)
+    monkeypatch.setitem(search.DICTIONARY_LOOKUP, 'ahd', fast)
+    search_for('a -col -ahd', progress=progress)
+
+    assert order == ['fast', 'slow']
+    assert progress.results == [((0, 1), 'ahd'), ((0, 0), 'collins')]
+
+
+def test_diki_audio_is_remembered(lookups, monkeypatch):
+    calls = []
+
+    def diki_audio(phrase: str, flag: str = '') -> str:
+        calls.append(phrase + flag)
+        if phrase == 'tset':
+            raise NotFoundError(f'Diki: no audio for {phrase!r}')
+        return f'https://x/{phrase}{flag}.mp3'
+
+    monkeypatch.setattr(diki, 'diki_audio', diki_audio)
+
+    assert search.diki_audio('run') == 'https://x/run.mp3'
+    assert search.diki_audio('run') == 'https://x/run.mp3'
+    assert search.diki_audio('run', '-n') == 'https://x/run-n.mp3'
+    assert search.diki_audio('run', '-v') == 'https://x/run-v.mp3'
+    assert search.diki_audio('run', '-n') == 'https://x/run-n.mp3'
+    for _ in range(2):
+        with pytest.raises(NotFoundError):
+            search.diki_audio('tset')
+
+    assert calls == ['run', 'run-n', 'run-v', 'tset']
+
+
+@pytest.fixture
+def pages(lookups, monkeypatch):
+    lookups()
+    site = {'one': ('"v1"', b'one')}
+    requests = []
+    parsed = []
+
+    async def request_async(
+            url: str,
+            fields: Mapping[str, str] | None = None,
+            headers: Mapping[str, str] | None = None
+    ) -> Response:
+        query = url.rpartition('/')[2]
+        requests.append((query, headers))
+        etag, body = site[query]
+        if headers is not None and headers.get('If-None-Match') == etag:
+            return Response(304, {}, b'')
+        return Response(200, {'etag': etag}, body)
+
+    async def ask(query: str, fetch: fetch_t) -> Dictionary:
+        html = await fetch(f'https://x/{query}', None)
+        parsed.append(read_page(html))
+        return make_dictionary('ahd', query)
+
+    monkeypatch.setattr(search, 'request_async', request_async)
+    monkeypatch.setattr(search, 'DICTIONARY_LOOKUP', {'ahd': ask})
+    return site, requests, parsed
+
+
+def test_search_refresh_not_modified(pages):
+    site, requests, parsed = pages
+    search_for('one')
+    search_for('one')
+    assert requests == [('one', {})]
+
+    result = search_for('one -refresh')
+    assert requests[1] == ('one', {'If-None-Match': '"v1"'})
+    assert found(result)[0].contents == make_dictionary('ahd', 'one').contents
+    # Not modified, not parsed again.
+    assert parsed == [b'one']
+
+    site['one'] = ('"v2"', b'one v2')
+    search_for('one -refresh')
+    assert parsed == [b'one', b'one v2']
+
+
+def test_search_reparses_stored_pages(pages, monkeypatch):
+    _, requests, parsed = pages
+    search_for('one')
+
+    # The stored entry is of an older parser.
+    monkeypatch.setattr(src.cache, 'MAGIC', MAGIC + 1)
+
+    result = search_for('one')
+    assert result[0] is not None
+    assert requests[1] == ('one', {'If-None-Match': '"v1"'})
+    assert parsed == [b'one', b'one']
+
+
+# Recorded pages of testing/parse_bench.py
+PAGES_DIR = os.path.join(os.path.dirname(__file__), '..', 'testing', 'pages')
+
+WORDNET_PAGE = b'''<html><body>
+<h3>Noun</h3>
+<ul><li>S: (n) run (a score in baseball) "he hit a run"</li></ul>
+</body></html>'''
+
+
+def test_rebuild_parses_stored_pages():
+    db = DictionaryCache()
+    url = 'http://wordnetweb.princeton.edu/perl/webwn?s=runs'
+    page = StoredResponse(url, None, None, 'deflate', zlib.compress(WORDNET_PAGE))
+    db.put_response('wordnet', 'runs', page)
+    db.put_response('wordnet', 'broken', StoredResponse(url, None, None, '', b''))
+
+    # A process pool, the parsers must be usable from other processes.
+    assert search._rebuild(db) == (1, 1)
+
+    dictionary = db.get('wordnet', 'runs')
+    assert dictionary is not None
+    assert dictionary.contents[1] == PHRASE('runs', '')
+    assert list(db.stale_pages()) == []
+
+
+def test_rebuild_cache_is_an_explicit_step(tmp_path, monkeypatch):
+    monkeypatch.setitem(config, 'cachefile', True)
+    monkeypatch.setattr(search, '_cache', search._Cache())
+    monkeypatch.setattr(search, 'REBUILD_BATCH', 2)
+    search._cache._path = str(tmp_path / 'cache.sqlite3')
+
+    db = DictionaryCache(search._cache._path)
+    for query in ('run', 'runs', 'ran'):
+        url = f'http://wordnetweb.princeton.edu/perl/webwn?s={query}'
+        page = StoredResponse(url, None, None, 'deflate', zlib.compress(WORDNET_PAGE))
+        db.put_response('wordnet', query, page)
+    db.close()
+
+    # Opening the cache parses nothing.
+    db, err = search._cache.db
+    assert err is None
+    assert len(list(db.stale_pages())) == 3
+
+    progress = []
+    assert search.rebuild_cache(lambda *x: progress.append(x)) == (3, 0)
+    assert progress == [(1, 0), (2, 0), (3, 0)]
+    assert ('wordnet', 'ran') in db
+
+
+def test_search_parses_pages_in_worker_processes(lookups, monkeypatch):
+    monkeypatch.setitem(config, 'procparse', True)
+    jobs = []
+
+    class Pool(ProcessPoolExecutor):
+        def submit(self, fn, /, *args, **kwargs):
+            jobs.append(fn)
+            return super().submit(fn, *args, **kwargs)
+
+    pool = Pool()
+    monkeypatch.setattr(search, '_parser_pool', pool)
+    requests = []
+
+    async def request_async(
+            url: str,
+            fields: Mapping[str, str] | None = None,
+            headers: Mapping[str, str] | None = None
+    ) -> Response:
+        requests.append(url)
+        return Response(200, {}, WORDNET_PAGE)
+
+    monkeypatch.setattr(search, 'request_async', request_async)
+    try:
+        result = search_for('runs -wnet')
+    finally:
+        pool.shutdown()
+
+    assert requests == ['http://wordnetweb.princeton.edu/perl/webwn?s=runs']
+    # Only the page is parsed by the pool, once.
+    assert jobs == [search._parse_with_config]
+    assert found(result)[0].contents[1] == PHRASE('runs', '')
+    db, _ = search._cache.db
+    dictionary = db.get('wordnet', 'runs')
+    assert dictionary is not None
+    assert dictionary.contents == found(result)[0].contents
+
+
+def test_pooled_parses_follow_config_changes(lookups, monkeypatch):
+    monkeypatch.setitem(config, 'procparse', True)
+    monkeypatch.setitem(config, 'toipa', False)
+    pool = ProcessPoolExecutor(1)
+    monkeypatch.setattr(search, '_parser_pool', pool)
+    with open(os.path.join(PAGES_DIR, 'ahd', 'run.html'), 'rb') as f:
+        page = f.read()
+
+    async def request_async(
+            url: str,
+            fields: Mapping[str, str] | None = None,
+            headers: Mapping[str, str] | None = None
+    ) -> Response:
+        return Response(200, {}, page)
+
+    monkeypatch.setattr(search, 'request_async', request_async)
+    phrases: list[PHRASE] = []
+    try:
+        # The worker is started with the first parse.
+        for toipa in (False, True):
+            config['toipa'] = toipa
+            result = search_for('run -ahd -refresh')
+            contents = found(result)[0].contents
+            assert contents == search.DICTIONARY_PARSERS['ahd'](page, 'run').contents
+            phrases.extend(x for x in contents[:5] if isinstance(x, PHRASE))
+    finally:
+        pool.shutdown()
+
+    assert len(phrases) == 2
+    assert phrases[0].extra != phrases[1].extra